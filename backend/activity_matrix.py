@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+import warnings
+from data_loader import (DEFAULT_CSV_PATH, load_dataset, get_dataset_version, cached_result,
+                         project_labels, resolve_project)
+warnings.filterwarnings('ignore')
+
+
+# active_dates_and_times 为 7天 × 24小时 = 168 个元素的按周小时活跃计数
+HOURS_PER_WEEK = 168
+DAYS_PER_WEEK = 7
+HOURS_PER_DAY = 24
+
+
+# ==================== 活跃时段矩阵构建 ====================
+def build_activity_matrix(csv_path: str = DEFAULT_CSV_PATH) -> dict:
+    """
+    把 active_dates_and_times 列物化为连续存储的 (项目数 × 168) 整数矩阵（每个数据集版本只构建一次）
+
+    返回:
+        {
+            "matrix": np.ndarray,    # int32，C 连续，无数据的项目整行为 0
+            "valid": np.ndarray,     # bool，项目是否有活跃时段数据
+            "profiles": np.ndarray,  # float32，每行归一化为和为 1 的活跃分布
+            "unit": np.ndarray,      # float32，每行 L2 归一化（用于余弦相似度）
+            "labels": list           # 项目全名 owner/repo
+        }
+    """
+    def build():
+        df = load_dataset(csv_path)
+        raw = df['active_dates_and_times'] if 'active_dates_and_times' in df else pd.Series([None] * len(df))
+
+        # 所有项目的字符串一次性拼接后由 numpy 解析，避免逐项目 literal_eval
+        valid = raw.fillna('').astype(str).str.count(',').values == HOURS_PER_WEEK - 1
+        matrix = np.zeros((len(df), HOURS_PER_WEEK), dtype=np.int32)
+        if valid.any():
+            joined = ','.join(raw[valid].astype(str).str.strip().str.strip('[]').tolist())
+            values = np.array(joined.split(','), dtype=np.float64)
+            matrix[valid] = values.reshape(-1, HOURS_PER_WEEK).astype(np.int32)
+
+        totals = matrix.sum(axis=1, keepdims=True).astype(np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True).astype(np.float32)
+        profiles = np.divide(matrix, totals, out=np.zeros(matrix.shape, dtype=np.float32), where=totals > 0)
+        unit = np.divide(matrix, norms, out=np.zeros(matrix.shape, dtype=np.float32), where=norms > 0)
+
+        return {
+            "matrix": np.ascontiguousarray(matrix),
+            "valid": valid & (totals.ravel() > 0),
+            "profiles": np.ascontiguousarray(profiles),
+            "unit": np.ascontiguousarray(unit),
+            "labels": project_labels(df)
+        }
+
+    return cached_result("activity_matrix", csv_path, (), build)
+
+
+# ==================== 封装的查询函数 ====================
+def get_activity_heatmap(csv_path: str = DEFAULT_CSV_PATH, normalize: bool = False) -> dict:
+    """
+    跨项目聚合的活跃时段热力图（7 × 24）
+
+    参数:
+        normalize: False 时为所有项目计数之和；True 时为各项目归一化分布的均值
+                   （每个项目权重相同，不受大项目支配）
+
+    返回:
+        {
+            "metadata": {...},
+            "heatmap": [[...24个值...] × 7],  # 行为星期序号（0-6），列为小时（0-23）
+            "hour_totals": [...],              # 24 小时合计
+            "day_totals": [...]                # 7 天合计
+        }
+    """
+    engine = build_activity_matrix(csv_path)
+    valid = engine["valid"]
+
+    if normalize:
+        week = engine["profiles"][valid].mean(axis=0, dtype=np.float64) if valid.any() else np.zeros(HOURS_PER_WEEK)
+        digits = 6
+    else:
+        week = engine["matrix"][valid].sum(axis=0, dtype=np.int64)
+        digits = 0
+    grid = week.reshape(DAYS_PER_WEEK, HOURS_PER_DAY)
+
+    return {
+        "metadata": {
+            "dataset_version": get_dataset_version(csv_path),
+            "projects_with_data": int(valid.sum()),
+            "normalized": normalize
+        },
+        "heatmap": np.round(grid, digits).tolist(),
+        "hour_totals": np.round(grid.sum(axis=0), digits).tolist(),
+        "day_totals": np.round(grid.sum(axis=1), digits).tolist()
+    }
+
+
+def get_activity_profile(project: str, csv_path: str = DEFAULT_CSV_PATH) -> dict:
+    """
+    单个项目的活跃时段画像（原始计数 + 归一化分布 + 高峰时段）
+    """
+    engine = build_activity_matrix(csv_path)
+    i = resolve_project(load_dataset(csv_path), project)
+
+    counts = engine["matrix"][i].reshape(DAYS_PER_WEEK, HOURS_PER_DAY)
+    profile = engine["profiles"][i].astype(np.float64).reshape(DAYS_PER_WEEK, HOURS_PER_DAY)
+    peak = int(np.argmax(engine["matrix"][i]))
+
+    return {
+        "project": engine["labels"][i],
+        "has_data": bool(engine["valid"][i]),
+        "total_activity": int(counts.sum()),
+        "counts": counts.tolist(),
+        "profile": np.round(profile, 6).tolist(),
+        "hour_profile": np.round(profile.sum(axis=0), 6).tolist(),
+        "day_profile": np.round(profile.sum(axis=1), 6).tolist(),
+        "peak": {"day": peak // HOURS_PER_DAY, "hour": peak % HOURS_PER_DAY}
+    }
+
+
+def find_similar_activity_projects(project: str, top_k: int = 10, csv_path: str = DEFAULT_CSV_PATH) -> dict:
+    """
+    按活跃时段分布的余弦相似度查找工作时间模式相近的项目（一次矩阵-向量乘法完成）
+    """
+    engine = build_activity_matrix(csv_path)
+    i = resolve_project(load_dataset(csv_path), project)
+    if not engine["valid"][i]:
+        raise ValueError(f"项目 {engine['labels'][i]} 没有活跃时段数据")
+
+    scores = engine["unit"] @ engine["unit"][i]
+    scores[i] = -np.inf
+    scores[~engine["valid"]] = -np.inf
+
+    k = int(min(top_k, engine["valid"].sum() - 1))
+    if k <= 0:
+        return {"project": engine["labels"][i], "similar_projects": []}
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top], kind='stable')]
+
+    return {
+        "project": engine["labels"][i],
+        "similar_projects": [
+            {"project": engine["labels"][j], "similarity": round(float(scores[j]), 4)}
+            for j in top
+        ]
+    }
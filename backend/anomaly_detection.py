@@ -0,0 +1,168 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+import warnings
+from data_loader import DEFAULT_CSV_PATH, get_dataset_version, cached_result, resolve_project, load_dataset
+from monthly_series import build_monthly_tensor
+warnings.filterwarnings('ignore')
+
+
+# MAD 换算为标准差的常数（正态分布下 σ ≈ 1.4826 × MAD）
+_MAD_TO_STD = 1.4826
+# 按项目分块计算，控制滑动窗口视图物化后的内存
+_PROJECT_BLOCK = 4096
+
+
+# ==================== 向量化的滚动稳健基线 ====================
+def compute_robust_scores(values: np.ndarray, window: int = 6, min_periods: int = 3,
+                          min_scale_ratio: float = 0.1) -> dict:
+    """
+    对任意形状 (..., 月份数) 的序列张量，按最后一维计算每个点相对其前 window 个月的
+    滚动中位数 / MAD 基线的稳健 Z 分数（基线不包含当前点，避免异常值拉高自身基线）
+
+    参数:
+        values: 序列张量，缺失值为 NaN
+        window: 基线窗口长度（月）
+        min_periods: 基线窗口内至少需要的有效点数
+        min_scale_ratio: 尺度下限（相对基线中位数），避免 MAD 为 0 时分数无穷大
+
+    返回:
+        {"baseline": 中位数, "scale": 稳健标准差, "score": 稳健Z分数, "ratio": 当前值/基线}
+        基线点数不足的位置均为 NaN
+    """
+    lead = values.shape[:-1]
+    flat = values.reshape(-1, values.shape[-1])
+    out = {key: np.full(flat.shape, np.nan) for key in ("baseline", "scale", "score", "ratio")}
+
+    for start in range(0, len(flat), _PROJECT_BLOCK):
+        block = flat[start:start + _PROJECT_BLOCK]
+        # 左侧补 window 个 NaN，第 t 个窗口恰好覆盖 [t-window, t-1]
+        padded = np.concatenate([np.full((len(block), window), np.nan), block[:, :-1]], axis=1)
+        windows = sliding_window_view(padded, window, axis=1)           # (B, M, window)
+
+        count = np.sum(~np.isnan(windows), axis=2)
+        median = np.nanmedian(windows, axis=2)
+        mad = np.nanmedian(np.abs(windows - median[..., None]), axis=2)
+        scale = np.maximum(_MAD_TO_STD * mad, min_scale_ratio * np.abs(median))
+        scale = np.where(scale > 0, scale, np.nan)
+
+        enough = count >= min_periods
+        median = np.where(enough, median, np.nan)
+        scale = np.where(enough, scale, np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out["baseline"][start:start + len(block)] = median
+            out["scale"][start:start + len(block)] = scale
+            out["score"][start:start + len(block)] = (block - median) / scale
+            out["ratio"][start:start + len(block)] = np.where(median > 0, block / median, np.nan)
+
+    return {key: v.reshape(*lead, values.shape[-1]) for key, v in out.items()}
+
+
+# ==================== 封装的异常检测函数 ====================
+def detect_monthly_anomalies(csv_path: str = DEFAULT_CSV_PATH,
+                             window: int = 6,
+                             threshold: float = 3.5,
+                             direction: str = 'up',
+                             metric: str = None,
+                             project: str = None,
+                             since: str = None,
+                             limit: int = 100) -> dict:
+    """
+    对所有项目、所有月度时延指标一次性做滚动中位数/MAD 异常检测
+
+    参数:
+        csv_path: CSV文件路径
+        window: 基线窗口长度（月）
+        threshold: 稳健 Z 分数阈值
+        direction: up 只报告变慢（时延突增），down 只报告变快，both 双向
+        metric: 只返回该指标的异常（可选）
+        project: 只返回该项目的异常（可选，owner/repo 或仓库名）
+        since: 只返回该月份及之后的异常（可选，'YYYY-MM'）
+        limit: 返回的异常点条数上限（按分数绝对值降序）
+
+    返回:
+        {
+            "metadata": {...},
+            "summary": {"by_metric": {...}, "by_month": {...}},  # 全量异常计数（不受 limit 影响）
+            "anomalies": [...]
+        }
+    """
+    if direction not in ('up', 'down', 'both'):
+        raise ValueError("direction 只能是 up / down / both")
+
+    flags = cached_result(
+        "monthly_anomalies", csv_path, (window, threshold, direction),
+        lambda: _detect(csv_path, window, threshold, direction)
+    )
+    tensor = build_monthly_tensor(csv_path)
+
+    # 在缓存的全量异常点上做筛选
+    selected = flags
+    if metric:
+        if metric not in tensor["metrics"]:
+            raise ValueError(f"未知的月度指标: {metric}，可选: {', '.join(tensor['metrics'])}")
+        selected = selected[selected["metric"] == metric]
+    if project:
+        selected = selected[selected["project_index"] == resolve_project(load_dataset(csv_path), project)]
+    if since:
+        selected = selected[selected["month"] >= since]
+
+    top = selected.iloc[np.argsort(-selected["score"].abs().values, kind='stable')[:limit]]
+
+    return {
+        "metadata": {
+            "dataset_version": get_dataset_version(csv_path),
+            "window": window,
+            "threshold": threshold,
+            "direction": direction,
+            "metrics": tensor["metrics"],
+            "months": [tensor["months"][0], tensor["months"][-1]] if tensor["months"] else [],
+            "total_anomalies": int(len(selected))
+        },
+        "summary": {
+            "by_metric": {k: int(v) for k, v in selected.groupby("metric").size().items()},
+            "by_month": {k: int(v) for k, v in selected.groupby("month").size().sort_index().items()}
+        },
+        "anomalies": [
+            {
+                "project": row.project,
+                "metric": row.metric,
+                "month": row.month,
+                "value": round(float(row.value), 4),
+                "baseline": round(float(row.baseline), 4),
+                "ratio": None if pd.isna(row.ratio) else round(float(row.ratio), 2),
+                "score": round(float(row.score), 2)
+            }
+            for row in top.itertuples(index=False)
+        ]
+    }
+
+
+def _detect(csv_path: str, window: int, threshold: float, direction: str) -> pd.DataFrame:
+    tensor = build_monthly_tensor(csv_path)
+    values = tensor["values"]
+    scores = compute_robust_scores(values, window=window)
+    score = scores["score"]
+
+    with np.errstate(invalid='ignore'):
+        if direction == 'up':
+            mask = score > threshold
+        elif direction == 'down':
+            mask = score < -threshold
+        else:
+            mask = np.abs(score) > threshold
+
+    k, p, m = np.nonzero(mask)
+    metrics = np.array(tensor["metrics"], dtype=object)
+    months = np.array(tensor["months"], dtype=object)
+    labels = np.array(tensor["labels"], dtype=object)
+    return pd.DataFrame({
+        "metric": metrics[k],
+        "project_index": p,
+        "project": labels[p],
+        "month": months[m],
+        "value": values[k, p, m],
+        "baseline": scores["baseline"][k, p, m],
+        "ratio": scores["ratio"][k, p, m],
+        "score": score[k, p, m]
+    })
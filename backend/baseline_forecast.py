@@ -0,0 +1,245 @@
+import numpy as np
+import pandas as pd
+import warnings
+from data_loader import DEFAULT_CSV_PATH, get_dataset_version, cached_result, resolve_project, load_dataset
+from monthly_series import build_monthly_tensor
+warnings.filterwarnings('ignore')
+
+
+# 基线模型按计算成本从低到高排列；模型选择时在误差容差内优先选靠前的模型
+BASELINE_MODELS = ['naive', 'seasonal_naive', 'moving_average_3', 'moving_average_6', 'drift', 'exp_smoothing']
+
+# 指数平滑的平滑系数候选（按项目选样本内一步误差最小者）
+SES_ALPHAS = np.array([0.1, 0.3, 0.5, 0.7, 0.9])
+
+SEASON_LENGTH = 12
+
+
+# ==================== 封装的基线预测函数 ====================
+def evaluate_baseline_forecasts(csv_path: str = DEFAULT_CSV_PATH,
+                                metric: str = 'change_request_response_time',
+                                horizon: int = 6,
+                                n_backtest: int = 3,
+                                tolerance: float = 0.05,
+                                xgboost_threshold: float = 0.5,
+                                min_points: int = 6) -> dict:
+    """
+    对一个月度指标的所有项目，同时评估全部闭式基线模型并选择模型（全部为数组运算）
+
+    评估方式：滚动起点回测，最后 n_backtest 个观测点依次作为一步预测的目标
+    模型选择：在最小回测 MAE 的 (1 + tolerance) 倍以内，选计算成本最低的模型；
+             若最优基线的相对误差（MAE / 序列均值）仍大于 xgboost_threshold，
+             则 needs_xgboost 为 True，仅表示建议交给 XGBoost 预测接口；
+             XGBoost 不参与这里的评估，selected_model 始终是回测过的基线模型
+
+    返回:
+        {
+            "metadata": {...},
+            "metric_selection": {...},   # 按指标整体选择（所有项目 MAE 的均值）
+            "model_summary": {...},      # 各模型的平均回测 MAE 与按项目被选中的次数
+            "projects": DataFrame        # 按项目的回测误差、选中模型、未来预测（内部使用）
+        }
+    """
+    def compute():
+        tensor = build_monthly_tensor(csv_path)
+        if metric not in tensor["metrics"]:
+            raise ValueError(f"未知的月度指标: {metric}，可选: {', '.join(tensor['metrics'])}")
+        values = tensor["values"][tensor["metrics"].index(metric)]
+        months = pd.PeriodIndex(tensor["months"], freq='M')
+
+        # 1. 观测点右对齐压缩：每行的有效值按时间顺序排到最右侧，缺失值在左侧
+        observed = ~np.isnan(values)
+        counts = observed.sum(axis=1)
+        order = np.argsort(observed, axis=1, kind='stable')
+        compact = np.take_along_axis(values, order, axis=1)
+        calendar = np.where(np.take_along_axis(observed, order, axis=1), order, -1)
+        eligible = counts >= min_points
+
+        # 2. 滚动起点回测：对每个模型得到 (项目 × n_backtest) 的一步预测误差
+        errors = {name: np.full((len(values), n_backtest), np.nan) for name in BASELINE_MODELS}
+        width = compact.shape[1]
+        for j in range(1, n_backtest + 1):
+            history = compact[:, :width - j]
+            target = compact[:, width - j]
+            target_month = calendar[:, width - j]
+            forecasts = _forecast_all(history, values, target_month, steps=1)
+            for name in BASELINE_MODELS:
+                errors[name][:, j - 1] = np.abs(forecasts[name][:, 0] - target)
+
+        mae = np.column_stack([np.nanmean(errors[name], axis=1) for name in BASELINE_MODELS])
+        mae[~eligible] = np.nan
+
+        # 3. 按项目选择模型：误差容差内成本最低（BASELINE_MODELS 已按成本排序）
+        best_mae = np.nanmin(mae, axis=1)
+        within = mae <= best_mae[:, None] * (1 + tolerance) + 1e-12
+        selected = np.where(within.any(axis=1), np.argmax(within, axis=1), -1)
+        level = np.nanmean(compact, axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            relative_error = best_mae / np.where(level > 0, level, np.nan)
+        needs_xgboost = relative_error > xgboost_threshold
+
+        # 4. 用全部历史做未来 horizon 个月的预测
+        last_month = np.where(counts > 0, calendar[:, -1], -1)
+        future = _forecast_all(compact, values, np.where(counts > 0, last_month + 1, -SEASON_LENGTH - horizon),
+                               steps=horizon)
+
+        # 5. 按指标整体选择
+        mean_mae = np.nanmean(mae[eligible], axis=0) if eligible.any() else np.full(len(BASELINE_MODELS), np.nan)
+        metric_best = np.nanmin(mean_mae) if np.isfinite(mean_mae).any() else np.nan
+        metric_choice = next(
+            (name for name, e in zip(BASELINE_MODELS, mean_mae) if e <= metric_best * (1 + tolerance) + 1e-12),
+            None
+        )
+
+        projects = pd.DataFrame({
+            "project": tensor["labels"],
+            "points": counts,
+            "eligible": eligible,
+            "selected_model": [BASELINE_MODELS[s] if s >= 0 else None for s in selected],
+            "best_mae": best_mae,
+            "relative_error": relative_error,
+            "needs_xgboost": needs_xgboost & eligible,
+            "last_month": [str(months[m]) if m >= 0 else None for m in last_month]
+        })
+        for k, name in enumerate(BASELINE_MODELS):
+            projects[f"mae_{name}"] = mae[:, k]
+        projects["forecast"] = [
+            future[BASELINE_MODELS[s]][i].tolist() if s >= 0 else None for i, s in enumerate(selected)
+        ]
+
+        chosen = projects.loc[eligible, "selected_model"]
+        return {
+            "metadata": {
+                "dataset_version": get_dataset_version(csv_path),
+                "metric": metric,
+                "horizon": horizon,
+                "n_backtest": n_backtest,
+                "tolerance": tolerance,
+                "xgboost_threshold": xgboost_threshold,
+                "eligible_projects": int(eligible.sum()),
+                "projects_needing_xgboost": int(projects["needs_xgboost"].sum())
+            },
+            "metric_selection": {
+                "selected_model": metric_choice,
+                "mean_mae": {name: _round(e) for name, e in zip(BASELINE_MODELS, mean_mae)}
+            },
+            "model_summary": {
+                name: {"mean_mae": _round(e), "selected_count": int((chosen == name).sum())}
+                for name, e in zip(BASELINE_MODELS, mean_mae)
+            },
+            "projects": projects
+        }
+
+    return cached_result(
+        "baseline_forecasts", csv_path,
+        (metric, horizon, n_backtest, tolerance, xgboost_threshold, min_points), compute
+    )
+
+
+def get_baseline_forecasts(csv_path: str = DEFAULT_CSV_PATH,
+                           metric: str = 'change_request_response_time',
+                           horizon: int = 6,
+                           tolerance: float = 0.05,
+                           project: str = None,
+                           limit: int = 50) -> dict:
+    """
+    获取基线模型评估与预测结果（JSON 友好），可只看单个项目
+    """
+    result = evaluate_baseline_forecasts(csv_path, metric=metric, horizon=horizon, tolerance=tolerance)
+    projects = result["projects"]
+    if project:
+        projects = projects.iloc[[resolve_project(load_dataset(csv_path), project)]]
+    else:
+        projects = projects[projects["eligible"]].head(limit)
+
+    return {
+        "metadata": result["metadata"],
+        "metric_selection": result["metric_selection"],
+        "model_summary": result["model_summary"],
+        "projects": [_project_json(row, horizon) for _, row in projects.iterrows()]
+    }
+
+
+# ==================== 向量化的基线模型 ====================
+def _forecast_all(history: np.ndarray, calendar_values: np.ndarray, first_month: np.ndarray, steps: int) -> dict:
+    """
+    history: 右对齐压缩后的观测值 (P × L)，最后一列为最近观测
+    calendar_values: 日历月份网格上的原始值 (P × M)，用于季节性朴素预测
+    first_month: 每个项目第一个预测月份在日历网格上的下标（可超出网格）
+    返回每个模型的 (P × steps) 预测
+    """
+    n = history.shape[0]
+    last = history[:, -1] if history.shape[1] else np.full(n, np.nan)
+    h = np.arange(1, steps + 1)
+    out = {}
+
+    out["naive"] = np.repeat(last[:, None], steps, axis=1)
+
+    # 季节性朴素：取 12 个月前同月的值，缺失时退化为朴素预测
+    season = np.full((n, steps), np.nan)
+    for s in range(steps):
+        target = first_month + s - SEASON_LENGTH
+        valid = (target >= 0) & (target < calendar_values.shape[1])
+        season[valid, s] = calendar_values[np.flatnonzero(valid), target[valid]]
+    out["seasonal_naive"] = np.where(np.isnan(season), out["naive"], season)
+
+    for window in (3, 6):
+        mean = np.nanmean(history[:, -window:], axis=1) if history.shape[1] else np.full(n, np.nan)
+        out[f"moving_average_{window}"] = np.repeat(mean[:, None], steps, axis=1)
+
+    # 漂移：最近观测 + 首尾平均斜率 × 步数
+    count = np.sum(~np.isnan(history), axis=1)
+    first = history[np.arange(n), np.clip(history.shape[1] - count, 0, max(history.shape[1] - 1, 0))] \
+        if history.shape[1] else last
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = np.where(count > 1, (last - first) / (count - 1), 0.0)
+    out["drift"] = last[:, None] + slope[:, None] * h[None, :]
+
+    out["exp_smoothing"] = np.repeat(_simple_exp_smoothing(history)[:, None], steps, axis=1)
+    return out
+
+
+def _simple_exp_smoothing(history: np.ndarray) -> np.ndarray:
+    """
+    简单指数平滑，所有项目 × 所有 alpha 同时递推（循环只在时间维上）
+    每个项目选样本内一步预测平方误差最小的 alpha，返回其最终平滑水平
+    """
+    n, width = history.shape
+    if width == 0:
+        return np.full(n, np.nan)
+    alphas = SES_ALPHAS[None, :]
+    level = np.full((n, len(SES_ALPHAS)), np.nan)
+    sse = np.zeros((n, len(SES_ALPHAS)))
+    for t in range(width):
+        x = history[:, t][:, None]
+        has_x = ~np.isnan(x)
+        started = ~np.isnan(level)
+        sse += np.where(has_x & started, (x - level) ** 2, 0.0)
+        updated = np.where(started, alphas * x + (1 - alphas) * level, x)
+        level = np.where(has_x, updated, level)
+    best = np.argmin(sse, axis=1)
+    return level[np.arange(n), best]
+
+
+# ==================== 工具函数 ====================
+def _round(value, digits: int = 4):
+    return None if value is None or pd.isna(value) else round(float(value), digits)
+
+
+def _project_json(row: pd.Series, horizon: int) -> dict:
+    future_months = []
+    if row["last_month"]:
+        start = pd.Period(row["last_month"], freq='M')
+        future_months = [str(start + i) for i in range(1, horizon + 1)]
+    return {
+        "project": row["project"],
+        "points": int(row["points"]),
+        "selected_model": row["selected_model"],
+        "needs_xgboost": bool(row["needs_xgboost"]),
+        "relative_error": _round(row["relative_error"]),
+        "backtest_mae": {name: _round(row[f"mae_{name}"]) for name in BASELINE_MODELS},
+        "forecast": {
+            "months": future_months,
+            "values": [_round(v, 2) for v in row["forecast"]] if row["forecast"] is not None else []
+        }
+    }
@@ -0,0 +1,195 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import warnings
+from data_loader import (DEFAULT_CSV_PATH, load_dataset, get_dataset_version, cached_result,
+                         project_labels, resolve_project)
+warnings.filterwarnings('ignore')
+
+
+# activity_details 中的 ['login', score] 对；new_contributors_detail 中的 'login'
+_ACTIVITY_PAIR_PATTERN = r"\[\s*['\"]([^'\"]+)['\"]\s*,\s*([-+\d.eE]+)\s*\]"
+_LOGIN_PATTERN = r"['\"]([^'\"]+)['\"]"
+
+
+# ==================== 贡献者-项目稀疏图构建 ====================
+def build_contributor_graph(csv_path: str = DEFAULT_CSV_PATH) -> dict:
+    """
+    由 activity_details 和 new_contributors_detail 构建 (贡献者 × 项目) 的 CSR 稀疏矩阵
+    （每个数据集版本只构建一次，登录名通过 pd.factorize 统一编码为整数 ID）
+
+    返回:
+        {
+            "logins": np.ndarray,      # 贡献者 ID -> 登录名
+            "login_index": pd.Index,   # 登录名 -> 贡献者 ID
+            "activity": csr_matrix,    # float32，贡献者在项目中的活跃度得分（新贡献者无得分时为 0）
+            "membership": csr_matrix,  # int32 0/1，贡献者是否参与项目（活跃或新贡献者）
+            "newcomer": csr_matrix,    # int32 0/1，贡献者是否为项目的新贡献者
+            "project_membership": csr_matrix,  # membership 的转置 (项目 × 贡献者)
+            "project_activity": csr_matrix,    # activity 的转置 (项目 × 贡献者)
+            "project_activity_norms": np.ndarray,  # 每个项目活跃度向量的 L2 范数
+            "labels": list             # 项目全名 owner/repo
+        }
+    """
+    def build():
+        df = load_dataset(csv_path)
+        n_projects = len(df)
+
+        activity_edges = _extract_edges(df, 'activity_details', _ACTIVITY_PAIR_PATTERN, with_score=True)
+        newcomer_edges = _extract_edges(df, 'new_contributors_detail', _LOGIN_PATTERN, with_score=False)
+
+        # 登录名统一编码
+        all_logins = pd.concat([activity_edges['login'], newcomer_edges['login']], ignore_index=True)
+        codes, logins = pd.factorize(all_logins, sort=False)
+        n_contributors = len(logins)
+        activity_codes = codes[:len(activity_edges)]
+        newcomer_codes = codes[len(activity_edges):]
+        shape = (n_contributors, n_projects)
+
+        # 重复的 (贡献者, 项目) 对在 tocsr() 时会被累加，这里先对 0/1 矩阵做截断
+        activity = sp.coo_matrix(
+            (activity_edges['score'].values.astype(np.float32), (activity_codes, activity_edges['project'].values)),
+            shape=shape
+        ).tocsr()
+        newcomer = sp.coo_matrix(
+            (np.ones(len(newcomer_codes), dtype=np.int32), (newcomer_codes, newcomer_edges['project'].values)),
+            shape=shape
+        ).tocsr()
+        newcomer.data = np.minimum(newcomer.data, 1)
+
+        active = sp.coo_matrix(
+            (np.ones(len(activity_codes), dtype=np.int32), (activity_codes, activity_edges['project'].values)),
+            shape=shape
+        ).tocsr()
+        membership = (active + newcomer).tocsr()
+        membership.data = np.minimum(membership.data, 1)
+        membership.eliminate_zeros()
+        project_activity = activity.T.tocsr()
+
+        return {
+            "logins": np.asarray(logins),
+            "login_index": pd.Index(logins),
+            "activity": activity,
+            "membership": membership,
+            "newcomer": newcomer,
+            "project_membership": membership.T.tocsr(),
+            "project_activity": project_activity,
+            "project_activity_norms": np.sqrt(np.asarray(project_activity.multiply(project_activity).sum(axis=1)).ravel()),
+            "labels": project_labels(df)
+        }
+
+    return cached_result("contributor_graph", csv_path, (), build)
+
+
+def _extract_edges(df: pd.DataFrame, column: str, pattern: str, with_score: bool) -> pd.DataFrame:
+    """用 str.extractall 一次性从整列字符串中抽取 (项目, 登录名[, 得分]) 边表"""
+    if column not in df:
+        return pd.DataFrame({"project": np.array([], dtype=np.int64), "login": [], "score": []})
+    raw = df[column].reset_index(drop=True).fillna('').astype(str)
+    matches = raw.str.extractall(pattern)
+    edges = pd.DataFrame({
+        "project": matches.index.get_level_values(0).values.astype(np.int64),
+        "login": matches[0].values
+    })
+    edges["score"] = pd.to_numeric(matches[1].values, errors='coerce') if with_score else 0.0
+    edges["score"] = edges["score"].fillna(0.0)
+    return edges
+
+
+# ==================== 封装的查询函数 ====================
+def get_contributor_graph_summary(csv_path: str = DEFAULT_CSV_PATH, top_k: int = 20) -> dict:
+    """
+    贡献者图概况：贡献者数、边数，以及参与项目最多的贡献者
+    """
+    graph = build_contributor_graph(csv_path)
+    membership = graph["membership"]
+    project_counts = np.asarray(membership.sum(axis=1)).ravel()
+    top = _top_k(project_counts, top_k)
+
+    return {
+        "metadata": {
+            "dataset_version": get_dataset_version(csv_path),
+            "contributors": int(membership.shape[0]),
+            "projects": int(membership.shape[1]),
+            "edges": int(membership.nnz),
+            "newcomer_edges": int(graph["newcomer"].nnz),
+            "multi_project_contributors": int((project_counts > 1).sum())
+        },
+        "top_contributors": [
+            {"login": graph["logins"][i], "project_count": int(project_counts[i])}
+            for i in top if project_counts[i] > 0
+        ]
+    }
+
+
+def get_contributor_projects(login: str, csv_path: str = DEFAULT_CSV_PATH) -> dict:
+    """
+    单个贡献者参与的项目及其在各项目中的活跃度得分
+    """
+    graph = build_contributor_graph(csv_path)
+    if login not in graph["login_index"]:
+        raise KeyError(f"未找到贡献者: {login}")
+    row = graph["login_index"].get_loc(login)
+
+    projects = graph["membership"][row].indices
+    scores = graph["activity"][row].toarray().ravel()
+    is_new = graph["newcomer"][row].toarray().ravel()
+    order = projects[np.argsort(-scores[projects], kind='stable')]
+
+    return {
+        "login": login,
+        "project_count": int(len(projects)),
+        "total_activity_score": round(float(scores.sum()), 4),
+        "projects": [
+            {"project": graph["labels"][j], "activity_score": round(float(scores[j]), 4),
+             "is_new_contributor": bool(is_new[j])}
+            for j in order
+        ]
+    }
+
+
+def find_projects_sharing_contributors(project: str, top_k: int = 10, csv_path: str = DEFAULT_CSV_PATH) -> dict:
+    """
+    查找与指定项目共享贡献者最多的项目（稀疏矩阵乘积一次算出与所有项目的重叠）
+
+    返回每个项目的：
+        shared_contributors: 共同贡献者人数
+        jaccard: 共同贡献者 / 两个项目贡献者并集
+        weighted_overlap: 按活跃度得分加权的余弦相似度
+    """
+    graph = build_contributor_graph(csv_path)
+    j = resolve_project(load_dataset(csv_path), project)
+
+    project_membership = graph["project_membership"]
+    shared = np.asarray((project_membership @ project_membership[j].T).toarray()).ravel()
+    degrees = np.diff(project_membership.indptr)
+
+    # 加权重叠：项目活跃度向量的余弦相似度
+    project_activity = graph["project_activity"]
+    weighted = np.asarray((project_activity @ project_activity[j].T).toarray()).ravel()
+    norms = graph["project_activity_norms"]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        jaccard = np.where(shared > 0, shared / (degrees + degrees[j] - shared), 0.0)
+        weighted = np.where(norms * norms[j] > 0, weighted / (norms * norms[j]), 0.0)
+
+    shared[j] = -1
+    top = [i for i in _top_k(shared, top_k) if shared[i] > 0]
+
+    return {
+        "project": graph["labels"][j],
+        "contributor_count": int(degrees[j]),
+        "similar_projects": [
+            {"project": graph["labels"][i], "shared_contributors": int(shared[i]),
+             "jaccard": round(float(jaccard[i]), 4), "weighted_overlap": round(float(weighted[i]), 4)}
+            for i in top
+        ]
+    }
+
+
+def _top_k(values: np.ndarray, k: int) -> np.ndarray:
+    """降序前 k 个位置（argpartition + 局部排序）"""
+    k = min(k, len(values))
+    if k <= 0:
+        return np.array([], dtype=np.int64)
+    top = np.argpartition(-values, k - 1)[:k]
+    return top[np.argsort(-values[top], kind='stable')]
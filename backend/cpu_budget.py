@@ -0,0 +1,145 @@
+import os
+import threading
+from contextlib import contextmanager
+from threadpoolctl import threadpool_limits
+from env_config import env_int
+from data_loader import dataset_nbytes
+
+
+# ==================== 资源预算配置（容器部署时通过环境变量调整） ====================
+def _available_cpus() -> int:
+    # 优先使用进程可用的 CPU 集合（容器 cpuset 限制时比 cpu_count 准确）
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+# 整个后端可用的 CPU 线程总数
+CPU_BUDGET = max(1, env_int("OPENSODA_CPU_BUDGET", _available_cpus()))
+# 同时运行的计算任务上限；超出的任务排队等待
+MAX_CONCURRENT_JOBS = max(1, env_int("OPENSODA_MAX_CONCURRENT_JOBS", 2))
+# 每个任务的内存上限（MB），0 表示不限制
+JOB_MEMORY_MB = max(0, env_int("OPENSODA_JOB_MEMORY_MB", 0))
+# 任务工作集的估算倍数：数值化副本、标准化矩阵、派生张量等约为所用数据集内存占用的数倍
+JOB_WORKING_SET_FACTOR = 4
+
+_job_semaphore = threading.BoundedSemaphore(MAX_CONCURRENT_JOBS)
+_active_jobs = {}
+_active_lock = threading.Lock()
+_local = threading.local()
+
+
+class JobMemoryExceeded(MemoryError):
+    """任务预估内存超过 OPENSODA_JOB_MEMORY_MB"""
+
+
+# ==================== 任务资源分配 ====================
+class JobResources:
+    """
+    单个计算任务分到的资源：threads 个 CPU 线程（估计器 n_jobs、BLAS 线程共用）
+    以及 memory_bytes 的内存上限
+    """
+
+    def __init__(self, name: str, threads: int, memory_bytes: int):
+        self.name = name
+        self.threads = threads
+        self.memory_bytes = memory_bytes
+
+    def split(self, n_tasks: int):
+        """
+        把本任务的线程分给 n_tasks 个并行子任务（如交叉验证各折、多个模型）
+
+        返回:
+            (并行 worker 数, 每个 worker 内估计器可用的线程数)，两者乘积不超过 threads
+        """
+        workers = max(1, min(n_tasks, self.threads))
+        return workers, max(1, self.threads // workers)
+
+    def ensure_memory(self, nbytes: int, what: str = "数据"):
+        """分配大块内存前检查预估大小，超过上限时抛出 JobMemoryExceeded"""
+        if self.memory_bytes and nbytes > self.memory_bytes:
+            raise JobMemoryExceeded(
+                f"{what}预计占用 {nbytes / 2 ** 20:.1f} MB，超过单任务内存上限 {JOB_MEMORY_MB} MB"
+                f"（可通过 OPENSODA_JOB_MEMORY_MB 调整）"
+            )
+
+
+def threads_per_job() -> int:
+    """按并发任务数平分 CPU 预算，保证所有任务同时运行时也不会超订"""
+    return max(1, CPU_BUDGET // MAX_CONCURRENT_JOBS)
+
+
+@contextmanager
+def job_resources(name: str, wait_timeout: float = None, datasets=()):
+    """
+    申请一个计算任务槽位，任务期间 current_job() 返回本任务的线程份额（供估计器 n_jobs / nthread 使用）
+
+    拿到槽位后先按所用数据集的内存占用 × JOB_WORKING_SET_FACTOR 检查单任务内存上限，
+    所有任务都经过这一检查；流水线内部在分配大块内存前还可以用 ensure_memory 做更精确的检查
+
+    BLAS/OpenMP 线程数是进程级设置，不能按任务切换（任务重叠时先结束的任务会把限制恢复到
+    另一个任务之下），因此由 configure_native_threads() 在启动时统一设置为每任务份额
+
+    参数:
+        name: 任务名（用于资源状态查询）
+        wait_timeout: 排队等待的最长时间（秒），为空表示一直等待
+        datasets: 任务读取的数据集 CSV 路径（用于估算任务工作集）
+
+    用法:
+        with job_resources("response_time") as res:
+            model = xgb.XGBRegressor(n_jobs=res.threads)
+    """
+    acquired = _job_semaphore.acquire(timeout=wait_timeout) if wait_timeout else _job_semaphore.acquire()
+    if not acquired:
+        raise RuntimeError(f"计算资源繁忙：已有 {MAX_CONCURRENT_JOBS} 个任务在运行")
+
+    resources = JobResources(name, threads_per_job(), JOB_MEMORY_MB * 2 ** 20)
+    job_id = id(resources)
+    with _active_lock:
+        _active_jobs[job_id] = resources
+    previous = getattr(_local, "resources", None)
+    _local.resources = resources
+    try:
+        if resources.memory_bytes and datasets:
+            resources.ensure_memory(sum(dataset_nbytes(p) for p in datasets) * JOB_WORKING_SET_FACTOR,
+                                    "任务工作集")
+        yield resources
+    finally:
+        _local.resources = previous
+        with _active_lock:
+            _active_jobs.pop(job_id, None)
+        _job_semaphore.release()
+
+
+def configure_native_threads():
+    """
+    进程启动时调用一次：把 BLAS/OpenMP 线程池统一限制为 threads_per_job()，
+    MAX_CONCURRENT_JOBS 个任务同时运行时原生线程总数也不超过 CPU_BUDGET
+    （环境变量只对之后才加载的库生效，已加载的库由 threadpoolctl 直接设置）
+    """
+    threads = str(threads_per_job())
+    for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ.setdefault(var, threads)
+    threadpool_limits(limits=threads_per_job())
+
+
+def current_job() -> JobResources:
+    """
+    当前线程所在任务的资源；不在任何任务中时（如脚本模式）返回一份默认份额，
+    让流水线代码无论是否由任务入口调用都能统一取线程数
+    """
+    resources = getattr(_local, "resources", None)
+    return resources if resources is not None else JobResources("default", threads_per_job(), JOB_MEMORY_MB * 2 ** 20)
+
+
+def get_resource_status() -> dict:
+    """资源预算配置与当前运行中的任务"""
+    with _active_lock:
+        jobs = [{"name": r.name, "threads": r.threads} for r in _active_jobs.values()]
+    return {
+        "cpu_budget": CPU_BUDGET,
+        "max_concurrent_jobs": MAX_CONCURRENT_JOBS,
+        "threads_per_job": threads_per_job(),
+        "job_memory_mb": JOB_MEMORY_MB or None,
+        "active_jobs": jobs
+    }
@@ -0,0 +1,267 @@
+import numpy as np
+import pandas as pd
+import warnings
+from data_loader import DEFAULT_CSV_PATH, load_parsed_dataset, get_dataset_version, cached_result
+warnings.filterwarnings('ignore')
+
+
+# 看板页面（与前端 views 一一对应）
+DASHBOARD_SECTIONS = (
+    'activity',         # ActivityAnalysis.vue
+    'code_changes',     # CodeChanges.vue
+    'attention',        # CommunityAttention.vue
+    'contributors',     # ContributorEcosystem.vue
+    'impact',           # ImpactAnalysis.vue
+    'issue_lifecycle'   # IssueLifecycle.vue
+)
+
+
+# ==================== 封装的看板聚合函数 ====================
+def get_dashboard_summary(section: str = None, csv_path: str = DEFAULT_CSV_PATH, top_n: int = 20) -> dict:
+    """
+    获取看板页面的预计算聚合数据（每个数据集版本只计算一次）
+
+    参数:
+        section: 看板名称（见 DASHBOARD_SECTIONS），为空时返回全部看板
+        csv_path: CSV文件路径
+        top_n: 排行榜长度
+
+    返回:
+        {
+            "section": "activity",
+            "dataset_version": "...",
+            "summary": {...},        # 顶部指标卡片
+            "rankings": {...},       # 各类排行榜（项目名 + 数值）
+            "distributions": {...}   # 分段统计 / 月度序列等
+        }
+    """
+    if section is None:
+        return {name: get_dashboard_summary(name, csv_path, top_n) for name in DASHBOARD_SECTIONS}
+    if section not in DASHBOARD_SECTIONS:
+        raise ValueError(f"未知的看板: {section}，可选: {', '.join(DASHBOARD_SECTIONS)}")
+
+    def build():
+        df = load_parsed_dataset(csv_path)
+        result = _SECTION_BUILDERS[section](df, top_n)
+        return {
+            "section": section,
+            "dataset_version": get_dataset_version(csv_path),
+            "project_count": int(len(df)),
+            **result
+        }
+
+    return cached_result("dashboard", csv_path, (section, top_n), build)
+
+
+# ==================== 各看板聚合逻辑 ====================
+def _activity(df: pd.DataFrame, top_n: int) -> dict:
+    activity = _col(df, 'activity')
+    new_contributors = _col(df, 'new_contributors')
+    return {
+        "summary": {
+            "avg_activity": _round(activity.mean()),
+            "total_new_contributors": _round(new_contributors.sum()),
+            "total_inactive_contributors": _round(_col(df, 'inactive_contributors').sum()),
+            "active_projects": int((activity > 50).sum())
+        },
+        "rankings": {
+            "activity": _top(df, activity, top_n),
+            "new_contributors": _top(df, new_contributors, top_n, positive_only=True)
+        },
+        "distributions": {}
+    }
+
+
+def _code_changes(df: pd.DataFrame, top_n: int) -> dict:
+    change_requests = _col(df, 'change_requests')
+    accepted = _col(df, 'change_requests_accepted')
+    lines_add = _col(df, 'code_change_lines_add')
+    lines_remove = _col(df, 'code_change_lines_remove')
+
+    # PR 接受率分布（没有 PR 的项目不计入）
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = np.where(change_requests > 0, accepted / change_requests, np.nan)
+
+    top_lines = _top_index(_col(df, 'code_change_lines_sum').abs(), top_n)
+    return {
+        "summary": {
+            "total_prs": _round(change_requests.sum()),
+            "total_accepted_prs": _round(accepted.sum()),
+            "total_lines_added": _round(lines_add.sum()),
+            "total_lines_removed": _round(lines_remove.sum())
+        },
+        "rankings": {
+            "code_change_lines": [
+                {"project_name": _name(df, i), "lines_add": _round(lines_add.iat[i]),
+                 "lines_remove": _round(lines_remove.iat[i])}
+                for i in top_lines
+            ],
+            "change_requests_reviews": _top(df, _col(df, 'change_requests_reviews'), top_n)
+        },
+        "distributions": {
+            "pr_acceptance_rate": _bucket_counts(
+                rate, [('0-20%', 0.2), ('21-40%', 0.4), ('41-60%', 0.6), ('61-80%', 0.8), ('81-100%', 1.0)]
+            )
+        }
+    }
+
+
+def _attention(df: pd.DataFrame, top_n: int) -> dict:
+    issue_comments = _col(df, 'issue_comments')
+    reviews = _col(df, 'change_requests_reviews')
+    top_interaction = _top_index(issue_comments + reviews, top_n)
+    return {
+        "summary": {
+            "total_attention": _round(_col(df, 'attention').sum()),
+            "total_stars": _round(_col(df, 'stars').sum()),
+            "total_forks": _round(_col(df, 'technical_fork').sum()),
+            "total_participants": _round(_col(df, 'participants').sum())
+        },
+        "rankings": {
+            "attention": _top(df, _col(df, 'attention'), top_n),
+            "interaction": [
+                {"project_name": _name(df, i), "issue_comments": _round(issue_comments.iat[i]),
+                 "change_requests_reviews": _round(reviews.iat[i])}
+                for i in top_interaction
+            ]
+        },
+        "distributions": {}
+    }
+
+
+def _contributors(df: pd.DataFrame, top_n: int) -> dict:
+    # 邮箱后缀统计：汇总所有项目的 [后缀, 人数] 列表
+    suffix_counts = {}
+    for pairs in df['contributor_email_suffixes'].dropna() if 'contributor_email_suffixes' in df else []:
+        for domain, count in pairs:
+            suffix_counts[domain] = suffix_counts.get(domain, 0) + float(count)
+    top_suffixes = sorted(suffix_counts.items(), key=lambda x: x[1], reverse=True)[:10]
+
+    return {
+        "summary": {
+            "avg_bus_factor": _round(_col(df, 'bus_factor').mean()),
+            "total_participants": _round(_col(df, 'participants').sum()),
+            "total_new_contributors": _round(_col(df, 'new_contributors').sum()),
+            "total_inactive_contributors": _round(_col(df, 'inactive_contributors').sum())
+        },
+        "rankings": {
+            "bus_factor": _top(df, _col(df, 'bus_factor'), top_n),
+            "email_suffixes": [{"name": d, "value": _round(v)} for d, v in top_suffixes]
+        },
+        "distributions": {
+            "participants": _bucket_counts(
+                _col(df, 'participants').values, [('1-10', 10), ('11-50', 50), ('51-100', 100), ('101-200', 200), ('200+', np.inf)]
+            )
+        }
+    }
+
+
+def _impact(df: pd.DataFrame, top_n: int) -> dict:
+    return {
+        "summary": {
+            "total_stars": _round(_col(df, 'stars').sum()),
+            "total_attention": _round(_col(df, 'attention').sum()),
+            "avg_openrank": _round(_col(df, 'openrank').mean()),
+            "total_forks": _round(_col(df, 'technical_fork').sum())
+        },
+        "rankings": {
+            "stars": _top(df, _col(df, 'stars'), top_n),
+            "openrank": _top(df, _col(df, 'openrank'), top_n)
+        },
+        "distributions": {
+            "issue_comments": _bucket_counts(
+                _col(df, 'issue_comments').values, [('0-50', 50), ('51-100', 100), ('101-200', 200), ('201-500', 500), ('500+', np.inf)]
+            )
+        }
+    }
+
+
+def _issue_lifecycle(df: pd.DataFrame, top_n: int) -> dict:
+    issues_new = _col(df, 'issues_new')
+    issues_closed = _col(df, 'issues_closed')
+    top_issues = _top_index(issues_new + issues_closed, top_n)
+    return {
+        "summary": {
+            "total_new_issues": _round(issues_new.sum()),
+            "total_closed_issues": _round(issues_closed.sum()),
+            "total_active_issues": _round(_col(df, 'issues_and_change_request_active').sum()),
+            "total_comments": _round(_col(df, 'issue_comments').sum())
+        },
+        "rankings": {
+            "issues": [
+                {"project_name": _name(df, i), "issues_new": _round(issues_new.iat[i]),
+                 "issues_closed": _round(issues_closed.iat[i])}
+                for i in top_issues
+            ]
+        },
+        "distributions": {
+            # 跨项目的月度均值（替代前端只展示第一个项目的示例数据）
+            "issue_response_time_monthly": _monthly_mean(df, 'issue_response_time'),
+            "issue_resolution_duration_monthly": _monthly_mean(df, 'issue_resolution_duration')
+        }
+    }
+
+
+_SECTION_BUILDERS = {
+    'activity': _activity,
+    'code_changes': _code_changes,
+    'attention': _attention,
+    'contributors': _contributors,
+    'impact': _impact,
+    'issue_lifecycle': _issue_lifecycle
+}
+
+
+# ==================== 工具函数 ====================
+def _col(df: pd.DataFrame, column: str) -> pd.Series:
+    """取数值列，缺失值按 0 处理（与前端 parseNumber 一致）"""
+    if column not in df:
+        return pd.Series(np.zeros(len(df)), index=df.index)
+    return pd.to_numeric(df[column], errors='coerce').fillna(0)
+
+
+def _round(value, digits: int = 4):
+    return None if pd.isna(value) else round(float(value), digits)
+
+
+def _name(df: pd.DataFrame, i: int) -> str:
+    name = df['projectname2'].iat[i] if 'projectname2' in df else None
+    return name if isinstance(name, str) and name else str(df['projectname'].iat[i])
+
+
+def _top_index(values: pd.Series, n: int) -> np.ndarray:
+    """降序排名的前 n 个位置（稳定排序，同值保持原始顺序）"""
+    return np.argsort(-values.values, kind='stable')[:n]
+
+
+def _top(df: pd.DataFrame, values: pd.Series, n: int, positive_only: bool = False) -> list:
+    index = _top_index(values, n)
+    if positive_only:
+        index = index[values.values[index] > 0]
+    return [{"project_name": _name(df, i), "value": _round(values.iat[i])} for i in index]
+
+
+def _bucket_counts(values, buckets: list) -> list:
+    """按上界分段计数：每个值落入第一个上界不小于它的区间，缺失值不计入"""
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    uppers = np.array([upper for _, upper in buckets], dtype=float)
+    positions = np.searchsorted(uppers, values, side='left')
+    counts = np.bincount(positions[positions < len(buckets)], minlength=len(buckets))
+    return [{"name": name, "value": int(c)} for (name, _), c in zip(buckets, counts)]
+
+
+def _monthly_mean(df: pd.DataFrame, column: str) -> dict:
+    """把各项目的 {月份: 值} 字典列对齐为 (项目 × 月份) 矩阵，按月取跨项目均值"""
+    if column not in df:
+        return {"months": [], "mean": [], "project_count": []}
+    records = [d for d in df[column] if isinstance(d, dict)]
+    if not records:
+        return {"months": [], "mean": [], "project_count": []}
+    matrix = pd.DataFrame.from_records(records).apply(pd.to_numeric, errors='coerce')
+    matrix = matrix.reindex(sorted(matrix.columns), axis=1)
+    return {
+        "months": matrix.columns.tolist(),
+        "mean": [_round(v, 2) for v in matrix.mean(axis=0).values],
+        "project_count": matrix.notna().sum(axis=0).astype(int).tolist()
+    }
@@ -0,0 +1,462 @@
+import os
+import re
+import ast
+import glob
+import json
+import sys
+import hashlib
+import threading
+from collections import OrderedDict
+from env_config import env_int
+import pandas as pd
+import numpy as np
+import warnings
+warnings.filterwarnings('ignore')
+
+
+# 默认数据集路径（与 main.py 中 Fork 预测接口使用的相对路径一致）
+DEFAULT_CSV_PATH = "backendData/top_300_metrics.csv"
+
+# 默认数据集 ID（数据集文件名去掉扩展名）
+DEFAULT_DATASET_ID = os.path.splitext(os.path.basename(DEFAULT_CSV_PATH))[0]
+
+# 已加载数据集的内存预算（MB）：超出后按最近最少使用淘汰，当前正在使用的数据集总是保留
+DATASET_CACHE_MB = max(1, env_int("OPENSODA_DATASET_CACHE_MB", 1024))
+# 派生结果缓存（解析后的数据集、张量、训练矩阵、排序数组等）的内存预算（MB）与条目数上限，
+# 超出任一上限时按最近最少使用淘汰；条目数上限兜底无法估算大小的对象（如训练好的模型）
+RESULT_CACHE_MB = max(1, env_int("OPENSODA_RESULT_CACHE_MB", 512))
+RESULT_CACHE_ENTRIES = max(1, env_int("OPENSODA_RESULT_CACHE_ENTRIES", 256))
+# 数据集注册配置文件（JSON: {"数据集ID": "CSV路径", ...}），为空时只自动发现默认数据集目录下的 CSV
+DATASETS_CONFIG = os.environ.get("OPENSODA_DATASETS_CONFIG", "")
+
+# 数据集缓存（LRU 顺序）：绝对路径 -> {"stat": (大小, 修改时间), "version": 内容版本, "df": DataFrame, "nbytes": 内存占用}
+_dataset_cache = OrderedDict()
+# 运行时注册的数据集：数据集ID -> CSV路径
+_registered_datasets = {}
+_evictions = 0
+# 计算结果缓存（LRU 顺序）：(命名空间, 数据集版本, 参数) -> (结果, 估算的内存占用)
+_result_cache = OrderedDict()
+_result_bytes = 0
+_result_evictions = 0
+_lock = threading.Lock()
+# 每个数据集路径的加载锁：绝对路径 -> Lock（只串行化同一文件的加载，不阻塞其他数据集）
+_load_locks = {}
+
+
+# ==================== 数据集加载与缓存 ====================
+def load_dataset(csv_path: str = DEFAULT_CSV_PATH) -> pd.DataFrame:
+    """
+    加载 CSV 数据集（按文件内容版本缓存，文件未变化时直接复用内存中的 DataFrame）
+
+    注意：返回的 DataFrame 为共享对象，调用方如需修改请先 copy()
+
+    参数:
+        csv_path: CSV文件路径
+
+    返回:
+        DataFrame（列名已去除 BOM 和首尾空白）
+    """
+    return _get_entry(csv_path)["df"]
+
+
+def get_dataset_version(csv_path: str = DEFAULT_CSV_PATH) -> str:
+    """返回数据集的内容版本号（文件内容的 SHA1 前12位）"""
+    return _get_entry(csv_path)["version"]
+
+
+def dataset_nbytes(csv_path: str = DEFAULT_CSV_PATH) -> int:
+    """返回数据集加载后的内存占用（字节，按需加载）"""
+    return _get_entry(csv_path)["nbytes"]
+
+
+def _get_entry(csv_path: str) -> dict:
+    abs_path = os.path.abspath(csv_path)
+    if not os.path.exists(abs_path):
+        raise FileNotFoundError(f"File not found: {csv_path}")
+
+    st = os.stat(abs_path)
+    stat_key = (st.st_size, st.st_mtime_ns)
+
+    entry = _cached_entry(abs_path, stat_key)
+    if entry is not None:
+        return entry
+
+    # 读取、哈希与解析在全局 _lock 之外进行，其他数据集（包括已缓存的）的查询不必等待；
+    # 同一路径的并发加载由该路径自己的锁串行化，后到者拿锁后复查缓存即可直接复用
+    with _lock:
+        path_lock = _load_locks.setdefault(abs_path, threading.Lock())
+    with path_lock:
+        entry = _cached_entry(abs_path, stat_key)
+        if entry is not None:
+            return entry
+
+        with open(abs_path, 'rb') as f:
+            version = hashlib.sha1(f.read()).hexdigest()[:12]
+
+        df = pd.read_csv(abs_path)
+        df.columns = [str(c).replace('\ufeff', '').strip() for c in df.columns]
+
+        entry = {
+            "stat": stat_key,
+            "version": version,
+            "df": df,
+            "nbytes": int(df.memory_usage(deep=True).sum())
+        }
+        with _lock:
+            _dataset_cache[abs_path] = entry
+            _dataset_cache.move_to_end(abs_path)
+            _evict_datasets(keep=abs_path)
+        return entry
+
+
+def _cached_entry(abs_path: str, stat_key: tuple):
+    """文件大小与修改时间未变时返回已缓存的条目（并标记为最近使用），否则返回 None"""
+    with _lock:
+        entry = _dataset_cache.get(abs_path)
+        if entry is not None and entry["stat"] == stat_key:
+            _dataset_cache.move_to_end(abs_path)
+            return entry
+    return None
+
+
+def _evict_datasets(keep: str):
+    """
+    已加载数据集总内存超出 DATASET_CACHE_MB 时，从最久未使用的开始淘汰（调用方持有 _lock），
+    被淘汰版本的派生结果缓存一并清除（其他已加载路径仍是同一内容版本时保留）
+    """
+    global _evictions
+    budget = DATASET_CACHE_MB * 2 ** 20
+    while sum(e["nbytes"] for e in _dataset_cache.values()) > budget:
+        victim = next((p for p in _dataset_cache if p != keep), None)
+        if victim is None:
+            break
+        version = _dataset_cache.pop(victim)["version"]
+        _evictions += 1
+        if all(e["version"] != version for e in _dataset_cache.values()):
+            for key in [k for k in _result_cache if k[1] == version]:
+                _drop_result(key)
+
+
+def cached_result(namespace: str, csv_path: str, params, compute, refresh: bool = False):
+    """
+    按 (命名空间, 数据集版本, 参数) 缓存计算结果，数据集内容变化后自动失效
+
+    参数:
+        namespace: 结果类别，例如 "projects_detail"
+        csv_path: 数据集路径
+        params: 可哈希的参数元组
+        compute: 无参函数，缓存未命中时调用
+        refresh: 为 True 时忽略已有缓存，重新计算并覆盖
+    """
+    key = (namespace, get_dataset_version(csv_path), params)
+    with _lock:
+        if not refresh and key in _result_cache:
+            _result_cache.move_to_end(key)
+            return _result_cache[key][0]
+
+    result = compute()
+    nbytes = estimate_nbytes(result)
+
+    global _result_bytes, _result_evictions
+    with _lock:
+        if key in _result_cache:
+            _drop_result(key)
+        _result_cache[key] = (result, nbytes)
+        _result_bytes += nbytes
+        # 从最久未使用的开始淘汰，刚写入的结果总是保留
+        budget = RESULT_CACHE_MB * 2 ** 20
+        while len(_result_cache) > 1 and (_result_bytes > budget or len(_result_cache) > RESULT_CACHE_ENTRIES):
+            _drop_result(next(iter(_result_cache)))
+            _result_evictions += 1
+    return result
+
+
+def _drop_result(key):
+    """移除一条派生结果缓存（调用方持有 _lock）"""
+    global _result_bytes
+    _result_bytes -= _result_cache.pop(key)[1]
+
+
+def estimate_nbytes(obj, _depth: int = 0) -> int:
+    """
+    估算缓存对象的内存占用：numpy 数组 / DataFrame 按数据缓冲区大小，容器递归累加
+    （长列表按前 100 个元素外推），内存映射数组不占进程内存记为 0，其余对象按 sys.getsizeof
+    """
+    if isinstance(obj, np.memmap):
+        return 0
+    if isinstance(obj, np.ndarray):
+        return 0 if isinstance(obj.base, np.memmap) else int(obj.nbytes)
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return int(obj.memory_usage(deep=True).sum()) if isinstance(obj, pd.DataFrame) \
+            else int(obj.memory_usage(deep=True))
+    if _depth > 4:
+        return sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(estimate_nbytes(v, _depth + 1) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        head = obj[:100]
+        sampled = sum(estimate_nbytes(v, _depth + 1) for v in head)
+        return sys.getsizeof(obj) + (sampled * len(obj) // len(head) if head else 0)
+    if hasattr(obj, "num_row") and hasattr(obj, "num_col"):
+        # xgboost DMatrix / QuantileDMatrix：按 float32 稠密矩阵的上界估算
+        return int(obj.num_row() * obj.num_col() * 4)
+    return sys.getsizeof(obj)
+
+
+def params_key(params: dict) -> str:
+    """
+    把一组请求参数规范化后哈希为稳定的缓存键（键顺序无关；列表与元组等价）
+    用作 cached_result 的 params，使不同参数组合各自只计算一次
+    """
+    text = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+
+def load_parsed_dataset(csv_path: str = DEFAULT_CSV_PATH) -> pd.DataFrame:
+    """
+    加载已解析的数据集：字符串形式保存的列表/字典列（如 active_dates_and_times、
+    issue_response_time）解析为 Python 对象，每个数据集版本只解析一次
+
+    注意：返回的 DataFrame 为共享对象，调用方不要修改
+    """
+    def parse():
+        df = load_dataset(csv_path).copy()
+        for col in literal_columns(df):
+            df[col] = df[col].map(parse_literal)
+        return df
+
+    return cached_result("parsed_dataset", csv_path, (), parse)
+
+
+def artifact_path(csv_path: str, name: str, suffix: str = ".json") -> str:
+    """
+    返回数据集某个派生结果的持久化路径：<数据集目录>/cache/<数据集文件名>_<name>_<版本><suffix>
+    """
+    cache_dir = os.path.join(os.path.dirname(os.path.abspath(csv_path)), "cache")
+    os.makedirs(cache_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(cache_dir, f"{stem}_{name}_{get_dataset_version(csv_path)}{suffix}")
+
+
+# ==================== 数据集注册表 ====================
+# 数据集 ID 只能包含字母、数字、下划线、点和连字符（用作 URL 查询参数）
+_DATASET_ID_PATTERN = re.compile(r'^[\w.-]+$')
+
+
+def data_directory() -> str:
+    """数据目录（默认数据集所在目录）：自动发现与运行时注册的数据集都必须位于该目录下"""
+    return os.path.dirname(os.path.realpath(DEFAULT_CSV_PATH))
+
+
+def _configured_datasets() -> dict:
+    """
+    汇总可选的数据集：默认数据集目录下自动发现的 CSV（ID 为文件名去掉扩展名）、
+    OPENSODA_DATASETS_CONFIG 配置文件中的条目、运行时注册的条目（后者覆盖前者）
+    """
+    datasets = {}
+    for path in sorted(glob.glob(os.path.join(data_directory(), "*.csv"))):
+        datasets[os.path.splitext(os.path.basename(path))[0]] = path
+
+    if DATASETS_CONFIG and os.path.exists(DATASETS_CONFIG):
+        with open(DATASETS_CONFIG, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        base_dir = os.path.dirname(os.path.abspath(DATASETS_CONFIG))
+        for dataset_id, path in config.items():
+            datasets[str(dataset_id)] = os.path.join(base_dir, path)
+
+    with _lock:
+        datasets.update(_registered_datasets)
+    datasets.setdefault(DEFAULT_DATASET_ID, os.path.abspath(DEFAULT_CSV_PATH))
+    return datasets
+
+
+def resolve_dataset(dataset: str = None) -> str:
+    """
+    把数据集 ID 解析为 CSV 路径（为空时返回默认数据集），数据集只在首次被使用时才真正加载
+
+    数据集 ID 未注册时抛出 KeyError
+    """
+    if dataset is None or str(dataset).strip() == "":
+        return DEFAULT_CSV_PATH
+    datasets = _configured_datasets()
+    dataset = str(dataset).strip()
+    if dataset not in datasets:
+        raise KeyError(f"未知的数据集: {dataset}（可用: {', '.join(sorted(datasets))}）")
+    return datasets[dataset]
+
+
+def register_dataset(dataset_id: str, csv_path: str) -> dict:
+    """
+    运行时注册数据集（例如新导出的月度快照），注册后各接口即可通过 dataset=<ID> 选择；
+    注册本身不读取文件内容。只允许注册数据目录（data_directory()）下的 CSV 文件
+
+    参数:
+        dataset_id: 数据集 ID
+        csv_path: CSV文件路径（相对路径按数据目录解析）
+    """
+    if not _DATASET_ID_PATTERN.match(str(dataset_id)):
+        raise ValueError(f"数据集 ID 只能包含字母、数字、下划线、点和连字符: {dataset_id}")
+    data_dir = data_directory()
+    abs_path = os.path.realpath(os.path.join(data_dir, csv_path))
+    if os.path.commonpath([abs_path, data_dir]) != data_dir or not abs_path.lower().endswith(".csv"):
+        raise ValueError(f"只能注册数据目录 {data_dir} 下的 CSV 文件: {csv_path}")
+    if not os.path.exists(abs_path):
+        raise FileNotFoundError(f"File not found: {csv_path}")
+    with _lock:
+        _registered_datasets[dataset_id] = abs_path
+    return _describe_dataset(dataset_id, abs_path)
+
+
+def list_datasets() -> dict:
+    """
+    列出所有可选数据集及其加载状态，并附带内存预算使用情况
+
+    返回:
+        {
+            "default": "top_300_metrics",
+            "datasets": [{"id", "path", "file_size_mb", "loaded", "version", "memory_mb"}, ...],
+            "cache": {"budget_mb", "used_mb", "loaded", "evictions"},
+            "result_cache": {"budget_mb", "max_entries", "used_mb", "entries", "evictions"}
+        }
+    """
+    datasets = [_describe_dataset(i, p) for i, p in sorted(_configured_datasets().items())]
+    with _lock:
+        used = sum(e["nbytes"] for e in _dataset_cache.values())
+        loaded, evictions = len(_dataset_cache), _evictions
+        results = {
+            "budget_mb": RESULT_CACHE_MB,
+            "max_entries": RESULT_CACHE_ENTRIES,
+            "used_mb": round(_result_bytes / 2 ** 20, 3),
+            "entries": len(_result_cache),
+            "evictions": _result_evictions
+        }
+    return {
+        "default": DEFAULT_DATASET_ID,
+        "datasets": datasets,
+        "cache": {
+            "budget_mb": DATASET_CACHE_MB,
+            "used_mb": round(used / 2 ** 20, 3),
+            "loaded": loaded,
+            "evictions": evictions
+        },
+        "result_cache": results
+    }
+
+
+def _describe_dataset(dataset_id: str, path: str) -> dict:
+    abs_path = os.path.abspath(path)
+    exists = os.path.exists(abs_path)
+    with _lock:
+        entry = _dataset_cache.get(abs_path)
+    return {
+        "id": dataset_id,
+        "path": abs_path,
+        "exists": exists,
+        "file_size_mb": round(os.path.getsize(abs_path) / 2 ** 20, 3) if exists else None,
+        "loaded": entry is not None,
+        "version": entry["version"] if entry is not None else None,
+        "memory_mb": round(entry["nbytes"] / 2 ** 20, 3) if entry is not None else None
+    }
+
+
+# ==================== 通用工具函数 ====================
+def numeric_columns(df: pd.DataFrame) -> list:
+    """返回数据集中的标量数值列"""
+    return df.select_dtypes(include=[np.number]).columns.tolist()
+
+
+def project_labels(df: pd.DataFrame) -> list:
+    """返回 "owner/repo" 形式的项目全名列表"""
+    owners = df['projectname'].astype(str).values if 'projectname' in df else [''] * len(df)
+    return [f"{o}/{r}" if o else str(r) for o, r in zip(owners, df['projectname2'].astype(str).values)]
+
+
+def resolve_project(df: pd.DataFrame, project: str) -> int:
+    """
+    把项目标识解析为行位置，依次尝试 "owner/repo"、仓库名 projectname2，都不匹配时才把纯数字当作行号
+    （名称优先，避免名为 "2048" 之类的仓库被误当作行号）
+
+    项目不存在时抛出 KeyError，仓库名对应多个项目时抛出 ValueError
+    """
+    project = str(project).strip()
+    labels = project_labels(df)
+    if project in labels:
+        return labels.index(project)
+
+    matches = np.flatnonzero(df['projectname2'].astype(str).values == project)
+    if len(matches) == 1:
+        return int(matches[0])
+    if len(matches) > 1:
+        candidates = ', '.join(labels[i] for i in matches[:5])
+        raise ValueError(f"项目名 {project} 不唯一，请使用 owner/repo 形式: {candidates}")
+
+    if project.isdigit() and int(project) < len(df):
+        return int(project)
+    raise KeyError(f"未找到项目: {project}")
+
+
+def literal_columns(df: pd.DataFrame) -> list:
+    """返回以字符串形式保存列表/字典的列（按首个非空值的首字符判断）"""
+    columns = []
+    for col in df.columns:
+        if df[col].dtype != object and not pd.api.types.is_string_dtype(df[col]):
+            continue
+        first = df[col].dropna()
+        if len(first) and str(first.iloc[0]).lstrip()[:1] in ('[', '{'):
+            columns.append(col)
+    return columns
+
+
+def parse_literal(value):
+    """安全解析 CSV 中以字符串形式保存的 Python 列表/字典，解析失败返回 None"""
+    if value is None or (isinstance(value, float) and np.isnan(value)) or value == '':
+        return None
+    if not isinstance(value, str):
+        return value
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return None
+
+
+# ==================== 过滤条件解析 ====================
+_FILTER_PATTERN = re.compile(r'^\s*(\w+)\s*(>=|<=|!=|==|=|>|<)\s*(.+?)\s*$')
+_FILTER_OPS = {
+    '>': np.greater, '>=': np.greater_equal,
+    '<': np.less, '<=': np.less_equal,
+    '=': np.equal, '==': np.equal, '!=': np.not_equal
+}
+
+
+def parse_filter(expr: str, columns: list) -> tuple:
+    """
+    解析形如 "participants > 100" 或 "projectname2 = vscode" 的过滤条件
+
+    返回:
+        (列名, 运算符, 值)，数值型值转为 float，其余保留为字符串（只支持 = / !=）
+    """
+    match = _FILTER_PATTERN.match(expr)
+    if not match:
+        raise ValueError(f"无法解析过滤条件: {expr}（格式示例: participants > 100）")
+    column, op, value = match.groups()
+    if column not in columns:
+        raise ValueError(f"过滤条件中的未知字段: {column}")
+    try:
+        return column, op, float(value)
+    except ValueError:
+        if op not in ('=', '==', '!='):
+            raise ValueError(f"文本字段只支持 = / != 比较: {expr}")
+        return column, op, value.strip('"\'')
+
+
+def filter_mask(df: pd.DataFrame, filters) -> np.ndarray:
+    """按解析后的过滤条件生成布尔掩码（向量化计算，缺失值不满足任何条件）"""
+    mask = np.ones(len(df), dtype=bool)
+    for column, op, value in filters:
+        values = df[column].values
+        if isinstance(value, float):
+            values = pd.to_numeric(df[column], errors='coerce').values
+        else:
+            values = values.astype(str)
+        mask &= df[column].notna().values & _FILTER_OPS[op](values, value)
+    return mask
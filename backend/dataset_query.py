@@ -0,0 +1,197 @@
+import numpy as np
+import pandas as pd
+import warnings
+from data_loader import (DEFAULT_CSV_PATH, load_parsed_dataset, get_dataset_version, cached_result,
+                         literal_columns, load_dataset, parse_filter, filter_mask)
+warnings.filterwarnings('ignore')
+
+
+# 支持的聚合函数
+SUPPORTED_AGGREGATIONS = ('count', 'sum', 'mean', 'median', 'min', 'max', 'std')
+
+
+# ==================== 数据集查询接口函数 ====================
+def get_dataset_columns(csv_path: str = DEFAULT_CSV_PATH) -> dict:
+    """
+    获取数据集的列信息（供前端按需选择要查询的列）
+
+    返回:
+        {
+            "dataset_version": "...",
+            "row_count": 300,
+            "columns": [{"name": "activity", "type": "number"}, ...]  # number / text / list / dict
+        }
+    """
+    def build():
+        parsed = load_parsed_dataset(csv_path)
+        literal = set(literal_columns(load_dataset(csv_path)))
+        columns = []
+        for col in parsed.columns:
+            if pd.api.types.is_numeric_dtype(parsed[col]):
+                col_type = "number"
+            elif col in literal:
+                first = parsed[col].dropna()
+                col_type = "dict" if len(first) and isinstance(first.iloc[0], dict) else "list"
+            else:
+                col_type = "text"
+            columns.append({"name": col, "type": col_type})
+        return {
+            "dataset_version": get_dataset_version(csv_path),
+            "row_count": int(len(parsed)),
+            "columns": columns
+        }
+
+    return cached_result("dataset_columns", csv_path, (), build)
+
+
+def query_dataset(csv_path: str = DEFAULT_CSV_PATH,
+                  columns: list = None,
+                  filters: list = None,
+                  sort_by: str = None,
+                  descending: bool = True,
+                  limit: int = 100,
+                  offset: int = 0,
+                  aggregations: list = None,
+                  group_by: str = None) -> dict:
+    """
+    查询已解析的数据集（列投影 + 过滤 + 排序 + 分页 + 聚合），返回已类型化的 JSON
+
+    参数:
+        csv_path: CSV文件路径
+        columns: 返回的列（默认全部列）
+        filters: 过滤条件列表，例如 ["activity > 50", "projectname = microsoft"]
+        sort_by: 排序列
+        descending: 是否降序
+        limit: 返回行数上限
+        offset: 跳过的行数
+        aggregations: 聚合表达式列表，格式 "列名:函数"，例如 ["activity:mean", "new_contributors:sum"]
+        group_by: 聚合时的分组列（可选）
+
+    返回:
+        {
+            "metadata": {...},
+            "rows": [...],          # 未指定聚合时返回
+            "aggregations": {...},  # 指定聚合且未分组时返回
+            "groups": [...]         # 指定聚合且分组时返回
+        }
+    """
+    df = load_parsed_dataset(csv_path)
+    available = df.columns.tolist()
+
+    columns = list(columns) if columns else available
+    referenced = columns + [c for c in (sort_by, group_by) if c]
+    unknown = [c for c in referenced if c not in available]
+    if unknown:
+        raise ValueError(f"未知字段: {', '.join(unknown)}")
+
+    parsed_filters = tuple(parse_filter(f, available) for f in (filters or []))
+    parsed_aggs = tuple(_parse_aggregation(a, available) for a in (aggregations or []))
+
+    metadata = {
+        "dataset_version": get_dataset_version(csv_path),
+        "filters": [f"{c} {op} {v}" for c, op, v in parsed_filters]
+    }
+
+    # 1. 聚合查询：过滤条件任意组合，按请求向量化计算，不按条件缓存
+    if parsed_aggs:
+        result = _aggregate(df, parsed_filters, parsed_aggs, group_by)
+        return {"metadata": {**metadata, "matched_rows": result["matched_rows"], "group_by": group_by},
+                **{k: v for k, v in result.items() if k != "matched_rows"}}
+
+    # 2. 明细查询：只缓存与过滤条件无关的整表排序（每个 (排序列, 方向) 一份），
+    #    过滤掩码按请求计算后从整表顺序中取出，分页时只做切片
+    if sort_by:
+        order = cached_result(
+            "dataset_sort", csv_path, (sort_by, descending),
+            lambda: _sort_order(df, sort_by, descending)
+        )
+    else:
+        order = np.arange(len(df))
+    order = order[filter_mask(df, parsed_filters)[order]]
+    page = df.iloc[order[offset:offset + limit]]
+
+    values = [to_json_values(page[col]) for col in columns]
+    rows = [dict(zip(columns, row)) for row in zip(*values)]
+
+    return {
+        "metadata": {
+            **metadata,
+            "matched_rows": int(len(order)),
+            "offset": offset,
+            "limit": limit,
+            "columns": columns,
+            "sort_by": sort_by,
+            "descending": descending
+        },
+        "rows": rows
+    }
+
+
+# ==================== 工具函数 ====================
+def to_json_values(series: pd.Series) -> list:
+    """把一列转为可直接 JSON 序列化的 Python 列表（数值保留4位小数，缺失值为 None）"""
+    if pd.api.types.is_numeric_dtype(series):
+        values = series.values.astype(float)
+        rounded = np.round(values, 4)
+        return [None if np.isnan(v) else float(v) for v in rounded]
+    return [None if (v is None or (isinstance(v, float) and np.isnan(v))) else v for v in series.tolist()]
+
+
+def _parse_aggregation(expr: str, available: list) -> tuple:
+    column, _, func = expr.partition(':')
+    column, func = column.strip(), (func.strip() or 'count')
+    if column not in available:
+        raise ValueError(f"聚合表达式中的未知字段: {column}")
+    if func not in SUPPORTED_AGGREGATIONS:
+        raise ValueError(f"不支持的聚合函数: {func}，可选: {', '.join(SUPPORTED_AGGREGATIONS)}")
+    return column, func
+
+
+def _sort_order(df: pd.DataFrame, sort_by: str, descending: bool) -> np.ndarray:
+    """整表按 sort_by 的稳定排序；稳定排序下先排序后过滤与先过滤后排序结果一致"""
+    keys = df[sort_by]
+    if pd.api.types.is_numeric_dtype(keys):
+        # 稳定排序，缺失值始终排在最后
+        keys = keys.values.astype(float)
+        keys = np.where(np.isnan(keys), -np.inf if descending else np.inf, keys)
+        return np.argsort(-keys if descending else keys, kind='stable')
+    ranks = np.argsort(keys.astype(str).values, kind='stable')
+    return ranks[::-1] if descending else ranks
+
+
+def _aggregate(df: pd.DataFrame, filters: tuple, aggregations: tuple, group_by: str) -> dict:
+    subset = df[filter_mask(df, filters)]
+    names = [f"{col}_{func}" for col, func in aggregations]
+
+    # 先统一转为数值列，再用 pandas 向量化聚合（count 统计非空值个数）
+    numeric = pd.DataFrame({
+        name: (subset[col].notna() if func == 'count' else pd.to_numeric(subset[col], errors='coerce'))
+        for name, (col, func) in zip(names, aggregations)
+    }, index=subset.index)
+    funcs = {name: ('sum' if func == 'count' else func) for name, (col, func) in zip(names, aggregations)}
+
+    if not group_by:
+        values = {name: getattr(numeric[name], funcs[name])() for name in names}
+        return {"matched_rows": int(len(subset)), "aggregations": _round_aggregates(values, aggregations, names)}
+
+    grouped = numeric.groupby(subset[group_by], sort=True).agg(funcs)
+    sizes = subset.groupby(group_by, sort=True).size()
+    groups = [
+        {group_by: key, "row_count": int(sizes[key]),
+         **_round_aggregates(grouped.loc[key].to_dict(), aggregations, names)}
+        for key in grouped.index
+    ]
+    return {"matched_rows": int(len(subset)), "groups": groups}
+
+
+def _round_aggregates(values: dict, aggregations: tuple, names: list) -> dict:
+    out = {}
+    for name, (col, func) in zip(names, aggregations):
+        value = values[name]
+        if pd.isna(value):
+            out[name] = None
+        elif func == 'count':
+            out[name] = int(value)
+        else:
+            out[name] = round(float(value), 4)
+    return out
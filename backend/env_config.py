@@ -0,0 +1,11 @@
+import os
+
+
+# ==================== 环境变量配置读取（容器部署时通过环境变量调整各模块的预算） ====================
+def env_int(name: str, default: int) -> int:
+    """读取整数环境变量，未设置、为空或无法解析时返回默认值"""
+    value = os.environ.get(name, "").strip()
+    try:
+        return int(value) if value else default
+    except ValueError:
+        return default
@@ -0,0 +1,99 @@
+import os
+import glob
+import json
+import threading
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from data_loader import DEFAULT_CSV_PATH, load_dataset, artifact_path, cached_result, get_dataset_version
+
+_build_lock = threading.Lock()
+
+
+# ==================== 特征存储（按数据集版本物化为内存映射 .npy） ====================
+def load_feature_set(csv_path: str, name: str, build) -> pd.DataFrame:
+    """
+    读取命名特征集；该数据集版本尚未物化时调用 build() 生成并写入磁盘
+
+    存储格式:
+        <数据集目录>/cache/<数据集文件名>_features_<name>_<版本>.npy   float64 (行数 × 列数)，C 连续
+        <数据集目录>/cache/<数据集文件名>_features_<name>_<版本>.json  列名、形状、生成时间等元数据
+
+    数组以只读内存映射（mmap_mode="r"）打开：同一进程内的任务共享同一个映射，
+    其他工作进程（如多 worker 部署的 uvicorn）打开同一文件时共享操作系统页缓存，
+    都不会各自再持有一份 DataFrame 副本；数据集内容变化后版本号改变，自动使用新文件
+
+    参数:
+        csv_path: 数据集路径
+        name: 特征集名称（用于文件名，只能包含字母、数字和下划线）
+        build: 无参函数，返回全部为数值列的 DataFrame
+
+    返回:
+        以内存映射数组为底层数据的只读 DataFrame（行顺序与 build() 返回的一致）
+    """
+    def open_mapped():
+        data_path = artifact_path(csv_path, f"features_{name}", ".npy")
+        meta_path = artifact_path(csv_path, f"features_{name}", ".json")
+        if not os.path.exists(meta_path):
+            with _build_lock:
+                if not os.path.exists(meta_path):
+                    _materialize(build(), name, csv_path, data_path, meta_path)
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        return {"meta": meta, "values": np.load(data_path, mmap_mode="r")}
+
+    feature_set = cached_result("feature_store", csv_path, name, open_mapped)
+    return pd.DataFrame(feature_set["values"], columns=feature_set["meta"]["columns"], copy=False)
+
+
+def _materialize(frame: pd.DataFrame, name: str, csv_path: str, data_path: str, meta_path: str):
+    """写入特征矩阵与元数据；先写临时文件再原子替换，元数据最后写，读方看到元数据时数组一定已完整"""
+    values = np.ascontiguousarray(frame.to_numpy(dtype=np.float64))
+    suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+
+    with open(data_path + suffix, "wb") as f:
+        np.save(f, values)
+    os.replace(data_path + suffix, data_path)
+
+    meta = {
+        "name": name,
+        "dataset_version": get_dataset_version(csv_path),
+        "columns": [str(c) for c in frame.columns],
+        "shape": list(values.shape),
+        "dtype": str(values.dtype),
+        "nbytes": int(values.nbytes),
+        "created_at": datetime.now().isoformat()
+    }
+    with open(meta_path + suffix, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(meta_path + suffix, meta_path)
+
+
+def numeric_feature_frame(csv_path: str = DEFAULT_CSV_PATH) -> pd.DataFrame:
+    """
+    "numeric" 特征集：CSV 所有列按 pd.to_numeric(errors="coerce") 数值化后的矩阵
+    （整列无法数值化的列，如项目名、月度字典列，被丢弃），Fork 预测的特征与目标从这里取列
+    """
+    def build():
+        numeric = load_dataset(csv_path).apply(pd.to_numeric, errors="coerce")
+        return numeric.loc[:, numeric.notna().any()]
+
+    return load_feature_set(csv_path, "numeric", build)
+
+
+def list_feature_sets(csv_path: str = DEFAULT_CSV_PATH) -> list:
+    """列出当前数据集版本已物化的特征集（只读元数据，不加载数组）"""
+    pattern = artifact_path(csv_path, "features_*", ".json")
+    sets = []
+    for path in sorted(glob.glob(pattern)):
+        with open(path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        sets.append({
+            "name": meta["name"],
+            "rows": meta["shape"][0],
+            "columns": len(meta["columns"]),
+            "size_mb": round(meta["nbytes"] / 2 ** 20, 3),
+            "created_at": meta["created_at"],
+            "column_names": meta["columns"]
+        })
+    return sets
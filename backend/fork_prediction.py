@@ -5,17 +5,380 @@ from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
 from sklearn.linear_model import Ridge, Lasso
-from sklearn.ensemble import GradientBoostingRegressor
-from sklearn.svm import SVR
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor
+from sklearn.svm import SVR, LinearSVR
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import hashlib
+import threading
 import warnings
+from job_control import check_cancelled
+from data_loader import load_dataset, cached_result, params_key
+from series_features import series_feature_frame
+from feature_store import numeric_feature_frame
+from cpu_budget import current_job
 warnings.filterwarnings("ignore")
 
 
-def run_fork_prediction(csv_path: str, target_column: str = "technical_fork") -> dict:
+# 候选特征（与目标列相关系数 ≥ 0.95 的会被剔除，避免目标泄漏）
+CANDIDATE_FEATURES = [
+    "bus_factor", "change_requests", "change_requests_accepted",
+    "change_requests_reviews", "code_change_lines_add",
+    "code_change_lines_remove", "inactive_contributors",
+    "issues_closed", "issues_new", "issue_comments",
+    "new_contributors"
+]
+
+FORK_MODELS = ["Ridge", "Lasso", "GradientBoosting", "SVR"]
+
+# 多目标模式默认预测的目标列
+MULTI_TARGETS = ["technical_fork", "stars", "attention", "openrank", "participants"]
+
+# 置换重要性：每个特征在测试集上打乱的次数
+PERMUTATION_REPEATS = 5
+
+# 估计器模式：standard 为原始模型；scalable 把训练时间随行数超线性增长的 SVR、GradientBoosting
+# 换成线性时间的 LinearSVR、HistGradientBoosting（auto 按有效行数自动选择）
+ESTIMATOR_MODES = ["auto", "standard", "scalable"]
+LARGE_DATASET_ROWS = 5000
+
+# 预览模式：按目标分位数分层抽取的最大行数
+PREVIEW_ROWS = 2000
+
+
+def run_fork_prediction(csv_path: str, target_column: str = "technical_fork",
+                        cancel_token=None, features: list = None,
+                        test_size: float = 0.3, models: list = None,
+                        mode: str = "auto", selection_sample_size: int = None,
+                        series_features: bool = False, preview: bool = False) -> dict:
+    """
+    Fork 类回归预测：多个候选模型对比，返回最优模型的评估、特征重要性与预测明细
+
+    参数:
+        csv_path: CSV文件路径
+        target_column: 目标列
+        cancel_token: 可选的 job_control.CancellationToken，在各阶段之间和每个模型训练前检查
+        features: 候选特征子集（为空时使用全部 CANDIDATE_FEATURES）
+        test_size: 测试集比例
+        models: 参与对比的模型子集（为空时使用全部 FORK_MODELS）
+        mode: 估计器模式（ESTIMATOR_MODES）；auto 在有效行数超过 LARGE_DATASET_ROWS 时使用 scalable
+        selection_sample_size: 模型选择用的训练子样本行数（按目标分位数分层抽样），
+                               为空表示用全部训练集；抽样选出最优模型后在全部训练集上重新拟合
+        series_features: 是否追加由月度序列与活跃时段向量批量派生的时序特征（series_features 模块，
+                         特征名以 feat_ts_ 开头，同样经过与目标高度相关的剔除规则）
+        preview: 预览模式，只在按目标分层抽取的 PREVIEW_ROWS 行上训练与评估，
+                 返回近似结果（metadata.preview 标注样本规模），用于交互式调参
+
+    相同参数在同一数据集版本上只计算一次，之后直接返回缓存结果
+    """
+    params = validate_fork_params(csv_path, target_column, features, test_size, models,
+                                  mode, selection_sample_size, series_features)
+    return cached_result(
+        "fork_prediction_preview" if preview else "fork_prediction", csv_path, params_key(params),
+        lambda: _run_fork_prediction(csv_path, cancel_token=cancel_token, preview=preview, **params)
+    )
+
+
+def validate_fork_params(csv_path: str, target_column: str = "technical_fork", features: list = None,
+                         test_size: float = 0.3, models: list = None, mode: str = "auto",
+                         selection_sample_size: int = None, series_features: bool = False) -> dict:
+    """校验并规范化 Fork 预测参数，参数不合法时抛出 ValueError"""
+    columns = load_dataset(csv_path).columns
+    if target_column not in columns:
+        raise ValueError(f"数据集中不存在目标列: {target_column}")
+
+    features = list(features) if features else list(CANDIDATE_FEATURES)
+    unknown = [f for f in features if f not in CANDIDATE_FEATURES]
+    if unknown:
+        raise ValueError(f"不支持的特征: {', '.join(unknown)}，可选: {', '.join(CANDIDATE_FEATURES)}")
+
+    models = list(models) if models else list(FORK_MODELS)
+    unknown = [m for m in models if m not in FORK_MODELS]
+    if unknown:
+        raise ValueError(f"不支持的模型: {', '.join(unknown)}，可选: {', '.join(FORK_MODELS)}")
+
+    if not 0 < test_size < 1:
+        raise ValueError("test_size 必须在 0 和 1 之间")
+    if mode not in ESTIMATOR_MODES:
+        raise ValueError(f"不支持的估计器模式: {mode}，可选: {', '.join(ESTIMATOR_MODES)}")
+    if selection_sample_size is not None and selection_sample_size < 100:
+        raise ValueError("selection_sample_size 不能小于 100")
+
+    # 按固定顺序排列，使参数顺序不同的相同请求命中同一缓存
+    return {
+        "target_column": target_column,
+        "features": [f for f in CANDIDATE_FEATURES if f in features],
+        "test_size": float(test_size),
+        "models": [m for m in FORK_MODELS if m in models],
+        "mode": mode,
+        "selection_sample_size": int(selection_sample_size) if selection_sample_size else None,
+        "series_features": bool(series_features)
+    }
+
+
+def run_multi_target_fork_prediction(csv_path: str, targets: list = None, features: list = None,
+                                     test_size: float = 0.3, models: list = None,
+                                     cancel_token=None, mode: str = "auto",
+                                     selection_sample_size: int = None,
+                                     series_features: bool = False) -> dict:
+    """
+    多目标模式：对多个目标列做与 run_fork_prediction 相同的模型对比，共享一次预处理
+
+    与逐个目标调用 run_fork_prediction 的区别：
+        1. 特征列只数值化、拼接一次，所有目标共用同一次训练/测试拆分与相关系数计算
+        2. 每个目标只取出自己的有效行和特征列（剔除与该目标高度相关的特征），中位数填充与
+           scaler_X 在该目标的有效行上拟合，与单目标 run_fork_prediction 的预处理口径一致
+        3. 所有 (目标, 模型) 组合作为独立任务在线程池中并行训练
+
+    参数:
+        targets: 目标列列表（为空时使用 MULTI_TARGETS 中数据集存在的列）
+        其余参数同 run_fork_prediction
+
+    返回:
+        {
+            "metadata": {...},
+            "summary": [{"target_column": ..., "best_model": ..., "r2_test": ...}, ...],
+            "targets": {目标列: 与 run_fork_prediction 相同结构的报告}
+        }
+    """
+    params = validate_multi_target_params(csv_path, targets, features, test_size, models,
+                                          mode, selection_sample_size, series_features)
+    return cached_result(
+        "fork_prediction_multi", csv_path, params_key(params),
+        lambda: _run_multi_target(csv_path, cancel_token=cancel_token, **params)
+    )
+
+
+def validate_multi_target_params(csv_path: str, targets: list = None, features: list = None,
+                                 test_size: float = 0.3, models: list = None, mode: str = "auto",
+                                 selection_sample_size: int = None, series_features: bool = False) -> dict:
+    """校验并规范化多目标参数，参数不合法时抛出 ValueError"""
+    columns = load_dataset(csv_path).columns
+    targets = list(dict.fromkeys(targets)) if targets else [t for t in MULTI_TARGETS if t in columns]
+    if not targets:
+        raise ValueError("没有可用的目标列")
+    missing = [t for t in targets if t not in columns]
+    if missing:
+        raise ValueError(f"数据集中不存在目标列: {', '.join(missing)}")
+
+    params = validate_fork_params(csv_path, targets[0], features, test_size, models,
+                                  mode, selection_sample_size, series_features)
+    return {
+        "targets": targets,
+        "features": params["features"],
+        "test_size": params["test_size"],
+        "models": params["models"],
+        "mode": params["mode"],
+        "selection_sample_size": params["selection_sample_size"],
+        "series_features": params["series_features"]
+    }
+
+
+def _run_multi_target(csv_path: str, targets: list, features: list, test_size: float,
+                      models: list, mode: str, selection_sample_size: int, series_features: bool,
+                      cancel_token=None) -> dict:
+    np.random.seed(42)
+    # 数值化矩阵取自特征存储（内存映射，按数据集版本只物化一次）
+    df = numeric_feature_frame(csv_path)
+    resources = current_job()
+
+    # ==================== 1. 共享预处理：特征数值化与训练/测试拆分各做一次 ====================
+    features = [f for f in features if f in df.columns]
+    raw = df[features]
+    if series_features:
+        ts = series_feature_frame(csv_path)
+        raw = pd.concat([raw, ts], axis=1)
+        features = features + list(ts.columns)
+    target_values = df.reindex(columns=targets)
+    X_all = raw.values.astype(np.float64)
+
+    train_idx, test_idx = train_test_split(np.arange(len(df)), test_size=test_size, random_state=42)
+
+    # 相关系数按目标一次性计算（成对去除缺失值，与 Series.corr 一致）
+    correlations = {t: raw.corrwith(target_values[t]) for t in targets}
+
+    check_cancelled(cancel_token)
+
+    # ==================== 2. 每个目标取有效行与可用特征列，在有效行上拟合填充与标准化 ====================
+    prepared = {}
+    for t in targets:
+        y_all = target_values[t].values
+        valid = ~np.isnan(y_all)
+        tr, te = train_idx[valid[train_idx]], test_idx[valid[test_idx]]
+        cols = [i for i, f in enumerate(features) if abs(correlations[t][f]) < 0.95]
+        if not cols:
+            raise ValueError(f"目标 {t} 没有可用的特征列（候选特征与目标列高度相关）")
+        # 中位数取该目标的全部有效行（同单目标），scaler_X 只在有效的训练行上拟合
+        medians = raw.iloc[valid, cols].median().values
+        X_train = X_all[np.ix_(tr, cols)]
+        X_test = X_all[np.ix_(te, cols)]
+        X_train = np.where(np.isnan(X_train), medians, X_train)
+        X_test = np.where(np.isnan(X_test), medians, X_test)
+        scaler_X = StandardScaler().fit(X_train)
+        scaler_y = StandardScaler()
+        y_train_s = scaler_y.fit_transform(y_all[tr].reshape(-1, 1)).ravel()
+        prepared[t] = {
+            "mode": _resolve_mode(mode, int(valid.sum())),
+            "sample": _selection_subsample(y_all[tr], selection_sample_size),
+            "X_train_s": scaler_X.transform(X_train),
+            "X_test_s": scaler_X.transform(X_test),
+            "y_train_s": y_train_s,
+            "y_train": y_all[tr],
+            "y_test": y_all[te],
+            "scaler_y": scaler_y,
+            "feature_cols": [f"feat_{features[i]}" for i in cols],
+            "valid_samples": int(valid.sum())
+        }
+
+    # ==================== 3. 所有 (目标, 模型) 组合并行训练 ====================
+    tasks = [(t, name) for t in targets for name in models]
+    workers, _ = resources.split(len(tasks))
+
+    def fit(target, name, rows=None):
+        check_cancelled(cancel_token)
+        p = prepared[target]
+        X_fit, y_fit_s, y_fit = p["X_train_s"], p["y_train_s"], p["y_train"]
+        if rows is not None:
+            X_fit, y_fit_s, y_fit = X_fit[rows], y_fit_s[rows], y_fit[rows]
+        return target, name, _fit_fork_model(name, X_fit, p["X_test_s"], y_fit_s,
+                                             y_fit, p["y_test"], p["scaler_y"], p["mode"])
+
+    results = {t: {} for t in targets}
+    best = {}
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        for future in as_completed([executor.submit(fit, t, name, prepared[t]["sample"]) for t, name in tasks]):
+            target, name, result = future.result()
+            results[target][name] = result
+
+        # 在子样本上选模型的目标：只把各自的最优模型在全部训练集上重新拟合
+        refit = []
+        for t in targets:
+            best[t] = _select_best_model(results[t])
+            if prepared[t]["sample"] is not None:
+                refit.append(executor.submit(fit, t, best[t]))
+        for future in as_completed(refit):
+            target, name, result = future.result()
+            results[target][name] = result
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    check_cancelled(cancel_token)
+
+    # ==================== 4. 合并报告 ====================
+    reports = {
+        t: _build_fork_report(
+            {name: results[t][name] for name in models},
+            prepared[t]["feature_cols"],
+            {
+                "target_column": t,
+                "test_size": test_size,
+                "total_samples": int(len(df)),
+                "valid_samples": prepared[t]["valid_samples"],
+                **_mode_metadata(mode, prepared[t]["mode"], prepared[t]["sample"], len(prepared[t]["y_train"]))
+            },
+            csv_path, prepared[t]["X_test_s"], prepared[t]["scaler_y"], cancel_token, best[t],
+            _split_fingerprint(prepared[t]["X_train_s"], prepared[t]["y_train"],
+                               prepared[t]["X_test_s"], prepared[t]["y_test"])
+        )
+        for t in targets
+    }
+
+    return {
+        "metadata": {
+            "targets": targets,
+            "models": models,
+            "features": features,
+            "test_size": test_size,
+            "mode": mode,
+            "total_samples": int(len(df)),
+            "train_samples": int(len(train_idx)),
+            "test_samples": int(len(test_idx)),
+            "timestamp": datetime.now().isoformat()
+        },
+        "summary": [
+            {
+                "target_column": t,
+                "best_model": reports[t]["metadata"]["best_model"],
+                "estimator_mode": reports[t]["metadata"]["estimator_mode"],
+                "r2_test": reports[t]["model_comparison"][reports[t]["metadata"]["best_model"]]["r2_test"],
+                "rmse": reports[t]["model_comparison"][reports[t]["metadata"]["best_model"]]["rmse"],
+                "features_used": len(reports[t]["metadata"]["features_used"]),
+                "valid_samples": reports[t]["metadata"]["valid_samples"]
+            }
+            for t in targets
+        ],
+        "targets": reports
+    }
+
+
+def _make_fork_model(name: str, mode: str = "standard"):
+    """
+    创建候选模型；scalable 模式下 SVR / GradientBoosting 换成线性时间的等价模型
+    （LinearSVR 与线性核 SVR 的损失相同；HistGradientBoosting 按直方图分箱建树）
+    """
+    if name == "Ridge":
+        return Ridge(alpha=1.0)
+    if name == "Lasso":
+        return Lasso(alpha=0.1)
+    if name == "GradientBoosting":
+        if mode == "scalable":
+            return HistGradientBoostingRegressor(max_iter=50, random_state=42)
+        return GradientBoostingRegressor(n_estimators=50)
+    if mode == "scalable":
+        return LinearSVR(C=1.0, epsilon=0.1, max_iter=5000, random_state=42)
+    return SVR(kernel="linear")
+
+
+def _resolve_mode(mode: str, n_rows: int) -> str:
+    """auto 模式按有效行数选择 standard / scalable"""
+    if mode == "auto":
+        return "scalable" if n_rows > LARGE_DATASET_ROWS else "standard"
+    return mode
+
+
+def _selection_subsample(y_train: np.ndarray, size: int):
+    """
+    模型选择用的训练子样本行下标：按目标值的十分位分层抽样，保证子样本覆盖完整的目标分布
+    未指定 size 或训练集不超过 size 时返回 None（使用全部训练集）
+    """
+    if not size or size >= len(y_train):
+        return None
+    bins = pd.qcut(y_train, q=10, labels=False, duplicates="drop")
+    try:
+        rows, _ = train_test_split(np.arange(len(y_train)), train_size=size, stratify=bins, random_state=42)
+    except ValueError:
+        # 某个分位区间行数太少无法分层时退化为简单随机抽样
+        rows, _ = train_test_split(np.arange(len(y_train)), train_size=size, random_state=42)
+    return np.sort(rows)
+
+
+def _mode_metadata(requested_mode: str, estimator_mode: str, sample, train_rows: int) -> dict:
+    return {
+        "requested_mode": requested_mode,
+        "estimator_mode": estimator_mode,
+        "model_selection": {
+            "subsampled": sample is not None,
+            "selection_rows": int(len(sample)) if sample is not None else int(train_rows),
+            "refit_rows": int(train_rows)
+        }
+    }
+
+
+def _run_fork_prediction(csv_path: str, target_column: str, features: list, test_size: float,
+                         models: list, mode: str, selection_sample_size: int, series_features: bool,
+                         cancel_token=None, preview: bool = False) -> dict:
     np.random.seed(42)
 
-    # ==================== 1. 加载 CSV ====================
-    df = pd.read_csv(csv_path, encoding="utf-8")
+    # ==================== 1. 加载数值化矩阵（取自特征存储，只复制用到的列） ====================
+    numeric = numeric_feature_frame(csv_path)
+    if target_column not in numeric.columns:
+        raise ValueError(f"目标列 {target_column} 没有数值数据")
+    df = numeric[[c for c in features if c in numeric.columns and c != target_column] + [target_column]]
+    if series_features:
+        # 时序特征矩阵按数据集版本缓存，这里只按行索引拼接
+        ts = series_feature_frame(csv_path)
+        df = pd.concat([df, ts], axis=1)
+        features = list(features) + list(ts.columns)
 
     # ==================== 2. 目标列处理 ====================
     def convert_to_numeric(col):
@@ -27,17 +390,24 @@ def run_fork_prediction(csv_path: str, target_column: str = "technical_fork") ->
     df["target_numeric"] = convert_to_numeric(df[target_column])
     df_clean = df.dropna(subset=["target_numeric"]).reset_index(drop=True)
 
-    # ==================== 3. 特征工程 ====================
-    candidate_features = [
-        "bus_factor", "change_requests", "change_requests_accepted",
-        "change_requests_reviews", "code_change_lines_add",
-        "code_change_lines_remove", "inactive_contributors",
-        "issues_closed", "issues_new", "issue_comments",
-        "new_contributors"
-    ]
+    preview_info = None
+    if preview:
+        valid_rows = len(df_clean)
+        rows = _selection_subsample(df_clean["target_numeric"].values, PREVIEW_ROWS)
+        if rows is not None:
+            df_clean = df_clean.iloc[rows].reset_index(drop=True)
+        preview_info = {
+            "approximate": rows is not None,
+            "sample_rows": int(len(df_clean)),
+            "total_rows": int(valid_rows),
+            "sampling": "stratified_by_target"
+        }
 
+    check_cancelled(cancel_token)
+
+    # ==================== 3. 特征工程 ====================
     feature_cols = []
-    for col in candidate_features:
+    for col in features:
         if col in df_clean.columns:
             df_clean[f"feat_{col}"] = pd.to_numeric(df_clean[col], errors="coerce")
             corr = df_clean[f"feat_{col}"].corr(df_clean["target_numeric"])
@@ -47,12 +417,15 @@ def run_fork_prediction(csv_path: str, target_column: str = "technical_fork") ->
                 )
                 feature_cols.append(f"feat_{col}")
 
+    if not feature_cols:
+        raise ValueError("没有可用的特征列（候选特征不存在或与目标列高度相关）")
+
     X = df_clean[feature_cols]
     y = df_clean["target_numeric"]
 
     # ==================== 4. 数据拆分 & 标准化 ====================
     X_train, X_test, y_train, y_test, train_idx, test_idx = train_test_split(
-        X, y, df_clean.index, test_size=0.3, random_state=42
+        X, y, df_clean.index, test_size=test_size, random_state=42
     )
 
     scaler_X = StandardScaler()
@@ -63,77 +436,151 @@ def run_fork_prediction(csv_path: str, target_column: str = "technical_fork") ->
     y_train_s = scaler_y.fit_transform(y_train.values.reshape(-1, 1)).ravel()
 
     # ==================== 5. 模型训练 ====================
-    models = {
-        "Ridge": Ridge(alpha=1.0),
-        "Lasso": Lasso(alpha=0.1),
-        "GradientBoosting": GradientBoostingRegressor(n_estimators=50),
-        "SVR": SVR(kernel="linear")
-    }
+    # 大数据集使用线性时间的估计器；指定 selection_sample_size 时先在分层子样本上对比模型
+    estimator_mode = _resolve_mode(mode, len(df_clean))
+    y_train = y_train.values
+    sample = _selection_subsample(y_train, selection_sample_size)
+    X_fit, y_fit_s, y_fit = (X_train_s, y_train_s, y_train) if sample is None else \
+        (X_train_s[sample], y_train_s[sample], y_train[sample])
 
     results = {}
-    for name, model in models.items():
-        model.fit(X_train_s, y_train_s)
-
-        y_pred_s = model.predict(X_test_s)
-        y_pred = scaler_y.inverse_transform(
-            y_pred_s.reshape(-1, 1)
-        ).flatten()
-
-        y_train_pred = scaler_y.inverse_transform(
-            model.predict(X_train_s).reshape(-1, 1)
-        ).flatten()
-
-        results[name] = {
-            "model": model,
-            "r2_train": float(r2_score(y_train, y_train_pred)),
-            "r2_test": float(r2_score(y_test, y_pred)),
-            "rmse": float(np.sqrt(mean_squared_error(y_test, y_pred))),
-            "mae": float(mean_absolute_error(y_test, y_pred)),
-            "overfitting_gap": float(
-                r2_score(y_train, y_train_pred) - r2_score(y_test, y_pred)
-            ),
-            "y_true": y_test.tolist(),
-            "y_pred": y_pred.tolist()
-        }
+    for name in models:
+        check_cancelled(cancel_token)
+        results[name] = _fit_fork_model(name, X_fit, X_test_s, y_fit_s, y_fit, y_test, scaler_y, estimator_mode)
+
+    best_name = _select_best_model(results)
+    if sample is not None:
+        # 最优模型在全部训练集上重新拟合，报告中的指标与预测都来自全量模型
+        check_cancelled(cancel_token)
+        results[best_name] = _fit_fork_model(best_name, X_train_s, X_test_s, y_train_s, y_train, y_test,
+                                             scaler_y, estimator_mode)
 
-    # ==================== 6. 选择最佳模型 ====================
-    best_name = max(
+    check_cancelled(cancel_token)
+
+    # ==================== 6-8. 选择最佳模型、特征重要性、构建返回 JSON ====================
+    return _build_fork_report(results, feature_cols, {
+        "target_column": target_column,
+        "test_size": test_size,
+        "total_samples": int(len(df)),
+        "valid_samples": int(len(df_clean)),
+        "preview": preview_info,
+        **_mode_metadata(mode, estimator_mode, sample, len(y_train))
+    }, csv_path, X_test_s, scaler_y, cancel_token, best_name,
+        _split_fingerprint(X_train_s, y_train, X_test_s, y_test))
+
+
+def _fit_fork_model(name: str, X_train_s, X_test_s, y_train_s, y_train, y_test, scaler_y,
+                    mode: str = "standard") -> dict:
+    """训练单个候选模型（目标已标准化），返回原始尺度上的评估指标与测试集预测"""
+    model = _make_fork_model(name, mode)
+    model.fit(X_train_s, y_train_s)
+
+    y_pred_s = model.predict(X_test_s)
+    y_pred = scaler_y.inverse_transform(
+        y_pred_s.reshape(-1, 1)
+    ).flatten()
+
+    y_train_pred = scaler_y.inverse_transform(
+        model.predict(X_train_s).reshape(-1, 1)
+    ).flatten()
+
+    return {
+        "model": model,
+        "r2_train": float(r2_score(y_train, y_train_pred)),
+        "r2_test": float(r2_score(y_test, y_pred)),
+        "rmse": float(np.sqrt(mean_squared_error(y_test, y_pred))),
+        "mae": float(mean_absolute_error(y_test, y_pred)),
+        "overfitting_gap": float(
+            r2_score(y_train, y_train_pred) - r2_score(y_test, y_pred)
+        ),
+        "train_rows": int(len(y_train)),
+        "y_true": y_test.tolist(),
+        "y_pred": y_pred.tolist()
+    }
+
+
+def _select_best_model(results: dict) -> str:
+    """按测试集 R² 选择最佳模型（过拟合差距超过 0.2 的模型扣 0.3 分）"""
+    return max(
         results.keys(),
         key=lambda k: results[k]["r2_test"] -
         (0.3 if results[k]["overfitting_gap"] > 0.2 else 0)
     )
 
+
+def _split_fingerprint(*arrays) -> str:
+    """训练/测试数据的内容指纹（标准化后的矩阵与目标值），拆分行或预处理不同即指纹不同"""
+    digest = hashlib.sha1()
+    for a in arrays:
+        a = np.ascontiguousarray(np.asarray(a, dtype=np.float64))
+        digest.update(str(a.shape).encode())
+        digest.update(a.tobytes())
+    return digest.hexdigest()[:16]
+
+
+def _build_fork_report(results: dict, feature_cols: list, metadata: dict,
+                       csv_path: str, X_test_s, scaler_y, cancel_token=None,
+                       best_name: str = None, split_key: str = None) -> dict:
+    # ==================== 6. 选择最佳模型（子样本选择时由调用方传入，不再按重拟合后的指标重选） ====================
+    best_name = best_name or _select_best_model(results)
+
     best_model = results[best_name]["model"]
 
     # ==================== 7. 特征重要性 ====================
-    feature_importance = []
+    # 模型自带的系数 / 树重要性：不同模型类型之间不可比（线性模型还是标准化尺度上的系数），仅作参考
+    native_importance = []
     if hasattr(best_model, "coef_"):
-        for f, v in zip(feature_cols, best_model.coef_):
-            feature_importance.append({
+        for f, v in zip(feature_cols, np.ravel(best_model.coef_)):
+            native_importance.append({
                 "feature_name": f,
                 "importance": float(v),
                 "abs_importance": abs(float(v))
             })
     elif hasattr(best_model, "feature_importances_"):
         for f, v in zip(feature_cols, best_model.feature_importances_):
-            feature_importance.append({
+            native_importance.append({
                 "feature_name": f,
                 "importance": float(v),
                 "abs_importance": float(v)
             })
 
-    feature_importance.sort(
+    native_importance.sort(
         key=lambda x: x["abs_importance"], reverse=True
     )
 
+    # 置换重要性（与模型类型无关，统一为原始尺度上的测试集 R² 下降量）
+    # 模型版本 = 模型配置 + 训练/测试数据指纹（split_key）：单目标与多目标接口的缺失值过滤
+    # 与拆分顺序不同，训练/测试行并不相同，只有数据完全一致时才会复用同一份置换重要性
+    model_version = params_key({
+        "split": split_key,
+        "target_column": metadata["target_column"],
+        "features": feature_cols,
+        "test_size": metadata["test_size"],
+        "model": best_name,
+        "estimator_mode": metadata["estimator_mode"],
+        "preview": metadata.get("preview"),
+        "n_repeats": PERMUTATION_REPEATS
+    })
+    feature_importance = cached_result(
+        "fork_permutation_importance", csv_path, model_version,
+        lambda: _permutation_importance(best_model, X_test_s, results[best_name]["y_true"],
+                                        scaler_y, feature_cols, cancel_token)
+    )
+
     # ==================== 8. 构建统一返回 JSON ====================
     return {
         "metadata": {
-            "target_column": target_column,
+            "target_column": metadata["target_column"],
+            "test_size": metadata["test_size"],
             "best_model": best_name,
             "features_used": feature_cols,
-            "total_samples": int(len(df)),
-            "valid_samples": int(len(df_clean)),
+            "total_samples": metadata["total_samples"],
+            "valid_samples": metadata["valid_samples"],
+            "estimator_mode": metadata["estimator_mode"],
+            "requested_mode": metadata["requested_mode"],
+            "estimators": {name: type(r["model"]).__name__ for name, r in results.items()},
+            "model_selection": metadata["model_selection"],
+            **({"preview": metadata["preview"]} if metadata.get("preview") else {}),
             "timestamp": datetime.now().isoformat()
         },
         "model_comparison": {
@@ -143,13 +590,19 @@ def run_fork_prediction(csv_path: str, target_column: str = "technical_fork") ->
                 "rmse": r["rmse"],
                 "mae": r["mae"],
                 "overfitting_gap": r["overfitting_gap"],
+                "train_rows": r["train_rows"],
                 "selected": name == best_name
             }
             for name, r in results.items()
         },
         "feature_importance": {
             "model": best_name,
-            "feature_importance": feature_importance
+            "method": "permutation",
+            "metric": "r2_decrease",
+            "n_repeats": PERMUTATION_REPEATS,
+            "model_version": model_version,
+            "feature_importance": feature_importance,
+            "native_importance": native_importance
         },
         "predictions": [
             {
@@ -163,3 +616,58 @@ def run_fork_prediction(csv_path: str, target_column: str = "technical_fork") ->
             )
         ]
     }
+
+
+def _permutation_importance(model, X_test_s, y_test, scaler_y, feature_cols: list,
+                            cancel_token=None) -> list:
+    """
+    置换重要性：逐个特征在测试集上随机打乱 PERMUTATION_REPEATS 次，记录原始尺度 R² 的平均下降量
+
+    各特征作为独立任务在线程池中并行计算；每个工作线程只复制一次测试矩阵并复用同一个
+    预测缓冲区，打乱某列后就地写回原值，不为每次打乱重新分配矩阵
+    每个特征使用固定的随机种子，结果与线程调度顺序无关
+    """
+    X_test_s = np.ascontiguousarray(X_test_s, dtype=np.float64)
+    y_test = np.asarray(y_test, dtype=np.float64)
+    scale, mean = float(scaler_y.scale_[0]), float(scaler_y.mean_[0])
+    baseline = r2_score(y_test, model.predict(X_test_s) * scale + mean)
+
+    local = threading.local()
+
+    def score_feature(j):
+        check_cancelled(cancel_token)
+        if not hasattr(local, "X"):
+            local.X = X_test_s.copy()
+            local.y_pred = np.empty(len(y_test))
+        X, y_pred = local.X, local.y_pred
+        rng = np.random.RandomState(42 + j)
+        drops = np.empty(PERMUTATION_REPEATS)
+        for r in range(PERMUTATION_REPEATS):
+            X[:, j] = X_test_s[rng.permutation(len(X)), j]
+            np.multiply(model.predict(X), scale, out=y_pred)
+            y_pred += mean
+            drops[r] = baseline - r2_score(y_test, y_pred)
+        X[:, j] = X_test_s[:, j]
+        return j, drops
+
+    workers, _ = current_job().split(len(feature_cols))
+    scores = {}
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        for future in as_completed([executor.submit(score_feature, j) for j in range(len(feature_cols))]):
+            j, drops = future.result()
+            scores[j] = drops
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    feature_importance = [
+        {
+            "feature_name": f,
+            "importance": float(scores[j].mean()),
+            "importance_std": float(scores[j].std()),
+            "abs_importance": abs(float(scores[j].mean()))
+        }
+        for j, f in enumerate(feature_cols)
+    ]
+    feature_importance.sort(key=lambda x: x["abs_importance"], reverse=True)
+    return feature_importance
@@ -1,17 +1,52 @@
+import os
+import base64
 import pandas as pd
 import numpy as np
 import json
 import warnings
+from data_loader import (DEFAULT_CSV_PATH, load_dataset, get_dataset_version, cached_result,
+                         numeric_columns, parse_filter, filter_mask)
 warnings.filterwarnings('ignore')
 
 
+# 要分析的6个指标
+TARGET_INDICATORS = [
+    'inactive_contributors',
+    'issues_and_change_request_active',
+    'issues_closed',
+    'issues_new',
+    'new_contributors',
+    'participants'
+]
+
+# 指标中文名称映射
+INDICATOR_NAMES = {
+    'inactive_contributors': '非活跃贡献者',
+    'issues_and_change_request_active': '活跃工单/PR',
+    'issues_closed': '已关闭工单',
+    'issues_new': '新增工单',
+    'new_contributors': '新贡献者',
+    'participants': '参与者总数'
+}
+
+
 # ==================== 封装的统计函数 ====================
-def get_indicator_statistics(csv_path: str = r'C:\Users\22390\Desktop\OpenSODA\backendData\top_300_metrics.csv') -> dict:
+def get_indicator_statistics(csv_path: str = DEFAULT_CSV_PATH,
+                             histogram_bins: int = 30,
+                             clip_quantile: float = 0.95,
+                             include_kde: bool = False,
+                             kde_points: int = 64,
+                             include_projects_detail: bool = True) -> dict:
     """
     获取指标统计信息（不生成图片，只返回JSON数据）
 
     参数:
         csv_path: CSV文件路径（可选，有默认值）
+        histogram_bins: 直方图分箱数（默认30，与脚本模式一致）
+        clip_quantile: 直方图上限分位数（默认0.95，超过该分位数的值不参与分箱）
+        include_kde: 是否返回核密度估计采样点
+        kde_points: 核密度估计的采样点数
+        include_projects_detail: 是否附带全部项目明细（接口默认关闭，改用 get_projects_detail 分页获取）
 
     返回:
         包含指标统计信息的字典
@@ -19,32 +54,17 @@ def get_indicator_statistics(csv_path: str = r'C:\Users\22390\Desktop\OpenSODA\b
             "metadata": {...},              # 元数据信息
             "indicator_statistics": [...],  # 各指标统计数据
             "correlation_matrix": {...},    # 相关性矩阵（用于热力图）
-            "top10_projects": [...]         # Top10项目数据（用于对比图）
+            "top10_projects": [...],        # Top10项目数据（用于对比图）
+            "distributions": [...]          # 各指标直方图分箱/箱线图/核密度（用于分布图）
         }
     """
     try:
         # 定义要分析的6个指标
-        target_indicators = [
-            'inactive_contributors',
-            'issues_and_change_request_active',
-            'issues_closed',
-            'issues_new',
-            'new_contributors',
-            'participants'
-        ]
-
-        # 指标中文名称映射
-        indicator_names = {
-            'inactive_contributors': '非活跃贡献者',
-            'issues_and_change_request_active': '活跃工单/PR',
-            'issues_closed': '已关闭工单',
-            'issues_new': '新增工单',
-            'new_contributors': '新贡献者',
-            'participants': '参与者总数'
-        }
+        target_indicators = TARGET_INDICATORS
+        indicator_names = INDICATOR_NAMES
 
-        # 1. 加载数据
-        df = pd.read_csv(csv_path)
+        # 1. 加载数据（复用已缓存的数据集）
+        df = load_dataset(csv_path)
 
         # 2. 过滤有效数据（无缺失值）
         df_valid = df[target_indicators].dropna()
@@ -59,7 +79,7 @@ def get_indicator_statistics(csv_path: str = r'C:\Users\22390\Desktop\OpenSODA\b
         # 5. 构建完整的JSON数据结构
         indicator_stats = {
             "metadata": {
-                "data_source": "top_300_metrics.csv",
+                "data_source": os.path.basename(csv_path),
                 "total_projects": len(df),
                 "valid_projects": len(df_valid),
                 "missing_data_ratio": f"{((len(df) - len(df_valid)) / len(df) * 100):.2f}%",
@@ -68,11 +88,12 @@ def get_indicator_statistics(csv_path: str = r'C:\Users\22390\Desktop\OpenSODA\b
             "projects_detail": [],  # ✅ 新增：所有项目的详细数据（顶层字段，避免重复）
             "indicator_statistics": [],
             "correlation_matrix": corr_matrix.round(4).to_dict(),  # 相关性矩阵（用于热力图）
-            "top10_projects": []
+            "top10_projects": [],
+            "distributions": []  # 服务端预计算的分布摘要，大小只与分箱数有关
         }
 
-        # 6. 添加所有项目的详细数据（新增）
-        for idx, row in df_valid.iterrows():
+        # 6. 添加所有项目的详细数据（新增，可通过 include_projects_detail 关闭）
+        for idx, row in (df_valid.iterrows() if include_projects_detail else []):
             project_detail = {
                 "project_index": int(idx),
                 "project_name": df.iloc[idx]['projectname2']
@@ -123,13 +144,231 @@ def get_indicator_statistics(csv_path: str = r'C:\Users\22390\Desktop\OpenSODA\b
 
             indicator_stats["top10_projects"].append(project_data)
 
-        # 8. 返回结果
+        # 9. 添加每个指标的分布摘要（直方图分箱 + 箱线图 + 可选核密度）
+        for ind in target_indicators:
+            distribution = build_indicator_distribution(
+                df_valid[ind].values,
+                bins=histogram_bins,
+                clip_quantile=clip_quantile,
+                include_kde=include_kde,
+                kde_points=kde_points
+            )
+            distribution["indicator_column"] = ind
+            distribution["indicator_name"] = indicator_names[ind]
+            indicator_stats["distributions"].append(distribution)
+
+        # 10. 返回结果
         return indicator_stats
 
     except Exception as e:
         raise Exception(f"获取指标统计信息失败: {str(e)}")
 
 
+# ==================== 项目明细分页查询 ====================
+def get_projects_detail(csv_path: str = DEFAULT_CSV_PATH,
+                        fields: list = None,
+                        filters: list = None,
+                        sort_by: str = None,
+                        descending: bool = True,
+                        cursor: str = None,
+                        limit: int = 50) -> dict:
+    """
+    分页获取项目明细（原 get_indicator_statistics 中的 projects_detail）
+
+    参数:
+        csv_path: CSV文件路径
+        fields: 返回的指标列（默认6个核心指标，可选任意数值列）
+        filters: 过滤条件列表，例如 ["participants > 100", "stars>=50"]
+        sort_by: 排序列（默认按原始行号）
+        descending: 是否降序
+        cursor: 上一页返回的 next_cursor，首页为空
+        limit: 每页条数
+
+    返回:
+        {
+            "metadata": {...},     # 数据集版本、匹配总数、字段等
+            "items": [...],        # 当前页项目
+            "next_cursor": "..."   # 下一页游标，没有更多数据时为 None
+        }
+    """
+    table = cached_result("projects_detail_table", csv_path, (), lambda: _build_projects_table(csv_path))
+    available = [c for c in table.columns if c not in ('project_index', 'project_name')]
+
+    fields = list(fields) if fields else list(TARGET_INDICATORS)
+    unknown = [f for f in fields + ([sort_by] if sort_by else []) if f not in available]
+    if unknown:
+        raise ValueError(f"未知字段: {', '.join(unknown)}，可选字段: {', '.join(available)}")
+
+    parsed_filters = tuple(parse_filter(f, available) for f in (filters or []))
+    version = get_dataset_version(csv_path)
+    offset = _decode_cursor(cursor, version)
+
+    # 只缓存与过滤条件无关的整表排序（每个 (排序列, 方向) 一份，条目数有界）；
+    # 过滤条件任意组合，按请求向量化计算掩码后从整表顺序中取出，不做缓存
+    if sort_by:
+        order = cached_result(
+            "projects_detail_sort", csv_path, (sort_by, descending),
+            lambda: _sort_order(table, sort_by, descending)
+        )
+    else:
+        order = np.arange(len(table))
+    order = order[filter_mask(table, parsed_filters)[order]]
+
+    page_rows = order[offset:offset + limit]
+    page = table.iloc[page_rows]
+    values = page[fields].round(4).astype(object).where(page[fields].notna(), None)
+
+    items = []
+    for i in range(len(page)):
+        item = {
+            "project_index": int(page['project_index'].iat[i]),
+            "project_name": page['project_name'].iat[i]
+        }
+        item.update(zip(fields, values.iloc[i].tolist()))
+        items.append(item)
+
+    next_offset = offset + len(page_rows)
+    return {
+        "metadata": {
+            "dataset_version": version,
+            "total_matched": int(len(order)),
+            "limit": limit,
+            "fields": fields,
+            "sort_by": sort_by,
+            "descending": descending,
+            "filters": [f"{c} {op} {v}" for c, op, v in parsed_filters]
+        },
+        "items": items,
+        "next_cursor": _encode_cursor(version, next_offset) if next_offset < len(order) else None
+    }
+
+
+def _build_projects_table(csv_path: str) -> pd.DataFrame:
+    """构建项目明细表：与原 projects_detail 一致，只保留6个核心指标无缺失的项目"""
+    df = load_dataset(csv_path)
+    valid_index = df[TARGET_INDICATORS].dropna().index
+    table = df.loc[valid_index, numeric_columns(df)].copy()
+    table.insert(0, 'project_name', df.loc[valid_index, 'projectname2'].values)
+    table.insert(0, 'project_index', valid_index.values)
+    return table.reset_index(drop=True)
+
+
+def _sort_order(table: pd.DataFrame, sort_by: str, descending: bool) -> np.ndarray:
+    """整表按 sort_by 的稳定排序（缺失值始终排在最后）；稳定排序下先排序后过滤与先过滤后排序结果一致"""
+    keys = table[sort_by].values.astype(float)
+    keys = np.where(np.isnan(keys), -np.inf if descending else np.inf, keys)
+    return np.argsort(-keys if descending else keys, kind='stable')
+
+
+def _encode_cursor(version: str, offset: int) -> str:
+    return base64.urlsafe_b64encode(f"{version}:{offset}".encode()).decode()
+
+
+def _decode_cursor(cursor: str, version: str) -> int:
+    if not cursor:
+        return 0
+    try:
+        cursor_version, offset = base64.urlsafe_b64decode(cursor.encode()).decode().split(':')
+        offset = int(offset)
+    except Exception:
+        raise ValueError("无效的分页游标")
+    if cursor_version != version:
+        raise ValueError("数据集已更新，分页游标已失效，请从第一页重新获取")
+    return offset
+
+
+# ==================== 分布摘要工具函数 ====================
+def build_indicator_distribution(values, bins: int = 30, clip_quantile: float = 0.95,
+                                 include_kde: bool = False, kde_points: int = 64) -> dict:
+    """
+    计算单个指标的分布摘要，返回结果的大小只与分箱数/采样点数有关，与项目数无关
+
+    参数:
+        values: 指标取值（一维数组）
+        bins: 直方图分箱数
+        clip_quantile: 直方图上限分位数（与脚本模式的95分位数截断一致）
+        include_kde: 是否计算核密度估计
+        kde_points: 核密度估计的采样点数
+
+    返回:
+        {
+            "histogram": {...},  # 分箱边界与频次
+            "boxplot": {...},    # 箱线图五数概括
+            "kde": {...} | None  # 核密度采样点（未开启时为 None）
+        }
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return {"histogram": None, "boxplot": None, "kde": None}
+
+    # 1. 直方图：按分位数截断后分箱
+    min_val = float(values.min())
+    clip_upper = float(np.quantile(values, clip_quantile)) if clip_quantile < 1 else float(values.max())
+    clipped = values[values <= clip_upper]
+    counts, edges = np.histogram(clipped, bins=bins, range=(min_val, max(clip_upper, min_val)))
+
+    # 2. 箱线图：基于全部数据，须线为 1.5 倍 IQR 内的最远数据点
+    q1, median, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+
+    distribution = {
+        "histogram": {
+            "bins": int(bins),
+            "clip_quantile": clip_quantile,
+            "clip_upper": round(clip_upper, 4),
+            "clipped_count": int(len(values) - len(clipped)),
+            "bin_edges": [round(float(e), 4) for e in edges],
+            "counts": counts.astype(int).tolist()
+        },
+        "boxplot": {
+            "min": round(min_val, 4),
+            "q1": round(float(q1), 4),
+            "median": round(float(median), 4),
+            "q3": round(float(q3), 4),
+            "max": round(float(values.max()), 4),
+            "mean": round(float(values.mean()), 4),
+            "whisker_low": round(float(inside.min()), 4),
+            "whisker_high": round(float(inside.max()), 4),
+            "outlier_count": int(len(values) - len(inside))
+        },
+        "kde": None
+    }
+
+    # 3. 核密度估计（可选）：先在采样网格上分箱，再与高斯核卷积，复杂度 O(n + points²)
+    if include_kde:
+        distribution["kde"] = _binned_gaussian_kde(clipped, min_val, clip_upper, kde_points)
+
+    return distribution
+
+
+def _binned_gaussian_kde(values, lower: float, upper: float, points: int):
+    """分箱近似的高斯核密度估计（Silverman 带宽），数据为常数时返回 None"""
+    n = len(values)
+    std = values.std(ddof=1) if n > 1 else 0.0
+    iqr = np.subtract(*np.quantile(values, [0.75, 0.25])) if n > 1 else 0.0
+    spread = min(std, iqr / 1.34) if iqr > 0 else std
+    if n < 2 or spread <= 0 or upper <= lower:
+        return None
+
+    bandwidth = 0.9 * spread * n ** (-0.2)
+    grid = np.linspace(lower, upper, points)
+    # 分箱中心直接取自直方图的边界，保证计数落在各自分箱的真实中心上
+    grid_counts, edges = np.histogram(values, bins=points, range=(lower, upper))
+    centers = edges[:-1] + np.diff(edges) / 2
+
+    # 网格点 × 分箱中心 的高斯核矩阵
+    u = (grid[:, None] - centers[None, :]) / bandwidth
+    density = np.exp(-0.5 * u ** 2) @ grid_counts / (n * bandwidth * np.sqrt(2 * np.pi))
+
+    return {
+        "bandwidth": round(float(bandwidth), 4),
+        "x": [round(float(x), 4) for x in grid],
+        "density": [round(float(d), 6) for d in density]
+    }
+
+
 # ==================== 命令行脚本模式 ====================
 # 只有直接运行此文件时才会执行以下代码，被导入时不会执行
 if __name__ == "__main__":
@@ -151,7 +390,7 @@ if __name__ == "__main__":
         result = get_indicator_statistics()
 
         # 重新加载数据用于绘图
-        csv_path = r'C:\Users\22390\Desktop\OpenSODA\backendData\top_300_metrics.csv'
+        csv_path = DEFAULT_CSV_PATH
         df = pd.read_csv(csv_path)
 
         target_indicators = result['metadata']['analysis_indicators']
@@ -189,7 +428,7 @@ if __name__ == "__main__":
 
         plt.title('6个核心指标相关性热力图', fontsize=14, fontweight='bold', pad=20)
         plt.tight_layout()
-        heatmap_path = r'C:\Users\22390\Desktop\OpenSODA\backendData\indicators_heatmap.png'
+        heatmap_path = os.path.join(os.path.dirname(DEFAULT_CSV_PATH), 'indicators_heatmap.png')
         plt.savefig(heatmap_path, dpi=100, bbox_inches='tight')
         plt.close()
         print(f"  ✅ 热力图已保存: {heatmap_path}")
@@ -221,7 +460,7 @@ if __name__ == "__main__":
             ax.grid(True, alpha=0.3)
 
         plt.tight_layout()
-        histogram_path = r'C:\Users\22390\Desktop\OpenSODA\backendData\indicators_histogram.png'
+        histogram_path = os.path.join(os.path.dirname(DEFAULT_CSV_PATH), 'indicators_histogram.png')
         plt.savefig(histogram_path, dpi=100, bbox_inches='tight')
         plt.close()
         print(f"  ✅ 分布直方图已保存: {histogram_path}")
@@ -251,14 +490,14 @@ if __name__ == "__main__":
         plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
         plt.grid(True, alpha=0.3, axis='x')
         plt.tight_layout()
-        top10_path = r'C:\Users\22390\Desktop\OpenSODA\backendData\indicators_top10_bar.png'
+        top10_path = os.path.join(os.path.dirname(DEFAULT_CSV_PATH), 'indicators_top10_bar.png')
         plt.savefig(top10_path, dpi=100, bbox_inches='tight')
         plt.close()
         print(f"  ✅ Top10对比图已保存: {top10_path}")
 
         # ==================== 4. 保存JSON文件 ====================
         print("\n💾 保存JSON文件...")
-        json_path = r'C:\Users\22390\Desktop\OpenSODA\backendData\indicators_stat.json'
+        json_path = os.path.join(os.path.dirname(DEFAULT_CSV_PATH), 'indicators_stat.json')
         with open(json_path, 'w', encoding='utf-8') as f:
             json.dump(result, f, ensure_ascii=False, indent=4)
         print(f"  ✅ JSON文件已保存: {json_path}")
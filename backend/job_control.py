@@ -0,0 +1,70 @@
+import time
+import threading
+import xgboost as xgb
+
+
+# 任务被取消 / 超时后的最终状态
+CANCELLED = "cancelled"
+TIMED_OUT = "timed_out"
+
+
+class JobCancelled(Exception):
+    """任务在检查点被中止；reason 为 cancelled 或 timed_out"""
+
+    def __init__(self, reason: str = CANCELLED):
+        self.reason = reason
+        super().__init__("任务已取消" if reason == CANCELLED else "任务超时")
+
+
+# ==================== 协作式取消令牌 ====================
+class CancellationToken:
+    """
+    协作式取消令牌：长任务在阶段之间、交叉验证每折之间、XGBoost 每轮提升之后
+    调用 check()，一旦被取消或超过截止时间就抛出 JobCancelled，由任务入口统一处理
+
+    参数:
+        timeout: 超时时间（秒），为空表示不限时
+    """
+
+    def __init__(self, timeout: float = None):
+        self._event = threading.Event()
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.timeout = timeout
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def check(self):
+        """在检查点调用：已取消或已超时则抛出 JobCancelled"""
+        if self._event.is_set():
+            raise JobCancelled(CANCELLED)
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise JobCancelled(TIMED_OUT)
+
+    def xgboost_callback(self) -> xgb.callback.TrainingCallback:
+        """每轮提升之后检查一次的 XGBoost 回调"""
+        return _XGBoostCancellationCallback(self)
+
+
+class _XGBoostCancellationCallback(xgb.callback.TrainingCallback):
+    def __init__(self, token: CancellationToken):
+        super().__init__()
+        self.token = token
+
+    def after_iteration(self, model, epoch, evals_log) -> bool:
+        self.token.check()
+        return False
+
+    def __deepcopy__(self, memo):
+        # sklearn.clone 会深拷贝参数；回调与令牌共享，不能复制出一个新的令牌
+        return self
+
+
+def check_cancelled(token: CancellationToken = None):
+    """令牌可选的便捷检查（未传令牌时什么也不做）"""
+    if token is not None:
+        token.check()
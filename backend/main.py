@@ -3,16 +3,36 @@ import json
 import uuid
 import asyncio
 from pathlib import Path
-from typing import Dict, Any
-from fastapi import FastAPI, HTTPException, UploadFile, File, BackgroundTasks
+from typing import Dict, Any, List, Optional
+from fastapi import FastAPI, HTTPException, UploadFile, File, BackgroundTasks, Query, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, PrivateAttr, model_validator
 import uvicorn
 
 # 导入封装的预测函数
-from fork_prediction import run_fork_prediction
-from indicators_stat import get_indicator_statistics
-from predict_response_time_xgboost import predict_response_time
+from fork_prediction import (run_fork_prediction, validate_fork_params,
+                             run_multi_target_fork_prediction, validate_multi_target_params)
+from indicators_stat import get_indicator_statistics, get_projects_detail
+from predict_response_time_xgboost import predict_response_time, validate_response_time_params
+from data_loader import DEFAULT_CSV_PATH, resolve_dataset, register_dataset, list_datasets
+from dataset_query import get_dataset_columns, query_dataset
+from dashboard_stats import get_dashboard_summary
+from activity_matrix import get_activity_heatmap, get_activity_profile, find_similar_activity_projects
+from contributor_graph import (get_contributor_graph_summary, get_contributor_projects,
+                               find_projects_sharing_contributors)
+from similarity_index import find_similar_projects, get_all_similar_projects
+from project_clustering import run_project_clustering, get_project_clusters, get_project_cluster
+from anomaly_detection import detect_monthly_anomalies
+from baseline_forecast import get_baseline_forecasts
+from series_features import get_series_features
+from feature_store import list_feature_sets
+from snapshot_diff import diff_snapshots, DEFAULT_RANK_COLUMN
+from job_control import CancellationToken, JobCancelled, CANCELLED
+from cpu_budget import job_resources, get_resource_status, configure_native_threads
+from model_registry import list_models, update_model
+
+# 所有计算库已在上面导入，在这里统一设置 BLAS/OpenMP 线程数（进程级，不随任务切换）
+configure_native_threads()
 
 app = FastAPI()
 
@@ -26,14 +46,18 @@ app.add_middleware(
 )
 
 tasks: Dict[str, Dict[str, Any]] = {}
+# 可取消后台任务的取消令牌：task_id -> CancellationToken（任务结束后移除）
+cancel_tokens: Dict[str, CancellationToken] = {}
 
 # 响应时间预测任务状态（全局变量）
 response_time_task_status = {
-    "status": "idle",  # idle, running, completed, error
+    "status": "idle",  # idle, running, completed, error, cancelled, timed_out
     "progress": 0,
     "message": "",
     "result": None,
-    "error": None
+    "partial_result": {},  # 运行中已可用的阶段性结果（键与最终结果一致）
+    "error": None,
+    "task_id": None  # 当前任务 ID（取消令牌保存在 cancel_tokens 中）
 }
 
 
@@ -49,9 +73,83 @@ class TaskStatus(BaseModel):
     result: Any = None
 
 
-class PredictionRequest(BaseModel):
-    target_column: str
-    csv_path: str = r"C:\Users\22390\Desktop\OpenSODA\backendData\top_300_metrics.csv"
+class DatasetSelection(BaseModel):
+    """
+    请求体中的数据集选择：dataset 为已注册的数据集 ID（见 GET /api/datasets），为空时使用默认数据集
+    （不接受客户端传入的文件路径，CSV 路径只在服务端由注册表解析，见 csv_path 属性）
+    """
+    dataset: Optional[str] = None
+    _csv_path: str = PrivateAttr(DEFAULT_CSV_PATH)
+
+    @model_validator(mode="after")
+    def _resolve_dataset(self):
+        try:
+            self._csv_path = resolve_dataset(self.dataset)
+        except KeyError as e:
+            raise ValueError(e.args[0])
+        return self
+
+    @property
+    def csv_path(self) -> str:
+        return self._csv_path
+
+
+def dataset_path(dataset: Optional[str] = Query(None, description="数据集 ID（见 /api/datasets），为空时使用默认数据集")) -> str:
+    """GET 接口共用的数据集选择依赖：把查询参数 dataset 解析为 CSV 路径，未知 ID 返回 404"""
+    try:
+        return resolve_dataset(dataset)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+
+
+class PredictionRequest(DatasetSelection):
+    """
+    预测接口的请求参数（所有字段可选，为空时使用各预测接口的默认值）
+    相同参数组合在同一数据集版本上只计算一次，重复请求直接返回缓存结果
+    """
+    target_column: Optional[str] = None                      # Fork: 任意数值列；响应时间: 月度指标
+    features: Optional[List[str]] = None                     # 特征子集
+    test_size: Optional[float] = Field(None, gt=0, lt=1)     # 测试集比例
+    horizon: int = Field(6, ge=1, le=24)                     # 预测未来月数（仅响应时间预测）
+    models: Optional[List[str]] = None                       # 参与对比的模型子集
+    targets: Optional[List[str]] = None                      # 多目标 Fork 预测的目标列列表
+    mode: Optional[str] = None                               # Fork: 估计器模式 auto / standard / scalable
+    selection_sample_size: Optional[int] = Field(None, ge=100)  # Fork: 模型选择用的分层子样本行数
+    series_features: bool = False                           # Fork: 追加月度序列/活跃时段派生的时序特征
+
+    def fork_params(self) -> dict:
+        return validate_fork_params(
+            self.csv_path,
+            target_column=self.target_column or "technical_fork",
+            features=self.features,
+            test_size=self.test_size if self.test_size is not None else 0.3,
+            models=self.models,
+            mode=self.mode or "auto",
+            selection_sample_size=self.selection_sample_size,
+            series_features=self.series_features
+        )
+
+    def multi_fork_params(self) -> dict:
+        return validate_multi_target_params(
+            self.csv_path,
+            targets=self.targets,
+            features=self.features,
+            test_size=self.test_size if self.test_size is not None else 0.3,
+            models=self.models,
+            mode=self.mode or "auto",
+            selection_sample_size=self.selection_sample_size,
+            series_features=self.series_features
+        )
+
+    def response_time_params(self) -> dict:
+        return validate_response_time_params(
+            self.csv_path,
+            target_column=self.target_column or "change_request_response_time",
+            features=self.features,
+            test_size=self.test_size if self.test_size is not None else 0.2,
+            horizon=self.horizon,
+            models=self.models
+        )
 
 
 async def convert_csv_to_json(task_id: str, file_path: str) -> None:
@@ -125,12 +223,100 @@ async def health_check():
     return {"status": "ok"}
 
 
+async def run_job(name: str, func, *args, datasets=None, **kwargs):
+    """
+    在工作线程中、计算资源预算内（job_resources）运行同步计算，不阻塞事件循环
+
+    datasets 为任务读取的数据集路径（用于单任务内存检查），为空时取 func 的 csv_path 参数
+    """
+    if datasets is None:
+        datasets = (kwargs["csv_path"],) if "csv_path" in kwargs else ()
+
+    def run():
+        with job_resources(name, datasets=datasets):
+            return func(*args, **kwargs)
+
+    return await asyncio.to_thread(run)
+
+
 # ==================== 新增的3个预测接口 ====================
 
+def run_fork_full_job(task_id: str, csv_path: str, params: dict):
+    """
+    后台任务：预览之后运行全量 Fork 预测，结果写入 tasks[task_id]（通过 /status/{task_id} 查询，
+    通过 /api/tasks/{task_id}/cancel 取消；取消令牌由启动方放入 cancel_tokens）
+    """
+    try:
+        tasks[task_id]["status"] = "processing"
+        tasks[task_id]["message"] = "等待计算资源..."
+        cancel_tokens[task_id].check()
+        with job_resources("fork_prediction", datasets=(csv_path,)):
+            tasks[task_id]["message"] = "全量训练中..."
+            result = run_fork_prediction(
+                csv_path=csv_path,
+                cancel_token=cancel_tokens[task_id],
+                **params
+            )
+        tasks[task_id]["status"] = "completed"
+        tasks[task_id]["progress"] = 100
+        tasks[task_id]["message"] = "全量预测完成"
+        tasks[task_id]["result"] = result
+    except JobCancelled as e:
+        tasks[task_id]["status"] = e.reason
+        tasks[task_id]["message"] = str(e)
+    except Exception as e:
+        tasks[task_id]["status"] = "failed"
+        tasks[task_id]["message"] = str(e)
+    finally:
+        cancel_tokens.pop(task_id, None)
+
+
+@app.post("/api/tasks/{task_id}/cancel")
+async def api_cancel_task(task_id: str):
+    """
+    取消后台任务（Fork 全量任务、响应时间预测任务），任务在下一个检查点停止，
+    之后状态变为 cancelled
+
+    返回:
+        {
+            "success": true,
+            "message": "已请求取消"
+        }
+    """
+    token = cancel_tokens.get(task_id)
+    if token is None:
+        if task_id not in tasks and task_id != response_time_task_status["task_id"]:
+            raise HTTPException(status_code=404, detail="Task not found")
+        return {
+            "success": False,
+            "message": "任务不在运行中，无法取消"
+        }
+
+    token.cancel()
+    if task_id in tasks:
+        tasks[task_id]["message"] = "正在取消..."
+    if task_id == response_time_task_status["task_id"]:
+        response_time_task_status["message"] = "正在取消..."
+    return {
+        "success": True,
+        "message": "已请求取消"
+    }
+
+
 @app.post("/api/predict/fork")
-async def api_predict_fork():
+async def api_predict_fork(
+    background_tasks: BackgroundTasks,
+    request: Optional[PredictionRequest] = None,
+    timeout: Optional[float] = Query(None, gt=0, description="超时时间（秒），超时后中止训练"),
+    preview: bool = Query(False, description="预览模式：在分层抽样的子集上快速训练，返回近似结果"),
+    full_in_background: bool = Query(False, description="预览模式下同时在后台启动全量任务")
+):
     """
-    预测 Fork 数量（使用 technical_fork 列）
+    预测 Fork 数量（默认使用 technical_fork 列，可通过请求体指定目标列、特征、测试集比例和模型）
+
+    预览模式（preview=true）只用按目标分层抽取的最多 PREVIEW_ROWS 行训练，metadata.preview 标注样本规模；
+    同时传 full_in_background=true 时后台启动全量任务，返回的 full_task_id 可通过 /status/{task_id}
+    轮询，完成后其 result 即为替换预览的全量结果
     返回:
         {
             "success": true,
@@ -145,14 +331,44 @@ async def api_predict_fork():
             }
         }
     """
+    request = request or PredictionRequest()
+
+    def run():
+        # 在线程池中运行，排队等待计算资源时不阻塞事件循环
+        with job_resources("fork_prediction", datasets=(request.csv_path,)):
+            return run_fork_prediction(
+                csv_path=request.csv_path,
+                cancel_token=CancellationToken(timeout) if timeout else None,
+                preview=preview,
+                **params
+            )
+
     try:
-        result = run_fork_prediction(
-        csv_path="backendData/top_300_metrics.csv"
-    )
-        return {
+        # 参数校验会加载数据集，同样放到工作线程中
+        params = await asyncio.to_thread(request.fork_params)
+        result = await asyncio.to_thread(run)
+        response = {
             "success": True,
             "data": result
         }
+        if preview and full_in_background:
+            task_id = str(uuid.uuid4())
+            tasks[task_id] = {
+                "status": "pending",
+                "progress": 0,
+                "message": "Waiting to start",
+                "result": None
+            }
+            cancel_tokens[task_id] = CancellationToken(timeout)
+            background_tasks.add_task(run_fork_full_job, task_id, request.csv_path, params)
+            response["full_task_id"] = task_id
+        return response
+    except JobCancelled as e:
+        raise HTTPException(status_code=504, detail=f"Fork预测已中止: {str(e)}")
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -160,10 +376,79 @@ async def api_predict_fork():
         )
 
 
+@app.post("/api/predict/fork/multi")
+async def api_predict_fork_multi(
+    request: Optional[PredictionRequest] = None,
+    timeout: Optional[float] = Query(None, gt=0, description="超时时间（秒），超时后中止训练")
+):
+    """
+    多目标 Fork 类回归预测：technical_fork、stars、attention、openrank、participants
+    共享一次特征预处理，所有目标的候选模型并行训练，返回一份合并报告
+
+    请求体（可选）: PredictionRequest，targets 指定目标列列表，features / test_size / models 同 Fork 预测
+
+    返回:
+        {
+            "success": true,
+            "data": {
+                "metadata": {...},
+                "summary": [...],
+                "targets": {"stars": {...}, ...}
+            }
+        }
+    """
+    request = request or PredictionRequest()
+
+    def run():
+        with job_resources("fork_prediction_multi", datasets=(request.csv_path,)):
+            return run_multi_target_fork_prediction(
+                csv_path=request.csv_path,
+                cancel_token=CancellationToken(timeout) if timeout else None,
+                **params
+            )
+
+    try:
+        params = await asyncio.to_thread(request.multi_fork_params)
+        result = await asyncio.to_thread(run)
+        return {
+            "success": True,
+            "data": result
+        }
+    except JobCancelled as e:
+        raise HTTPException(status_code=504, detail=f"多目标预测已中止: {str(e)}")
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"多目标预测失败: {str(e)}"
+        )
+
+
 @app.get("/api/statistics/indicators")
-async def api_get_indicators_stats():
+async def api_get_indicators_stats(
+    bins: int = Query(30, ge=1, le=200, description="直方图分箱数"),
+    clip_quantile: float = Query(0.95, gt=0, le=1, description="直方图截断分位数"),
+    kde: bool = Query(False, description="是否返回核密度估计采样点"),
+    kde_points: int = Query(64, ge=8, le=512, description="核密度采样点数"),
+    include_projects_detail: bool = Query(False, description="是否附带全部项目明细（建议改用 /api/statistics/projects 分页获取）"),
+    csv_path: str = Depends(dataset_path)
+):
+    """
+    获取指标统计信息，distributions 字段为服务端预计算的直方图分箱、箱线图与核密度
+    """
     try:
-        result = get_indicator_statistics()
+        result = await run_job(
+            "indicator_statistics", get_indicator_statistics,
+            csv_path=csv_path,
+            histogram_bins=bins,
+            clip_quantile=clip_quantile,
+            include_kde=kde,
+            kde_points=kde_points,
+            include_projects_detail=include_projects_detail
+        )
         return {
             "success": True,
             "data": result
@@ -175,71 +460,965 @@ async def api_get_indicators_stats():
         )
 
 
+@app.get("/api/statistics/projects")
+async def api_get_projects_detail(
+    fields: Optional[str] = Query(None, description="逗号分隔的字段列表，默认6个核心指标"),
+    filter: Optional[List[str]] = Query(None, description="过滤条件，可重复，例如 participants>100"),
+    sort_by: Optional[str] = Query(None, description="排序字段"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor"),
+    limit: int = Query(50, ge=1, le=1000),
+    csv_path: str = Depends(dataset_path)
+):
+    """
+    分页获取项目明细（游标分页 + 字段投影 + 排序 + 过滤）
+
+    返回:
+        {
+            "success": true,
+            "data": {
+                "metadata": {...},
+                "items": [...],
+                "next_cursor": "..."
+            }
+        }
+    """
+    try:
+        result = await run_job(
+            "projects_detail", get_projects_detail,
+            csv_path=csv_path,
+            fields=[f.strip() for f in fields.split(",") if f.strip()] if fields else None,
+            filters=filter,
+            sort_by=sort_by,
+            descending=(order == "desc"),
+            cursor=cursor,
+            limit=limit
+        )
+        return {
+            "success": True,
+            "data": result
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"获取项目明细失败: {str(e)}"
+        )
+
+
+# ==================== 数据集注册表接口 ====================
+
+class DatasetRegisterRequest(BaseModel):
+    dataset_id: str                            # 数据集 ID，例如 top_10k_metrics、snapshot_2024_06
+    csv_path: str                              # CSV 文件路径（必须位于数据目录下，相对路径按数据目录解析）
+
+
+@app.get("/api/datasets")
+def api_list_datasets():
+    """
+    列出可选的数据集（ID、路径、内容版本、是否已加载、内存占用）及数据集内存预算使用情况；
+    其他接口通过查询参数 dataset=<ID>（GET）或请求体字段 dataset（POST）选择数据集
+
+    配置（环境变量）:
+        OPENSODA_DATASET_CACHE_MB: 已加载数据集的内存预算（默认 1024），超出后淘汰最久未使用的数据集
+        OPENSODA_DATASETS_CONFIG: 数据集注册配置文件（JSON: {"数据集ID": "CSV路径"}），
+                                  未配置时自动发现默认数据集目录下的所有 CSV
+    """
+    try:
+        return {
+            "success": True,
+            "data": list_datasets()
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"获取数据集列表失败: {str(e)}"
+        )
+
+
+@app.post("/api/datasets/register")
+async def api_register_dataset(request: DatasetRegisterRequest):
+    """运行时注册数据集（只允许数据目录下的 CSV；不读取文件内容，首次被接口使用时才加载）"""
+    try:
+        return {
+            "success": True,
+            "data": register_dataset(request.dataset_id, request.csv_path)
+        }
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"注册数据集失败: {str(e)}"
+        )
+
+
+@app.get("/api/datasets/diff")
+async def api_diff_datasets(
+    base: str = Query(..., description="基准快照的数据集 ID（较早）"),
+    compare: str = Query(..., description="对比快照的数据集 ID（较新）"),
+    columns: Optional[str] = Query(None, description="逗号分隔的对比列，默认两边共有的全部数值列"),
+    threshold: float = Query(0.1, ge=0, description="变化阈值（默认相对变化 10%）"),
+    absolute: bool = Query(False, description="阈值是否按绝对变化量"),
+    rank_by: str = Query(DEFAULT_RANK_COLUMN, description="排名依据的列"),
+    min_rank_change: int = Query(1, ge=1, description="最小名次变化"),
+    limit: int = Query(100, ge=1, le=10000)
+):
+    """
+    对比两个数据集快照（"上月以来有什么变化"）：按 projectname/projectname2 向量化对齐后，
+    返回超过阈值的逐项目逐列变化、排名变化以及新进/退出的项目；对齐结果按 (基准版本, 对比版本) 缓存
+
+    返回:
+        {
+            "success": true,
+            "data": {
+                "metadata": {...},
+                "summary": {"by_column": {...}},
+                "changes": [...],
+                "rank_movements": [...],
+                "entered": [...],
+                "exited": [...]
+            }
+        }
+    """
+    try:
+        base_path, compare_path = resolve_dataset(base), resolve_dataset(compare)
+        result = await run_job(
+            "snapshot_diff", diff_snapshots, base_path, compare_path,
+            datasets=(base_path, compare_path),
+            columns=[c.strip() for c in columns.split(",") if c.strip()] if columns else None,
+            threshold=threshold,
+            absolute=absolute,
+            rank_by=rank_by,
+            min_rank_change=min_rank_change,
+            limit=limit
+        )
+        result["metadata"]["base"]["dataset"] = base
+        result["metadata"]["compare"]["dataset"] = compare
+        return {
+            "success": True,
+            "data": result
+        }
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"数据集对比失败: {str(e)}"
+        )
+
+
+# ==================== 数据集查询接口（替代前端静态 converted_data.json） ====================
+
+@app.get("/api/dataset/columns")
+async def api_get_dataset_columns(csv_path: str = Depends(dataset_path)):
+    """获取数据集的列名与类型（number / text / list / dict）"""
+    try:
+        return {
+            "success": True,
+            "data": await run_job("dataset_columns", get_dataset_columns, csv_path=csv_path)
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"获取数据集列信息失败: {str(e)}"
+        )
+
+
+@app.get("/api/dataset/query")
+async def api_query_dataset(
+    columns: Optional[str] = Query(None, description="逗号分隔的返回列，默认全部列"),
+    filter: Optional[List[str]] = Query(None, description="过滤条件，可重复，例如 activity>50"),
+    sort_by: Optional[str] = Query(None, description="排序列"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    limit: int = Query(100, ge=1, le=10000),
+    offset: int = Query(0, ge=0),
+    agg: Optional[List[str]] = Query(None, description="聚合表达式，可重复，例如 activity:mean"),
+    group_by: Optional[str] = Query(None, description="聚合分组列"),
+    csv_path: str = Depends(dataset_path)
+):
+    """
+    查询已解析的数据集，返回已类型化的 JSON（列表/字典列已解析，无需前端 parseMaybeJSON）
+
+    返回:
+        {
+            "success": true,
+            "data": {
+                "metadata": {...},
+                "rows": [...]            # 或 "aggregations": {...} / "groups": [...]
+            }
+        }
+    """
+    try:
+        result = await run_job(
+            "dataset_query", query_dataset,
+            csv_path=csv_path,
+            columns=[c.strip() for c in columns.split(",") if c.strip()] if columns else None,
+            filters=filter,
+            sort_by=sort_by,
+            descending=(order == "desc"),
+            limit=limit,
+            offset=offset,
+            aggregations=agg,
+            group_by=group_by
+        )
+        return {
+            "success": True,
+            "data": result
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"数据集查询失败: {str(e)}"
+        )
+
+
+# ==================== 看板预计算聚合接口 ====================
+
+@app.get("/api/dashboard")
+async def api_get_dashboard_all(top_n: int = Query(20, ge=1, le=1000), csv_path: str = Depends(dataset_path)):
+    """一次性获取全部看板页面的预计算聚合数据"""
+    try:
+        return {
+            "success": True,
+            "data": await run_job("dashboard", get_dashboard_summary, csv_path=csv_path, top_n=top_n)
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"获取看板数据失败: {str(e)}"
+        )
+
+
+@app.get("/api/dashboard/{section}")
+async def api_get_dashboard_section(section: str, top_n: int = Query(20, ge=1, le=1000),
+                                    csv_path: str = Depends(dataset_path)):
+    """
+    获取单个看板页面的预计算聚合数据
+
+    section: activity | code_changes | attention | contributors | impact | issue_lifecycle
+
+    返回:
+        {
+            "success": true,
+            "data": {
+                "section": "activity",
+                "dataset_version": "...",
+                "summary": {...},
+                "rankings": {...},
+                "distributions": {...}
+            }
+        }
+    """
+    try:
+        return {
+            "success": True,
+            "data": await run_job("dashboard", get_dashboard_summary, section, csv_path=csv_path, top_n=top_n)
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"获取看板数据失败: {str(e)}"
+        )
+
+
+# ==================== 活跃时段（按周小时）分析接口 ====================
+
+@app.get("/api/activity/heatmap")
+async def api_get_activity_heatmap(normalize: bool = Query(False, description="是否按项目归一化后取均值"),
+                                   csv_path: str = Depends(dataset_path)):
+    """跨项目聚合的 7×24 活跃时段热力图"""
+    try:
+        return {
+            "success": True,
+            "data": await run_job("activity", get_activity_heatmap, csv_path=csv_path, normalize=normalize)
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"获取活跃时段热力图失败: {str(e)}"
+        )
+
+
+@app.get("/api/activity/profile")
+async def api_get_activity_profile(project: str = Query(..., description="owner/repo 或仓库名"),
+                                   csv_path: str = Depends(dataset_path)):
+    """单个项目的活跃时段画像"""
+    try:
+        return {
+            "success": True,
+            "data": await run_job("activity", get_activity_profile, project, csv_path=csv_path)
+        }
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"获取活跃时段画像失败: {str(e)}"
+        )
+
+
+@app.get("/api/activity/similar")
+async def api_find_similar_activity(
+    project: str = Query(..., description="owner/repo 或仓库名"),
+    top_k: int = Query(10, ge=1, le=100),
+    csv_path: str = Depends(dataset_path)
+):
+    """查找工作时间模式相近的项目（余弦相似度）"""
+    try:
+        return {
+            "success": True,
+            "data": await run_job("activity", find_similar_activity_projects, project,
+                                  top_k=top_k, csv_path=csv_path)
+        }
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"查找相似项目失败: {str(e)}"
+        )
+
+
+# ==================== 贡献者-项目关系图接口 ====================
+
+@app.get("/api/contributors/summary")
+async def api_get_contributor_graph_summary(top_k: int = Query(20, ge=1, le=500),
+                                            csv_path: str = Depends(dataset_path)):
+    """贡献者图概况及参与项目最多的贡献者"""
+    try:
+        return {
+            "success": True,
+            "data": await run_job("contributor_graph", get_contributor_graph_summary,
+                                  csv_path=csv_path, top_k=top_k)
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"获取贡献者图概况失败: {str(e)}"
+        )
+
+
+@app.get("/api/contributors/projects")
+async def api_get_contributor_projects(login: str = Query(..., description="GitHub 登录名"),
+                                       csv_path: str = Depends(dataset_path)):
+    """单个贡献者参与的项目"""
+    try:
+        return {
+            "success": True,
+            "data": await run_job("contributor_graph", get_contributor_projects, login, csv_path=csv_path)
+        }
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"获取贡献者项目失败: {str(e)}"
+        )
+
+
+@app.get("/api/contributors/shared")
+async def api_find_projects_sharing_contributors(
+    project: str = Query(..., description="owner/repo 或仓库名"),
+    top_k: int = Query(10, ge=1, le=100),
+    csv_path: str = Depends(dataset_path)
+):
+    """与指定项目共享贡献者最多的项目"""
+    try:
+        return {
+            "success": True,
+            "data": await run_job("contributor_graph", find_projects_sharing_contributors, project,
+                                  top_k=top_k, csv_path=csv_path)
+        }
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"查找共享贡献者项目失败: {str(e)}"
+        )
+
+
+# ==================== 相似项目检索接口 ====================
+
+@app.get("/api/similar/projects")
+async def api_find_similar_projects(
+    project: str = Query(..., description="owner/repo 或仓库名"),
+    top_k: int = Query(10, ge=1, le=100),
+    metric: str = Query("euclidean", pattern="^(euclidean|cosine)$"),
+    csv_path: str = Depends(dataset_path)
+):
+    """按标准化后的指标画像查找相似项目"""
+    try:
+        return {
+            "success": True,
+            "data": await run_job("similar_projects", find_similar_projects, project,
+                                  top_k=top_k, metric=metric, csv_path=csv_path)
+        }
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"查找相似项目失败: {str(e)}"
+        )
+
+
+@app.get("/api/similar/projects/all")
+async def api_get_all_similar_projects(
+    top_k: int = Query(5, ge=1, le=50),
+    metric: str = Query("euclidean", pattern="^(euclidean|cosine)$"),
+    csv_path: str = Depends(dataset_path)
+):
+    """批量模式：返回每个项目的相似项目"""
+    try:
+        return {
+            "success": True,
+            "data": await run_job("similar_projects_all", get_all_similar_projects,
+                                  top_k=top_k, metric=metric, csv_path=csv_path)
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"批量查找相似项目失败: {str(e)}"
+        )
+
+
+# ==================== 项目分群接口 ====================
+
+@app.get("/api/clusters")
+async def api_get_project_clusters(
+    k: Optional[int] = Query(None, ge=2, le=50, description="簇数，为空时按轮廓系数自动选择"),
+    include_assignments: bool = Query(False, description="是否返回每个项目的分配结果"),
+    csv_path: str = Depends(dataset_path)
+):
+    """获取项目分群结果（按数据集版本持久化，首次请求时计算）"""
+    try:
+        return {
+            "success": True,
+            "data": await run_job("project_clustering", get_project_clusters,
+                                  csv_path=csv_path, n_clusters=k, include_assignments=include_assignments)
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"获取项目分群失败: {str(e)}"
+        )
+
+
+@app.get("/api/clusters/project")
+async def api_get_project_cluster(
+    project: str = Query(..., description="owner/repo 或仓库名"),
+    k: Optional[int] = Query(None, ge=2, le=50),
+    csv_path: str = Depends(dataset_path)
+):
+    """查询单个项目所属的簇"""
+    try:
+        return {
+            "success": True,
+            "data": await run_job("project_clustering", get_project_cluster, project, csv_path=csv_path, n_clusters=k)
+        }
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"查询项目分群失败: {str(e)}"
+        )
+
+
+@app.post("/api/clusters/refresh")
+async def api_refresh_project_clusters(k: Optional[int] = Query(None, ge=2, le=50),
+                                       csv_path: str = Depends(dataset_path)):
+    """忽略已持久化结果，重新运行分群（数据刷新后调用）"""
+    try:
+        result = await run_job("project_clustering", run_project_clustering, csv_path=csv_path, n_clusters=k, force=True)
+        return {
+            "success": True,
+            "data": result["metadata"]
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"重新分群失败: {str(e)}"
+        )
+
+
+# ==================== 月度时延异常检测接口 ====================
+
+@app.get("/api/anomalies")
+async def api_detect_monthly_anomalies(
+    window: int = Query(6, ge=3, le=24, description="基线窗口长度（月）"),
+    threshold: float = Query(3.5, gt=0, description="稳健 Z 分数阈值"),
+    direction: str = Query("up", pattern="^(up|down|both)$"),
+    metric: Optional[str] = Query(None, description="只看某个月度指标"),
+    project: Optional[str] = Query(None, description="只看某个项目"),
+    since: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$", description="起始月份 YYYY-MM"),
+    limit: int = Query(100, ge=1, le=5000),
+    csv_path: str = Depends(dataset_path)
+):
+    """
+    月度时延指标异常检测（滚动中位数/MAD 基线，全部项目与指标一次向量化计算）
+
+    返回:
+        {
+            "success": true,
+            "data": {
+                "metadata": {...},
+                "summary": {"by_metric": {...}, "by_month": {...}},
+                "anomalies": [...]
+            }
+        }
+    """
+    try:
+        result = await run_job(
+            "monthly_anomalies", detect_monthly_anomalies,
+            csv_path=csv_path,
+            window=window,
+            threshold=threshold,
+            direction=direction,
+            metric=metric,
+            project=project,
+            since=since,
+            limit=limit
+        )
+        return {
+            "success": True,
+            "data": result
+        }
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"异常检测失败: {str(e)}"
+        )
+
+
+# ==================== 月度基线预测接口 ====================
+
+@app.get("/api/forecast/baselines")
+async def api_get_baseline_forecasts(
+    metric: str = Query("change_request_response_time", description="月度指标"),
+    horizon: int = Query(6, ge=1, le=24, description="预测未来月数"),
+    tolerance: float = Query(0.05, ge=0, le=1, description="模型选择的误差容差（相对最优 MAE）"),
+    project: Optional[str] = Query(None, description="只看某个项目"),
+    limit: int = Query(50, ge=1, le=5000),
+    csv_path: str = Depends(dataset_path)
+):
+    """
+    闭式基线模型（朴素/季节性朴素/移动平均/漂移/指数平滑）对所有项目一次性回测与预测，
+    在误差容差内为每个项目选最便宜的模型，基线误差仍偏大的项目以 needs_xgboost 建议交给 XGBoost
+
+    返回:
+        {
+            "success": true,
+            "data": {
+                "metadata": {...},
+                "metric_selection": {...},
+                "model_summary": {...},
+                "projects": [...]
+            }
+        }
+    """
+    try:
+        result = await run_job(
+            "baseline_forecast", get_baseline_forecasts,
+            csv_path=csv_path,
+            metric=metric,
+            horizon=horizon,
+            tolerance=tolerance,
+            project=project,
+            limit=limit
+        )
+        return {
+            "success": True,
+            "data": result
+        }
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"基线预测失败: {str(e)}"
+        )
+
+
+# ==================== 计算资源预算接口 ====================
+
+@app.get("/api/system/resources")
+async def api_get_resource_status():
+    """
+    查询后端计算资源预算（CPU 线程、并发任务数、单任务内存上限）及运行中的任务
+
+    配置（环境变量）:
+        OPENSODA_CPU_BUDGET: CPU 线程总数（默认为进程可用的 CPU 数）
+        OPENSODA_MAX_CONCURRENT_JOBS: 同时运行的计算任务上限（默认 2）
+        OPENSODA_JOB_MEMORY_MB: 单任务内存上限（默认不限制）
+    """
+    return {
+        "success": True,
+        "data": get_resource_status()
+    }
+
+
+# ==================== 时序派生特征接口 ====================
+
+@app.get("/api/features/series")
+async def api_get_series_features(
+    project: Optional[str] = Query(None, description="项目名（owner/repo 或 repo），为空时返回各特征的分布概况"),
+    csv_path: str = Depends(dataset_path)
+):
+    """
+    由月度序列（斜率、近期/历史比、波动率、覆盖率）与按周小时活跃向量批量派生的时序特征
+    （Fork 预测请求体设置 series_features=true 时这些特征会加入候选特征）
+
+    返回:
+        {
+            "success": true,
+            "data": {"total_projects": 300, "recent_months": 6, "features": [{"feature", "coverage", "mean", "std", "min", "max"}, ...]}
+                    或 {"project": "owner/repo", "features": {特征名: 值}}
+        }
+    """
+    try:
+        return {
+            "success": True,
+            "data": await run_job("series_features", get_series_features, csv_path=csv_path, project=project)
+        }
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"获取时序特征失败: {str(e)}"
+        )
+
+
+@app.get("/api/features/store")
+async def api_list_feature_sets(csv_path: str = Depends(dataset_path)):
+    """
+    列出当前数据集版本已物化到特征存储的特征集（内存映射 .npy 文件的列名、形状、大小）
+    """
+    try:
+        return {
+            "success": True,
+            "data": await run_job("feature_store", list_feature_sets, csv_path=csv_path)
+        }
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"查询特征存储失败: {str(e)}"
+        )
+
+
+# ==================== 模型注册表与增量更新接口 ====================
+
+class ModelUpdateRequest(DatasetSelection):
+    kind: str                                  # fork_sgd / response_time_xgb
+    target_column: str                         # 模型的目标列
+    force_full: bool = False                   # 强制全量重训
+
+
+@app.get("/api/models")
+def api_list_models(csv_path: str = Depends(dataset_path)):
+    """
+    列出模型注册表中的模型、当前版本和历史版本（训练方式、数据集版本、评估指标、漂移检查结果）
+    """
+    try:
+        return {
+            "success": True,
+            "data": list_models(csv_path)
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"查询模型注册表失败: {str(e)}"
+        )
+
+
+@app.post("/api/models/update")
+async def api_update_model(
+    request: ModelUpdateRequest,
+    timeout: Optional[float] = Query(None, gt=0, description="超时时间（秒），超时后中止训练")
+):
+    """
+    新月份数据到来后更新注册表中的模型：没有新数据时不更新；新数据上检测到漂移
+    或连续增量更新达到上限时全量重训；否则只在新数据上增量更新
+    （SGD 线性模型 partial_fit / XGBoost 在旧模型上追加树）
+
+    返回:
+        {
+            "success": true,
+            "data": {"kind", "target", "action": "full|incremental|unchanged", "reason", "version", "drift", "metrics"}
+        }
+    """
+    def run():
+        with job_resources("model_update", datasets=(request.csv_path,)):
+            return update_model(
+                request.kind, request.target_column, request.csv_path,
+                force_full=request.force_full,
+                cancel_token=CancellationToken(timeout) if timeout else None
+            )
+
+    try:
+        result = await asyncio.to_thread(run)
+        return {
+            "success": True,
+            "data": result
+        }
+    except JobCancelled as e:
+        raise HTTPException(status_code=504, detail=f"模型更新已中止: {str(e)}")
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"模型更新失败: {str(e)}"
+        )
+
+
 # ==================== 响应时间预测接口（支持后台任务和轮询） ====================
 
-def run_response_time_prediction():
-    """后台任务：运行响应时间预测"""
-    global response_time_task_status
+def run_response_time_prediction(task_id: str, csv_path: str = DEFAULT_CSV_PATH, params: dict = None):
+    """后台任务：运行响应时间预测（可通过 cancel_tokens[task_id] 取消或超时中止）"""
+    # 只写本任务启动时的状态字典，即使之后状态被重置也不会覆盖其他任务
+    status = response_time_task_status
+    cancel_token = cancel_tokens[task_id]
 
     def progress_callback(progress, message):
         """进度回调函数"""
-        response_time_task_status["progress"] = progress
-        response_time_task_status["message"] = message
+        status["progress"] = progress
+        status["message"] = message
+
+    def partial_callback(section, data):
+        """阶段性结果回调：整体替换字典，轮询接口读到的总是完整的一份"""
+        status["partial_result"] = {
+            **status["partial_result"],
+            section: data
+        }
 
     try:
-        response_time_task_status["status"] = "running"
-        response_time_task_status["progress"] = 0
-        response_time_task_status["message"] = "开始预测..."
-        response_time_task_status["error"] = None
+        status["status"] = "running"
+        status["progress"] = 0
+        status["message"] = "等待计算资源..."
+        status["error"] = None
+
+        # 调用预测函数（先申请计算资源槽位，并发任务过多时在此排队）
+        with job_resources("response_time", datasets=(csv_path,)):
+            status["message"] = "开始预测..."
+            result = predict_response_time(
+                csv_path=csv_path,
+                progress_callback=progress_callback,
+                partial_callback=partial_callback,
+                cancel_token=cancel_token,
+                **(params or {})
+            )
 
-        # 调用预测函数
-        result = predict_response_time(progress_callback=progress_callback)
+        status["status"] = "completed"
+        status["progress"] = 100
+        status["message"] = "预测完成！"
+        status["result"] = result
 
-        response_time_task_status["status"] = "completed"
-        response_time_task_status["progress"] = 100
-        response_time_task_status["message"] = "预测完成！"
-        response_time_task_status["result"] = result
+    except JobCancelled as e:
+        # 已发布的阶段性结果保留，便于查看中止前的进度
+        status["status"] = e.reason
+        status["error"] = str(e)
+        status["message"] = (
+            "任务已取消" if e.reason == CANCELLED else f"任务超时（{cancel_token.timeout} 秒）"
+        )
 
     except Exception as e:
-        response_time_task_status["status"] = "error"
-        response_time_task_status["error"] = str(e)
-        response_time_task_status["message"] = f"预测失败: {str(e)}"
+        status["status"] = "error"
+        status["error"] = str(e)
+        status["message"] = f"预测失败: {str(e)}"
+    finally:
+        cancel_tokens.pop(task_id, None)
 
 
 @app.post("/api/predict/response-time/start")
-async def api_start_response_time_prediction(background_tasks: BackgroundTasks):
+async def api_start_response_time_prediction(
+    background_tasks: BackgroundTasks,
+    request: Optional[PredictionRequest] = None,
+    timeout: Optional[float] = Query(None, gt=0, description="超时时间（秒），超时后任务状态为 timed_out")
+):
     """
     启动响应时间预测（后台任务）
 
+    请求体（可选）: PredictionRequest，可指定目标月度指标、特征子集、测试集比例、预测月数和对比模型；
+    同一参数组合已计算过时任务会立即完成并返回缓存结果
+
     返回:
         {
             "success": true,
             "message": "任务已启动"
         }
     """
-    global response_time_task_status
+    # 参数在启动前校验（会加载数据集，放到工作线程中），不合法时直接返回 400
+    request = request or PredictionRequest()
+    try:
+        params = await asyncio.to_thread(request.response_time_params)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
+    # 校验之后再检查运行状态：检查与启动之间没有 await，并发的启动请求不会同时通过
     if response_time_task_status["status"] == "running":
         return {
             "success": False,
-            "message": "任务正在运行中，请稍后再试"
+            "message": "任务正在运行中，请稍后再试",
+            "task_id": response_time_task_status["task_id"]
         }
 
-    # 重置任务状态
+    task_id = start_response_time_job(background_tasks, request.csv_path, params, timeout)
+
+    return {
+        "success": True,
+        "message": "任务已启动",
+        "task_id": task_id
+    }
+
+
+def start_response_time_job(background_tasks: BackgroundTasks, csv_path: str, params: dict,
+                            timeout: Optional[float] = None) -> str:
+    """
+    重置任务状态并添加后台任务，返回任务 ID（调用方需先确认没有正在运行的任务）
+
+    状态立即置为 running（而不是等后台任务真正开始），避免任务开始前的第二次启动请求通过检查
+    """
+    global response_time_task_status
+
+    task_id = str(uuid.uuid4())
+    cancel_tokens[task_id] = CancellationToken(timeout)
     response_time_task_status = {
-        "status": "idle",
+        "status": "running",
         "progress": 0,
-        "message": "",
+        "message": "等待启动...",
         "result": None,
-        "error": None
+        "partial_result": {},
+        "error": None,
+        "task_id": task_id
     }
 
-    # 添加后台任务
-    background_tasks.add_task(run_response_time_prediction)
+    background_tasks.add_task(run_response_time_prediction, task_id, csv_path, params)
+    return task_id
+
+
+@app.post("/api/predict/response-time/preview")
+async def api_preview_response_time_prediction(
+    background_tasks: BackgroundTasks,
+    request: Optional[PredictionRequest] = None,
+    full_in_background: bool = Query(False, description="同时在后台启动全量任务"),
+    timeout: Optional[float] = Query(None, gt=0, description="全量任务的超时时间（秒）")
+):
+    """
+    响应时间预测的快速预览（同步返回）：只用 PREVIEW_PROJECTS 个项目的完整月度序列训练，
+    不做交叉验证、减少树模型的树数量，返回近似指标与预测（metadata.preview 标注样本规模）
+
+    full_in_background=true 时同时启动全量后台任务（与 /start 相同），完成后通过 /result 获取
+    替换预览的全量结果；已有任务在运行时不再启动（full_job 为 "already_running"）
+
+    返回:
+        {
+            "success": true,
+            "data": {"metadata": {..., "preview": {...}}, "model_evaluation": {...}, ...},
+            "full_job": "started" | "already_running" | null,
+            "full_task_id": "..." | null     # 全量任务 ID（可通过 /api/tasks/{task_id}/cancel 取消）
+        }
+    """
+    request = request or PredictionRequest()
+
+    def run():
+        with job_resources("response_time_preview", datasets=(request.csv_path,)):
+            return predict_response_time(csv_path=request.csv_path, preview=True, **params)
+
+    try:
+        params = await asyncio.to_thread(request.response_time_params)
+        result = await asyncio.to_thread(run)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"响应时间预览失败: {str(e)}"
+        )
+
+    full_job, full_task_id = None, None
+    if full_in_background:
+        if response_time_task_status["status"] == "running":
+            full_job = "already_running"
+            full_task_id = response_time_task_status["task_id"]
+        else:
+            full_task_id = start_response_time_job(background_tasks, request.csv_path, params, timeout)
+            full_job = "started"
 
     return {
         "success": True,
-        "message": "任务已启动"
+        "data": result,
+        "full_job": full_job,
+        "full_task_id": full_task_id
+    }
+
+
+@app.post("/api/predict/response-time/cancel")
+async def api_cancel_response_time_prediction():
+    """
+    取消正在运行的响应时间预测任务
+
+    任务会在下一个检查点（阶段之间、交叉验证每折之前、XGBoost 每轮提升之后）停止，
+    之后状态变为 cancelled
+
+    返回:
+        {
+            "success": true,
+            "message": "已请求取消"
+        }
+    """
+    token = cancel_tokens.get(response_time_task_status["task_id"])
+    if response_time_task_status["status"] != "running" or token is None:
+        return {
+            "success": False,
+            "message": f"没有正在运行的任务，当前状态: {response_time_task_status['status']}"
+        }
+
+    token.cancel()
+    response_time_task_status["message"] = "正在取消..."
+    return {
+        "success": True,
+        "message": "已请求取消"
     }
 
 
@@ -252,28 +1431,37 @@ async def api_get_response_time_status():
         {
             "success": true,
             "data": {
-                "status": "idle|running|completed|error",
+                "status": "idle|running|completed|error|cancelled|timed_out",
                 "progress": 0-100,
-                "message": "当前步骤描述"
+                "message": "当前步骤描述",
+                "available_sections": ["metadata", "model_evaluation", ...]  # 已可读取的阶段性结果
             }
         }
     """
     return {
         "success": True,
         "data": {
+            "task_id": response_time_task_status["task_id"],
             "status": response_time_task_status["status"],
             "progress": response_time_task_status["progress"],
             "message": response_time_task_status["message"],
-            "error": response_time_task_status["error"]
+            "error": response_time_task_status["error"],
+            "available_sections": list(response_time_task_status["partial_result"].keys())
         }
     }
 
 
 @app.get("/api/predict/response-time/result")
-async def api_get_response_time_result():
+async def api_get_response_time_result(
+    partial: bool = Query(False, description="任务未完成时返回已可用的阶段性结果")
+):
     """
     获取响应时间预测结果
 
+    任务运行中传 partial=true 可读取已完成的部分：
+        metadata（数据集构建后）→ model_evaluation（主模型拟合后，交叉验证逐折补充）
+        → future_prediction / historical_data_sample（最后）
+
     返回:
         {
             "success": true,
@@ -286,6 +1474,13 @@ async def api_get_response_time_result():
         }
     """
     if response_time_task_status["status"] != "completed":
+        if partial and response_time_task_status["partial_result"]:
+            return {
+                "success": True,
+                "partial": True,
+                "status": response_time_task_status["status"],
+                "data": response_time_task_status["partial_result"]
+            }
         return {
             "success": False,
             "message": f"任务未完成，当前状态: {response_time_task_status['status']}"
@@ -0,0 +1,424 @@
+import os
+import json
+import pickle
+import threading
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from datetime import datetime
+from sklearn.linear_model import SGDRegressor, Ridge
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler, RobustScaler
+from sklearn.metrics import r2_score
+from job_control import check_cancelled
+from cpu_budget import current_job
+from data_loader import load_dataset, get_dataset_version, project_labels
+from fork_prediction import CANDIDATE_FEATURES, validate_fork_params
+from predict_response_time_xgboost import (
+    RESPONSE_TIME_FEATURES, build_prediction_frame, train_xgboost, validate_response_time_params
+)
+
+
+# ==================== 模型注册表配置 ====================
+# fork_sgd：Fork 类目标的线性模型（SGDRegressor，可 partial_fit）
+# response_time_xgb：响应时间类月度指标的 XGBoost 模型（可在已有 booster 上继续提升）
+MODEL_KINDS = ["fork_sgd", "response_time_xgb"]
+
+# 连续增量更新达到该次数后强制全量重训，避免累积偏差
+MAX_INCREMENTAL_UPDATES = 6
+# 漂移判定：新数据上的 R² 比训练时下降超过该值，或目标均值偏移超过该倍数的训练标准差
+DRIFT_R2_DROP = 0.1
+DRIFT_MEAN_SHIFT = 0.5
+# 新数据少于该行数时不计算 R²（样本太少时 R² 不稳定），只看均值偏移
+MIN_DRIFT_SAMPLES = 10
+# 增量更新时 XGBoost 追加的树数量 / SGD 在新数据上的遍历轮数
+XGB_UPDATE_ROUNDS = 50
+PARTIAL_FIT_EPOCHS = 5
+# 每个模型保留的历史版本文件数
+MAX_KEPT_VERSIONS = 5
+# fork_sgd 的 SGD 超参数：Fork 类指标长尾明显，默认 invscaling 学习率不收敛（technical_fork 留出集 R² 为负），
+# 改为从闭式解热启动、以较小的 eta0 自适应学习率微调；eta0 同时是增量 partial_fit 的步长
+FORK_SGD_PARAMS = {"alpha": 1e-4, "learning_rate": "adaptive", "eta0": 1e-3,
+                   "max_iter": 1000, "tol": 1e-4, "random_state": 42}
+# 全量训练后 SGD 在训练集上的 R² 比闭式解低出该值时视为未收敛，改用闭式解系数
+FORK_CLOSED_FORM_TOLERANCE = 0.01
+
+_registry_lock = threading.Lock()
+
+
+def _registry_dir(csv_path: str) -> str:
+    """注册表目录：<数据集目录>/models/（跨数据集版本共享，新月份数据到来时在旧模型上更新）"""
+    path = os.path.join(os.path.dirname(os.path.abspath(csv_path)), "models")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _read_index(registry_dir: str) -> dict:
+    index_path = os.path.join(registry_dir, "registry.json")
+    if not os.path.exists(index_path):
+        return {}
+    with open(index_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_index(registry_dir: str, index: dict):
+    # 先写临时文件再替换，避免进程中断时留下半个索引
+    index_path = os.path.join(registry_dir, "registry.json")
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, index_path)
+
+
+def _model_key(kind: str, target: str) -> str:
+    return f"{kind}:{target}"
+
+
+# ==================== 对外接口 ====================
+def list_models(csv_path: str) -> list:
+    """
+    列出注册表中的所有模型及其当前版本信息
+
+    返回:
+        [{"kind": ..., "target": ..., "current_version": ..., "updates_since_full": ..., "versions": [...]}, ...]
+    """
+    with _registry_lock:
+        index = _read_index(_registry_dir(csv_path))
+    return [
+        {"kind": entry["kind"], "target": entry["target"], "current_version": entry["current_version"],
+         "updates_since_full": entry["updates_since_full"], "versions": entry["versions"]}
+        for entry in index.values()
+    ]
+
+
+def load_model(csv_path: str, kind: str, target: str, version: int = None) -> dict:
+    """
+    读取某个模型版本（默认当前版本）的完整内容：模型、预处理器与训练时的统计量
+
+    不存在时抛出 KeyError
+    """
+    registry_dir = _registry_dir(csv_path)
+    with _registry_lock:
+        entry = _read_index(registry_dir).get(_model_key(kind, target))
+    if entry is None:
+        raise KeyError(f"模型不存在: {kind} / {target}")
+    version = version or entry["current_version"]
+    info = next((v for v in entry["versions"] if v["version"] == version), None)
+    if info is None or not os.path.exists(os.path.join(registry_dir, info["file"])):
+        raise KeyError(f"模型版本不存在: {kind} / {target} v{version}")
+    with open(os.path.join(registry_dir, info["file"]), "rb") as f:
+        return pickle.load(f)
+
+
+def update_model(kind: str, target: str, csv_path: str, force_full: bool = False,
+                 cancel_token=None) -> dict:
+    """
+    用数据集的最新内容更新模型，按需选择增量更新或全量重训
+
+    更新策略:
+        1. 注册表中还没有该模型，或 force_full=True → 全量训练
+        2. 数据集中没有模型未见过的新数据 → 不更新，返回当前版本
+        3. 在新数据上做漂移检查（R² 下降 / 目标均值偏移），或连续增量更新已达
+           MAX_INCREMENTAL_UPDATES 次 → 全量重训
+        4. 否则只用新数据增量更新：
+           fork_sgd 在新行（新项目或指标有变化的项目）上 partial_fit，
+           response_time_xgb 在新增月份的样本上以旧 booster 为起点追加 XGB_UPDATE_ROUNDS 棵树
+
+    参数:
+        kind: 模型类型，MODEL_KINDS 之一
+        target: 目标列（fork_sgd 为 Fork 类目标列，response_time_xgb 为月度响应时间类指标）
+        csv_path: 包含新数据的 CSV 文件路径
+        force_full: 强制全量重训
+        cancel_token: 可选的 job_control.CancellationToken
+
+    返回:
+        {"kind", "target", "action": "full"|"incremental"|"unchanged", "reason", "version", "drift", "metrics"}
+    """
+    if kind not in MODEL_KINDS:
+        raise ValueError(f"不支持的模型类型: {kind}，可选: {', '.join(MODEL_KINDS)}")
+    if kind == "fork_sgd":
+        validate_fork_params(csv_path, target)
+    else:
+        validate_response_time_params(csv_path, target)
+
+    registry_dir = _registry_dir(csv_path)
+    key = _model_key(kind, target)
+    with _registry_lock:
+        entry = _read_index(registry_dir).get(key)
+
+    handler = _FORK_HANDLERS if kind == "fork_sgd" else _RESPONSE_TIME_HANDLERS
+    df = load_dataset(csv_path)
+    check_cancelled(cancel_token)
+
+    drift = None
+    if entry is None or force_full:
+        action, reason = "full", "首次训练" if entry is None else "手动要求全量重训"
+    else:
+        bundle = load_model(csv_path, kind, target)
+        new_data = handler["new_data"](bundle, df, target)
+        if new_data is None:
+            return {"kind": kind, "target": target, "action": "unchanged", "reason": "没有新数据",
+                    "version": entry["current_version"], "drift": None, "metrics": None}
+        drift = handler["drift"](bundle, new_data)
+        if drift["detected"]:
+            action, reason = "full", "检测到数据漂移"
+        elif entry["updates_since_full"] >= MAX_INCREMENTAL_UPDATES:
+            action, reason = "full", f"已连续增量更新 {entry['updates_since_full']} 次，定期全量重训"
+        else:
+            action, reason = "incremental", "增量更新"
+
+    check_cancelled(cancel_token)
+    if action == "full":
+        bundle = handler["full"](df, target, cancel_token)
+    else:
+        bundle = handler["incremental"](bundle, new_data, cancel_token)
+    check_cancelled(cancel_token)
+
+    info = _save_version(registry_dir, key, kind, target, bundle, action, reason, csv_path, drift)
+    return {"kind": kind, "target": target, "action": action, "reason": reason,
+            "version": info["version"], "drift": drift, "metrics": info["metrics"]}
+
+
+def _save_version(registry_dir: str, key: str, kind: str, target: str, bundle: dict,
+                  action: str, reason: str, csv_path: str, drift: dict) -> dict:
+    """保存新版本模型文件并更新索引，超出 MAX_KEPT_VERSIONS 的旧版本文件被删除"""
+    with _registry_lock:
+        index = _read_index(registry_dir)
+        entry = index.get(key) or {"kind": kind, "target": target, "current_version": 0,
+                                   "updates_since_full": 0, "versions": []}
+        version = entry["current_version"] + 1
+        filename = f"{kind}_{target}_v{version}.pkl"
+        with open(os.path.join(registry_dir, filename), "wb") as f:
+            pickle.dump(bundle, f)
+
+        info = {
+            "version": version,
+            "file": filename,
+            "mode": action,
+            "reason": reason,
+            "dataset_version": get_dataset_version(csv_path),
+            "trained_at": datetime.now().isoformat(),
+            "samples": bundle["samples"],
+            "metrics": bundle["metrics"],
+            "drift": drift
+        }
+        entry["versions"].append(info)
+        for old in entry["versions"][:-MAX_KEPT_VERSIONS]:
+            old_path = os.path.join(registry_dir, old["file"])
+            if os.path.exists(old_path):
+                os.remove(old_path)
+        entry["versions"] = entry["versions"][-MAX_KEPT_VERSIONS:]
+        entry["current_version"] = version
+        entry["updates_since_full"] = 0 if action == "full" else entry["updates_since_full"] + 1
+        index[key] = entry
+        _write_index(registry_dir, index)
+    return info
+
+
+def _drift_report(bundle: dict, y_true: np.ndarray, y_pred: np.ndarray) -> dict:
+    """新数据上的漂移指标：当前模型的 R² 相对训练时的下降，以及目标均值相对训练分布的偏移"""
+    baseline_r2 = bundle["metrics"]["r2_test"]
+    r2_new = float(r2_score(y_true, y_pred)) if len(y_true) >= MIN_DRIFT_SAMPLES else None
+    mean_shift = abs(float(np.mean(y_true)) - bundle["target_mean"]) / (bundle["target_std"] + 1e-10)
+    r2_drop = baseline_r2 - r2_new if r2_new is not None else None
+    return {
+        "new_samples": int(len(y_true)),
+        "baseline_r2": round(baseline_r2, 4),
+        "r2_new_data": round(r2_new, 4) if r2_new is not None else None,
+        "mean_shift": round(mean_shift, 4),
+        "detected": bool((r2_drop is not None and r2_drop > DRIFT_R2_DROP) or mean_shift > DRIFT_MEAN_SHIFT)
+    }
+
+
+# ==================== fork_sgd：Fork 类目标的线性模型 ====================
+def _fork_frame(df: pd.DataFrame, target: str, features: list):
+    """数值化特征与目标列，返回 (特征 DataFrame, 目标 Series, 行哈希)，目标缺失的行被丢弃"""
+    y = pd.to_numeric(df[target], errors="coerce")
+    raw = df[features].apply(pd.to_numeric, errors="coerce")
+    valid = y.notna().values
+    # 行哈希覆盖项目全名 owner/repo、全部候选特征与目标（与本模型选用了哪些特征无关）：
+    # 新项目（包括同一 owner 下的新仓库）或指标发生变化的项目都视为新数据
+    if "projectname2" in df.columns:
+        ident = pd.Series(project_labels(df), index=df.index)
+    else:
+        ident = pd.Series(df.index, index=df.index)
+    candidates = df[[f for f in CANDIDATE_FEATURES if f in df.columns]].apply(pd.to_numeric, errors="coerce")
+    hashes = pd.util.hash_pandas_object(
+        pd.concat([ident.astype(str), candidates, y], axis=1), index=False
+    ).values
+    return raw[valid].reset_index(drop=True), y[valid].values.astype(np.float64), hashes[valid]
+
+
+def _fork_full(df: pd.DataFrame, target: str, cancel_token=None) -> dict:
+    raw, y, hashes = _fork_frame(df, target, [f for f in CANDIDATE_FEATURES if f in df.columns])
+    # 剔除与目标高度相关的特征（与 fork_prediction 相同的防泄漏规则）
+    features = [f for f in raw.columns if abs(raw[f].corr(pd.Series(y))) < 0.95]
+    if not features:
+        raise ValueError("没有可用的特征列（候选特征不存在或与目标列高度相关）")
+    medians = raw[features].median()
+    X = raw[features].fillna(medians).values
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42)
+    scaler_X = StandardScaler().fit(X_train)
+    scaler_y = StandardScaler().fit(y_train.reshape(-1, 1))
+    X_train_s = scaler_X.transform(X_train)
+    y_train_s = scaler_y.transform(y_train.reshape(-1, 1)).ravel()
+    # SGDRegressor 的目标函数 mean(½(y-ŷ)²) + ½·alpha·‖w‖² 的闭式解即 Ridge(alpha=alpha·n)
+    closed = Ridge(alpha=FORK_SGD_PARAMS["alpha"] * len(y_train_s)).fit(X_train_s, y_train_s)
+    model = SGDRegressor(**FORK_SGD_PARAMS)
+    # coef_init 会被 SGD 原地更新，传入副本以保留闭式解供收敛检查使用
+    model.fit(X_train_s, y_train_s, coef_init=closed.coef_.copy(), intercept_init=closed.intercept_)
+    check_cancelled(cancel_token)
+
+    # 收敛检查：训练集上的拟合与闭式解相差超出容差时改用闭式解系数
+    r2_sgd, r2_closed = model.score(X_train_s, y_train_s), closed.score(X_train_s, y_train_s)
+    fallback = not np.isfinite(r2_sgd) or r2_sgd < r2_closed - FORK_CLOSED_FORM_TOLERANCE
+    if fallback:
+        model.coef_ = closed.coef_.copy()
+        model.intercept_ = np.atleast_1d(closed.intercept_).astype(np.float64)
+
+    y_pred = _fork_predict({"model": model, "scaler_X": scaler_X, "scaler_y": scaler_y}, X_test)
+    return {
+        "model": model,
+        "scaler_X": scaler_X,
+        "scaler_y": scaler_y,
+        "features": features,
+        "medians": medians.to_dict(),
+        "row_hashes": set(hashes.tolist()),
+        "target_mean": float(np.mean(y_train)),
+        "target_std": float(np.std(y_train)),
+        "samples": int(len(y)),
+        "metrics": {"r2_test": round(float(r2_score(y_test, y_pred)), 4),
+                    "closed_form_fallback": bool(fallback),
+                    "updated_samples": int(len(y))}
+    }
+
+
+def _fork_predict(bundle: dict, X: np.ndarray) -> np.ndarray:
+    y_pred_s = bundle["model"].predict(bundle["scaler_X"].transform(X))
+    return bundle["scaler_y"].inverse_transform(y_pred_s.reshape(-1, 1)).ravel()
+
+
+def _fork_new_data(bundle: dict, df: pd.DataFrame, target: str):
+    """模型未见过的行（行哈希不在训练/历次更新记录中），没有时返回 None"""
+    raw, y, hashes = _fork_frame(df, target, bundle["features"])
+    new = np.array([h not in bundle["row_hashes"] for h in hashes.tolist()], dtype=bool)
+    if not new.any():
+        return None
+    # 缺失值用训练时的中位数填充，保证与训练数据同分布的预处理
+    X = raw[new].fillna(pd.Series(bundle["medians"])).values
+    return {"X": X, "y": y[new], "hashes": hashes[new]}
+
+
+def _fork_drift(bundle: dict, new_data: dict) -> dict:
+    return _drift_report(bundle, new_data["y"], _fork_predict(bundle, new_data["X"]))
+
+
+def _fork_incremental(bundle: dict, new_data: dict, cancel_token=None) -> dict:
+    """在新行上 partial_fit；标准化器沿用训练时的参数（不随增量数据变化）"""
+    X_s = bundle["scaler_X"].transform(new_data["X"])
+    y_s = bundle["scaler_y"].transform(new_data["y"].reshape(-1, 1)).ravel()
+    rng = np.random.RandomState(42)
+    for _ in range(PARTIAL_FIT_EPOCHS):
+        check_cancelled(cancel_token)
+        order = rng.permutation(len(y_s))
+        bundle["model"].partial_fit(X_s[order], y_s[order])
+
+    # 更新后的评估指标沿用全量训练时的留出集 R²，另记录更新后在新数据上的 R²
+    y_pred = _fork_predict(bundle, new_data["X"])
+    bundle["row_hashes"] |= set(new_data["hashes"].tolist())
+    # 累计样本数：全量训练的样本数加上历次增量更新的样本数
+    bundle["samples"] += int(len(new_data["y"]))
+    bundle["metrics"] = {
+        "r2_test": bundle["metrics"]["r2_test"],
+        "r2_new_data_after_update": round(float(r2_score(new_data["y"], y_pred)), 4)
+        if len(y_pred) >= MIN_DRIFT_SAMPLES else None,
+        "updated_samples": int(len(new_data["y"]))
+    }
+    return bundle
+
+
+# ==================== response_time_xgb：响应时间类指标的 XGBoost 模型 ====================
+def _response_time_full(df: pd.DataFrame, target: str, cancel_token=None) -> dict:
+    """与 predict_response_time 相同的预处理（IQR 清洗、RobustScaler）与 XGBoost 超参数"""
+    pred_df = build_prediction_frame(df, target)
+    y = pred_df['response_time'].values
+    Q1, Q3 = np.percentile(y, [25, 75])
+    IQR = Q3 - Q1
+    bounds = (float(Q1 - 2 * IQR), float(Q3 + 2 * IQR))
+    clean = pred_df[(y >= bounds[0]) & (y <= bounds[1])].reset_index(drop=True)
+
+    X = clean[RESPONSE_TIME_FEATURES].values
+    y = clean['response_time'].values
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    scaler = RobustScaler().fit(X_train)
+    callbacks = [cancel_token.xgboost_callback()] if cancel_token else None
+    booster = train_xgboost(xgb.DMatrix(scaler.transform(X_train), y_train),
+                            current_job().threads, callbacks=callbacks)
+
+    y_pred = booster.inplace_predict(scaler.transform(X_test))
+    return {
+        "model": booster,
+        "scaler": scaler,
+        "iqr_bounds": bounds,
+        "last_month": clean['time_str'].max(),
+        "target_mean": float(np.mean(y_train)),
+        "target_std": float(np.std(y_train)),
+        "samples": int(len(y)),
+        "metrics": {"r2_test": round(float(r2_score(y_test, y_pred)), 4),
+                    "num_trees": booster.num_boosted_rounds(), "updated_samples": int(len(y))}
+    }
+
+
+def _response_time_new_data(bundle: dict, df: pd.DataFrame, target: str):
+    """晚于模型最后训练月份的样本（滞后/滑动特征仍基于完整历史计算），没有时返回 None"""
+    pred_df = build_prediction_frame(df, target)
+    if pred_df.empty:
+        return None
+    low, high = bundle["iqr_bounds"]
+    y = pred_df['response_time'].values
+    new = pred_df[(pred_df['time_str'] > bundle["last_month"]).values & (y >= low) & (y <= high)]
+    if new.empty:
+        return None
+    return {"X": bundle["scaler"].transform(new[RESPONSE_TIME_FEATURES].values),
+            "y": new['response_time'].values,
+            "last_month": new['time_str'].max()}
+
+
+def _response_time_drift(bundle: dict, new_data: dict) -> dict:
+    return _drift_report(bundle, new_data["y"], bundle["model"].inplace_predict(new_data["X"]))
+
+
+def _response_time_incremental(bundle: dict, new_data: dict, cancel_token=None) -> dict:
+    """以旧 booster 为起点，在新增月份的样本上追加 XGB_UPDATE_ROUNDS 棵树"""
+    callbacks = [cancel_token.xgboost_callback()] if cancel_token else None
+    booster = train_xgboost(xgb.DMatrix(new_data["X"], new_data["y"]), current_job().threads,
+                            callbacks=callbacks, num_boost_round=XGB_UPDATE_ROUNDS,
+                            xgb_model=bundle["model"])
+    y_pred = booster.inplace_predict(new_data["X"])
+    bundle["model"] = booster
+    bundle["last_month"] = new_data["last_month"]
+    bundle["samples"] += int(len(new_data["y"]))
+    bundle["metrics"] = {
+        "r2_test": bundle["metrics"]["r2_test"],
+        "r2_new_data_after_update": round(float(r2_score(new_data["y"], y_pred)), 4)
+        if len(y_pred) >= MIN_DRIFT_SAMPLES else None,
+        "num_trees": booster.num_boosted_rounds(),
+        "updated_samples": int(len(new_data["y"]))
+    }
+    return bundle
+
+
+_FORK_HANDLERS = {
+    "full": _fork_full,
+    "new_data": _fork_new_data,
+    "drift": _fork_drift,
+    "incremental": _fork_incremental
+}
+
+_RESPONSE_TIME_HANDLERS = {
+    "full": _response_time_full,
+    "new_data": _response_time_new_data,
+    "drift": _response_time_drift,
+    "incremental": _response_time_incremental
+}
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import warnings
+from data_loader import DEFAULT_CSV_PATH, load_dataset, cached_result, project_labels
+warnings.filterwarnings('ignore')
+
+
+# CSV 中以 {'YYYY-MM': 值} 字典形式保存的月度时延类指标
+MONTHLY_METRICS = [
+    'issue_response_time',
+    'issue_resolution_duration',
+    'issue_age',
+    'change_request_response_time',
+    'change_request_resolution_duration',
+    'change_request_age'
+]
+
+_MONTH_VALUE_PATTERN = r"['\"](\d{4}-\d{2})['\"]\s*:\s*([-+\d.eE]+|None|nan)"
+
+
+# ==================== 月度序列张量构建 ====================
+def build_monthly_tensor(csv_path: str = DEFAULT_CSV_PATH) -> dict:
+    """
+    把所有月度字典列对齐为一个稠密张量 (指标数 × 项目数 × 月份数)，缺失月份为 NaN
+    （每个数据集版本只构建一次；字符串用 str.extractall 整列解析，不逐行 eval）
+
+    返回:
+        {
+            "metrics": [...],          # 张量第 0 维对应的指标列
+            "months": [...],           # 张量第 2 维对应的月份（'YYYY-MM'，升序）
+            "values": np.ndarray,      # float64 (K × P × M)
+            "labels": list             # 项目全名 owner/repo
+        }
+    """
+    def build():
+        df = load_dataset(csv_path)
+        metrics = [m for m in MONTHLY_METRICS if m in df.columns]
+
+        # 1. 抽取所有 (指标, 项目, 月份, 值) 记录
+        parts = []
+        for k, metric in enumerate(metrics):
+            matches = df[metric].reset_index(drop=True).fillna('').astype(str).str.extractall(_MONTH_VALUE_PATTERN)
+            parts.append(pd.DataFrame({
+                "metric": k,
+                "project": matches.index.get_level_values(0).values,
+                "month": matches[0].values,
+                "value": pd.to_numeric(matches[1].values, errors='coerce')
+            }))
+        records = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(
+            {"metric": [], "project": [], "month": [], "value": []})
+
+        # 2. 月份统一编码后直接按下标写入稠密张量
+        month_codes, months = pd.factorize(records["month"], sort=True)
+        values = np.full((len(metrics), len(df), len(months)), np.nan, dtype=np.float64)
+        values[records["metric"].values.astype(np.int64),
+               records["project"].values.astype(np.int64),
+               month_codes] = records["value"].values
+
+        return {
+            "metrics": metrics,
+            "months": [str(m) for m in months],
+            "values": values,
+            "labels": project_labels(df)
+        }
+
+    return cached_result("monthly_tensor", csv_path, (), build)
+
+
+def get_metric_matrix(metric: str, csv_path: str = DEFAULT_CSV_PATH):
+    """返回单个月度指标的 (项目数 × 月份数) 矩阵视图和月份列表"""
+    tensor = build_monthly_tensor(csv_path)
+    if metric not in tensor["metrics"]:
+        raise ValueError(f"未知的月度指标: {metric}，可选: {', '.join(tensor['metrics'])}")
+    return tensor["values"][tensor["metrics"].index(metric)], tensor["months"]
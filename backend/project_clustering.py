@@ -0,0 +1,164 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.metrics import silhouette_score
+import warnings
+from data_loader import (DEFAULT_CSV_PATH, load_dataset, get_dataset_version, cached_result,
+                         artifact_path, resolve_project)
+from similarity_index import build_similarity_index
+from activity_matrix import build_activity_matrix, DAYS_PER_WEEK, HOURS_PER_DAY
+warnings.filterwarnings('ignore')
+
+
+# 自动选择 k 时的候选范围与抽样规模
+K_CANDIDATES = range(2, 9)
+SILHOUETTE_SAMPLE_SIZE = 5000
+
+
+# ==================== 封装的聚类函数 ====================
+def run_project_clustering(csv_path: str = DEFAULT_CSV_PATH, n_clusters: int = None,
+                           force: bool = False) -> dict:
+    """
+    对项目做 Mini-Batch K-Means 分群，结果按数据集版本持久化到 <数据集目录>/cache/
+
+    特征由两部分组成，两部分权重相同：
+        1. 标准化后的指标画像（与相似项目检索使用同一套特征）
+        2. 活跃时段画像：24 小时分布 + 7 天分布（Z-score 标准化）
+
+    参数:
+        csv_path: CSV文件路径
+        n_clusters: 指定簇数；为空时在抽样数据上按轮廓系数从 K_CANDIDATES 中自动选择
+        force: 忽略已持久化的结果，强制重新聚类
+
+    返回:
+        {
+            "metadata": {...},     # 数据集版本、k、各候选 k 的轮廓系数等
+            "clusters": [...],     # 每个簇的规模、质心、指标中位数、代表项目
+            "assignments": [...]   # 每个项目所属的簇（与数据集行顺序一致）
+        }
+    """
+    def compute():
+        path = artifact_path(csv_path, f"clusters_k{n_clusters or 'auto'}")
+        if not force and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+
+        result = _cluster(csv_path, n_clusters)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False)
+        return result
+
+    return cached_result("project_clusters", csv_path, (n_clusters,), compute, refresh=force)
+
+
+def get_project_clusters(csv_path: str = DEFAULT_CSV_PATH, n_clusters: int = None,
+                         include_assignments: bool = False) -> dict:
+    """获取分群结果（默认不返回逐项目的分配结果，避免大数据集时响应过大）"""
+    result = run_project_clustering(csv_path, n_clusters)
+    if include_assignments:
+        return result
+    return {k: v for k, v in result.items() if k != "assignments"}
+
+
+def get_project_cluster(project: str, csv_path: str = DEFAULT_CSV_PATH, n_clusters: int = None) -> dict:
+    """查询单个项目所属的簇及簇内代表项目"""
+    result = run_project_clustering(csv_path, n_clusters)
+    i = resolve_project(load_dataset(csv_path), project)
+    assignment = result["assignments"][i]
+    cluster = result["clusters"][assignment["cluster"]]
+    return {
+        "dataset_version": result["metadata"]["dataset_version"],
+        **assignment,
+        "cluster_size": cluster["size"],
+        "cluster_examples": cluster["example_projects"]
+    }
+
+
+# ==================== 聚类实现 ====================
+def _cluster(csv_path: str, n_clusters: int) -> dict:
+    index = build_similarity_index(csv_path)
+    activity = build_activity_matrix(csv_path)
+    df = load_dataset(csv_path)
+    labels = index["labels"]
+
+    X, feature_names = _build_features(index, activity)
+    rng = np.random.RandomState(42)
+
+    # 1. 在抽样数据上按轮廓系数选择 k
+    silhouette = {}
+    sample = rng.choice(len(X), size=min(len(X), SILHOUETTE_SAMPLE_SIZE), replace=False)
+    if n_clusters is None:
+        for k in K_CANDIDATES:
+            if k >= len(sample):
+                break
+            sample_labels = _kmeans(k).fit_predict(X[sample])
+            if len(np.unique(sample_labels)) > 1:
+                silhouette[k] = round(float(silhouette_score(X[sample], sample_labels)), 4)
+        n_clusters = max(silhouette, key=silhouette.get) if silhouette else min(2, len(X))
+
+    # 2. 全量数据 Mini-Batch K-Means
+    model = _kmeans(n_clusters).fit(X)
+    assignments = model.labels_
+    distances = np.linalg.norm(X - model.cluster_centers_[assignments], axis=1)
+
+    # 3. 簇画像：规模、质心（标准化空间）、原始指标中位数、高峰时段、离质心最近的代表项目
+    raw = df[index["features"]].apply(pd.to_numeric, errors='coerce')
+    medians = raw.groupby(assignments).median()
+    hour_profiles = activity["profiles"].reshape(-1, DAYS_PER_WEEK, HOURS_PER_DAY).sum(axis=1)
+
+    clusters = []
+    for c in range(n_clusters):
+        members = np.flatnonzero(assignments == c)
+        closest = members[np.argsort(distances[members], kind='stable')[:5]]
+        mean_hours = hour_profiles[members].mean(axis=0) if len(members) else np.zeros(HOURS_PER_DAY)
+        clusters.append({
+            "cluster": c,
+            "size": int(len(members)),
+            "centroid": {f: round(float(v), 4) for f, v in zip(feature_names, model.cluster_centers_[c])},
+            "indicator_medians": {
+                f: (None if pd.isna(v) else round(float(v), 4))
+                for f, v in (medians.loc[c].items() if c in medians.index else [])
+            },
+            "peak_hour": int(np.argmax(mean_hours)),
+            "example_projects": [labels[i] for i in closest]
+        })
+
+    return {
+        "metadata": {
+            "dataset_version": get_dataset_version(csv_path),
+            "n_clusters": int(n_clusters),
+            "chosen_by": "silhouette" if silhouette else "fixed",
+            "silhouette_scores": {str(k): v for k, v in silhouette.items()},
+            "silhouette_sample_size": int(len(sample)),
+            "features": feature_names,
+            "project_count": int(len(X)),
+            "inertia": round(float(model.inertia_), 4)
+        },
+        "clusters": clusters,
+        "assignments": [
+            {"project": labels[i], "cluster": int(c), "distance": round(float(d), 4)}
+            for i, (c, d) in enumerate(zip(assignments, distances))
+        ]
+    }
+
+
+def _build_features(index: dict, activity: dict):
+    indicators = index["matrix"]
+    profiles = activity["profiles"].reshape(-1, DAYS_PER_WEEK, HOURS_PER_DAY)
+    rhythm = np.hstack([profiles.sum(axis=1), profiles.sum(axis=2)]).astype(np.float64)
+    std = rhythm.std(axis=0)
+    rhythm = (rhythm - rhythm.mean(axis=0)) / np.where(std > 0, std, 1.0)
+
+    # 两块特征维度不同，按维度数缩放使两块的总方差相同
+    rhythm *= np.sqrt(indicators.shape[1] / rhythm.shape[1])
+    names = (index["features"]
+             + [f"hour_{h}" for h in range(HOURS_PER_DAY)]
+             + [f"day_{d}" for d in range(DAYS_PER_WEEK)])
+    return np.hstack([indicators, rhythm]), names
+
+
+def _kmeans(k: int) -> MiniBatchKMeans:
+    return MiniBatchKMeans(n_clusters=k, batch_size=1024, n_init=3, random_state=42)
+
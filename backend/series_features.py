@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+import warnings
+from data_loader import DEFAULT_CSV_PATH, load_dataset, cached_result, resolve_project
+from feature_store import load_feature_set
+from monthly_series import build_monthly_tensor
+from activity_matrix import build_activity_matrix
+warnings.filterwarnings('ignore')
+
+
+# 近期窗口：数据集最后 RECENT_MONTHS 个月与之前的月份对比
+RECENT_MONTHS = 6
+
+# 每个月度指标派生的特征（列名为 <指标>_<后缀>）
+MONTHLY_FEATURE_SUFFIXES = ['slope', 'recent_ratio', 'volatility', 'coverage']
+# 按周小时活跃向量派生的特征
+ACTIVITY_FEATURES = ['activity_coverage', 'activity_volatility', 'activity_peak_share', 'activity_entropy']
+
+
+# ==================== 批量时序特征 ====================
+def build_series_features(csv_path: str = DEFAULT_CSV_PATH) -> dict:
+    """
+    从月度张量与活跃时段矩阵一次性为所有项目计算时序特征（每个数据集版本只计算一次）
+
+    月度指标（每个指标 4 列，全部基于张量整体的向量化运算，无逐项目循环）:
+        slope: 按月份序号的最小二乘斜率（观测少于 2 个月为 NaN）
+        recent_ratio: log1p(近 RECENT_MONTHS 个月均值) - log1p(更早月份均值)，即对数尺度上的近期/历史比
+        volatility: 标准差 / (|均值| + 1)，对 0 值较多的时延序列也稳定
+        coverage: 有观测的月份占比
+    活跃时段向量（168 维）:
+        activity_coverage: 有活动的小时占比
+        activity_volatility: 各小时计数的变异系数
+        activity_peak_share: 最活跃小时占总活动的比例
+        activity_entropy: 活跃分布的归一化熵（0 表示集中在一个小时，1 表示完全均匀）
+
+    返回:
+        {
+            "columns": [...],        # 特征列名
+            "values": np.ndarray,    # float64 (项目数 × 特征数)，无法计算的位置为 NaN
+            "labels": list           # 项目全名 owner/repo
+        }
+    """
+    def build():
+        tensor = build_monthly_tensor(csv_path)
+        activity = build_activity_matrix(csv_path)
+        columns, blocks = [], []
+
+        # 1. 月度指标：张量 (K × P × M) 上一次性计算所有指标、所有项目
+        values = tensor["values"]
+        if values.shape[2] > 0:
+            observed = ~np.isnan(values)
+            count = observed.sum(axis=2)
+            x = np.broadcast_to(np.arange(values.shape[2], dtype=np.float64), values.shape)
+            y = np.where(observed, values, 0.0)
+            xo = np.where(observed, x, 0.0)
+            sx, sy = xo.sum(axis=2), y.sum(axis=2)
+            sxx, sxy = (xo * xo).sum(axis=2), (xo * y).sum(axis=2)
+            denom = count * sxx - sx * sx
+            with np.errstate(invalid='ignore', divide='ignore'):
+                slope = np.where((count >= 2) & (denom > 0), (count * sxy - sx * sy) / denom, np.nan)
+                mean = np.where(count > 0, sy / count, np.nan)
+                var = np.where(count > 0, (y * y).sum(axis=2) / count - mean * mean, np.nan)
+                volatility = np.sqrt(np.clip(var, 0, None)) / (np.abs(mean) + 1)
+
+                recent, history = values[:, :, -RECENT_MONTHS:], values[:, :, :-RECENT_MONTHS]
+                recent_mean = np.nanmean(recent, axis=2) if recent.shape[2] else np.full(count.shape, np.nan)
+                history_mean = np.nanmean(history, axis=2) if history.shape[2] else np.full(count.shape, np.nan)
+                recent_ratio = np.log1p(np.clip(recent_mean, 0, None)) - np.log1p(np.clip(history_mean, 0, None))
+            coverage = count / values.shape[2]
+
+            for k, metric in enumerate(tensor["metrics"]):
+                columns += [f"{metric}_{suffix}" for suffix in MONTHLY_FEATURE_SUFFIXES]
+                blocks.append(np.column_stack([slope[k], recent_ratio[k], volatility[k], coverage[k]]))
+
+        # 2. 活跃时段向量：(P × 168) 矩阵按行统计
+        matrix = activity["matrix"].astype(np.float64)
+        valid = activity["valid"]
+        totals = matrix.sum(axis=1)
+        hour_mean = matrix.mean(axis=1)
+        profiles = activity["profiles"].astype(np.float64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            entropy = -np.where(profiles > 0, profiles * np.log(profiles), 0.0).sum(axis=1) / np.log(matrix.shape[1])
+            activity_block = np.column_stack([
+                (matrix > 0).mean(axis=1),
+                matrix.std(axis=1) / hour_mean,
+                matrix.max(axis=1) / totals,
+                entropy
+            ])
+        activity_block[~valid] = np.nan
+        columns += ACTIVITY_FEATURES
+        blocks.append(activity_block)
+
+        return {
+            "columns": columns,
+            "values": np.ascontiguousarray(np.hstack(blocks)),
+            "labels": tensor["labels"]
+        }
+
+    return cached_result("series_features", csv_path, (), build)
+
+
+def series_feature_frame(csv_path: str = DEFAULT_CSV_PATH, prefix: str = "ts_") -> pd.DataFrame:
+    """
+    时序特征矩阵的 DataFrame 视图（特征存储中的 "series" 特征集，内存映射），
+    行顺序与 load_dataset 一致，可直接与原始列拼接（列名加 prefix，避免与 CSV 原始列重名）
+    """
+    def build():
+        features = build_series_features(csv_path)
+        return pd.DataFrame(features["values"], columns=features["columns"])
+
+    frame = load_feature_set(csv_path, "series", build)
+    frame.columns = [prefix + c for c in frame.columns]
+    return frame
+
+
+# ==================== 封装的查询函数 ====================
+def get_series_features(csv_path: str = DEFAULT_CSV_PATH, project: str = None) -> dict:
+    """
+    查询时序特征：不指定项目时返回每个特征的覆盖率与分布概况，指定项目时返回该项目的特征向量
+
+    参数:
+        csv_path: CSV文件路径
+        project: 项目名（owner/repo、repo 或行号），可选
+    """
+    features = build_series_features(csv_path)
+    values = features["values"]
+
+    if project is not None:
+        row = resolve_project(load_dataset(csv_path), project)
+        return {
+            "project": features["labels"][row],
+            "features": {
+                c: (None if np.isnan(v) else round(float(v), 6))
+                for c, v in zip(features["columns"], values[row])
+            }
+        }
+
+    with np.errstate(invalid='ignore'):
+        summary = [
+            {
+                "feature": c,
+                "coverage": round(float(np.mean(~np.isnan(values[:, j]))), 4),
+                "mean": _round(np.nanmean(values[:, j])),
+                "std": _round(np.nanstd(values[:, j])),
+                "min": _round(np.nanmin(values[:, j])),
+                "max": _round(np.nanmax(values[:, j]))
+            }
+            for j, c in enumerate(features["columns"])
+        ]
+    return {
+        "total_projects": int(values.shape[0]),
+        "recent_months": RECENT_MONTHS,
+        "features": summary
+    }
+
+
+def _round(value) -> float:
+    return None if np.isnan(value) else round(float(value), 6)
@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import NearestNeighbors
+import warnings
+from data_loader import (DEFAULT_CSV_PATH, load_dataset, get_dataset_version, cached_result,
+                         project_labels, resolve_project)
+from indicators_stat import TARGET_INDICATORS
+warnings.filterwarnings('ignore')
+
+
+# 相似度特征：6个核心指标 + 影响力指标
+SIMILARITY_FEATURES = TARGET_INDICATORS + ['openrank', 'stars', 'attention']
+
+# 支持的度量：euclidean 使用 KD-tree，cosine 使用分块暴力矩阵乘法
+SIMILARITY_METRICS = ('euclidean', 'cosine')
+
+# 分块计算时每块的行数（控制 块大小 × 项目数 的临时矩阵内存）
+_BLOCK_SIZE = 1024
+
+
+# ==================== 相似度索引构建 ====================
+def build_similarity_index(csv_path: str = DEFAULT_CSV_PATH) -> dict:
+    """
+    对相似度特征做 log1p + Z-score 标准化，并构建 KD-tree（每个数据集版本只构建一次）
+
+    返回:
+        {
+            "features": list,        # 实际使用的特征列
+            "matrix": np.ndarray,    # float64 (项目数 × 特征数)，标准化后的特征
+            "unit": np.ndarray,      # float32，行 L2 归一化（余弦相似度用）
+            "tree": NearestNeighbors,
+            "labels": list
+        }
+    """
+    def build():
+        df = load_dataset(csv_path)
+        features = [c for c in SIMILARITY_FEATURES if c in df.columns]
+        if not features:
+            raise ValueError("数据集中没有可用的相似度特征列")
+
+        # 计数类指标长尾明显，先 log1p 压缩再标准化；缺失值用中位数填充
+        X = df[features].apply(pd.to_numeric, errors='coerce')
+        X = X.fillna(X.median())
+        X = np.log1p(X.clip(lower=0).values.astype(np.float64))
+        std = X.std(axis=0)
+        X = (X - X.mean(axis=0)) / np.where(std > 0, std, 1.0)
+
+        norms = np.linalg.norm(X, axis=1, keepdims=True)
+        unit = np.divide(X, norms, out=np.zeros_like(X), where=norms > 0).astype(np.float32)
+
+        tree = NearestNeighbors(algorithm='kd_tree', metric='euclidean').fit(X)
+        return {
+            "features": features,
+            "matrix": X,
+            "unit": unit,
+            "tree": tree,
+            "labels": project_labels(df)
+        }
+
+    return cached_result("similarity_index", csv_path, (), build)
+
+
+# ==================== 封装的查询函数 ====================
+def find_similar_projects(project: str, top_k: int = 10, metric: str = 'euclidean',
+                          csv_path: str = DEFAULT_CSV_PATH) -> dict:
+    """
+    查找指标画像最相近的项目
+
+    参数:
+        project: owner/repo 或仓库名
+        top_k: 返回的相似项目个数
+        metric: euclidean（标准化空间的欧氏距离，KD-tree 查询）或 cosine（余弦相似度）
+
+    返回:
+        {
+            "project": "...",
+            "metric": "euclidean",
+            "features": [...],
+            "similar_projects": [{"project": "...", "score": 0.12}, ...]
+        }
+        euclidean 时 score 为距离（越小越相似），cosine 时为相似度（越大越相似）
+    """
+    index = build_similarity_index(csv_path)
+    i = resolve_project(load_dataset(csv_path), project)
+    neighbours, scores = _query(index, np.array([i]), top_k, metric)
+
+    return {
+        "project": index["labels"][i],
+        "metric": metric,
+        "features": index["features"],
+        "similar_projects": [
+            {"project": index["labels"][j], "score": round(float(s), 4)}
+            for j, s in zip(neighbours[0], scores[0])
+        ]
+    }
+
+
+def get_all_similar_projects(top_k: int = 5, metric: str = 'euclidean', csv_path: str = DEFAULT_CSV_PATH) -> dict:
+    """
+    批量模式：一次返回每个项目的 top_k 相似项目（按数据集版本缓存）
+    """
+    def build():
+        index = build_similarity_index(csv_path)
+        rows = np.arange(len(index["labels"]))
+        neighbours, scores = _query(index, rows, top_k, metric)
+        return {
+            "metadata": {
+                "dataset_version": get_dataset_version(csv_path),
+                "metric": metric,
+                "top_k": top_k,
+                "features": index["features"],
+                "project_count": int(len(rows))
+            },
+            "neighbours": [
+                {
+                    "project": index["labels"][i],
+                    "similar_projects": [
+                        {"project": index["labels"][j], "score": round(float(s), 4)}
+                        for j, s in zip(neighbours[i], scores[i])
+                    ]
+                }
+                for i in rows
+            ]
+        }
+
+    return cached_result("similar_projects_all", csv_path, (top_k, metric), build)
+
+
+def _query(index: dict, rows: np.ndarray, top_k: int, metric: str):
+    """返回 rows 中每个项目的 (近邻位置, 得分)，结果不包含项目自身"""
+    if metric not in SIMILARITY_METRICS:
+        raise ValueError(f"不支持的相似度度量: {metric}，可选: {', '.join(SIMILARITY_METRICS)}")
+    n = len(index["labels"])
+    k = min(top_k, n - 1)
+    if k <= 0:
+        return np.zeros((len(rows), 0), dtype=np.int64), np.zeros((len(rows), 0))
+
+    if metric == 'euclidean':
+        # 多取一个近邻，再去掉项目自身（存在完全相同的画像时自身不一定排第一）
+        distances, neighbours = index["tree"].kneighbors(index["matrix"][rows], n_neighbors=k + 1)
+        keep = neighbours != rows[:, None]
+        neighbours = np.array([nb[m][:k] for nb, m in zip(neighbours, keep)])
+        distances = np.array([d[m][:k] for d, m in zip(distances, keep)])
+        return neighbours, distances
+
+    # cosine：分块做 (块 × 特征) @ (特征 × 项目) 的矩阵乘法，避免构造完整的 项目×项目 矩阵
+    unit = index["unit"]
+    all_neighbours = np.empty((len(rows), k), dtype=np.int64)
+    all_scores = np.empty((len(rows), k), dtype=np.float64)
+    for start in range(0, len(rows), _BLOCK_SIZE):
+        block = rows[start:start + _BLOCK_SIZE]
+        sims = unit[block] @ unit.T
+        sims[np.arange(len(block)), block] = -np.inf
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(sims, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        all_neighbours[start:start + len(block)] = np.take_along_axis(top, order, axis=1)
+        all_scores[start:start + len(block)] = np.take_along_axis(top_scores, order, axis=1)
+    return all_neighbours, all_scores
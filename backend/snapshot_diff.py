@@ -0,0 +1,233 @@
+import os
+import numpy as np
+import pandas as pd
+import warnings
+from data_loader import load_dataset, get_dataset_version, cached_result, numeric_columns, project_labels
+warnings.filterwarnings('ignore')
+
+
+# 默认的排名列（排名变化与新进/退出项目的排名依据）
+DEFAULT_RANK_COLUMN = 'openrank'
+
+
+# ==================== 快照对齐（按版本对缓存） ====================
+def build_snapshot_diff(base_csv: str, compare_csv: str) -> dict:
+    """
+    以 projectname/projectname2 为键对齐两个数据集快照（一次向量化外连接），
+    缓存两边共有数值列的取值矩阵与各列排名，每个 (基准版本, 对比版本) 组合只计算一次
+
+    返回:
+        {
+            "columns": [...],                       # 两个快照共有的数值列
+            "labels": [...],                        # 两边都有的项目全名 owner/repo
+            "old": np.ndarray, "new": np.ndarray,   # (共有项目数 × 列数)，缺失为 NaN
+            "old_rank": np.ndarray, "new_rank": np.ndarray,  # 各列在各自快照全体项目中的降序排名（1 为最高）
+            "entered": DataFrame,                   # 仅在对比快照中的项目（label + 各列取值与排名）
+            "exited": DataFrame                     # 仅在基准快照中的项目
+        }
+    """
+    def compute():
+        base, compare = load_dataset(base_csv), load_dataset(compare_csv)
+        keys = [k for k in ('projectname', 'projectname2') if k in base.columns and k in compare.columns]
+        if 'projectname2' not in keys:
+            raise ValueError("两个数据集都需要包含 projectname2 列才能对比")
+
+        base_numeric = set(numeric_columns(base))
+        columns = [c for c in numeric_columns(compare) if c in base_numeric]
+
+        # 键列统一为字符串；重复的项目只保留第一行
+        left = base[keys].astype(str).assign(_row_old=np.arange(len(base)))
+        right = compare[keys].astype(str).assign(_row_new=np.arange(len(compare)))
+        left = left.drop_duplicates(keys)
+        right = right.drop_duplicates(keys)
+        merged = left.merge(right, on=keys, how='outer', indicator=True, sort=False)
+
+        base_values = base[columns].to_numpy(dtype=np.float64)
+        compare_values = compare[columns].to_numpy(dtype=np.float64)
+        base_rank = base[columns].rank(ascending=False, method='min').to_numpy()
+        compare_rank = compare[columns].rank(ascending=False, method='min').to_numpy()
+        base_labels = np.asarray(project_labels(base), dtype=object)
+        compare_labels = np.asarray(project_labels(compare), dtype=object)
+
+        both = merged[merged['_merge'] == 'both']
+        old_rows = both['_row_old'].to_numpy(dtype=np.int64)
+        new_rows = both['_row_new'].to_numpy(dtype=np.int64)
+
+        def side(rows, labels, values, ranks):
+            frame = pd.DataFrame(values[rows], columns=columns)
+            frame.insert(0, 'label', labels[rows])
+            ranked = pd.DataFrame(ranks[rows], columns=[f"{c}__rank" for c in columns])
+            return pd.concat([frame, ranked], axis=1)
+
+        entered = merged.loc[merged['_merge'] == 'right_only', '_row_new'].to_numpy(dtype=np.int64)
+        exited = merged.loc[merged['_merge'] == 'left_only', '_row_old'].to_numpy(dtype=np.int64)
+
+        return {
+            "columns": columns,
+            "labels": compare_labels[new_rows].tolist(),
+            "old": base_values[old_rows],
+            "new": compare_values[new_rows],
+            "old_rank": base_rank[old_rows],
+            "new_rank": compare_rank[new_rows],
+            "entered": side(entered, compare_labels, compare_values, compare_rank),
+            "exited": side(exited, base_labels, base_values, base_rank)
+        }
+
+    # 以对比快照的版本为缓存版本，基准快照的版本作为参数，键即 (基准版本, 对比版本)
+    return cached_result("snapshot_diff", compare_csv, get_dataset_version(base_csv), compute)
+
+
+# ==================== 封装的快照对比函数 ====================
+def diff_snapshots(base_csv: str,
+                   compare_csv: str,
+                   columns: list = None,
+                   threshold: float = 0.1,
+                   absolute: bool = False,
+                   rank_by: str = DEFAULT_RANK_COLUMN,
+                   min_rank_change: int = 1,
+                   limit: int = 100) -> dict:
+    """
+    对比两个数据集快照（例如上月与本月）：逐项目、逐列的变化量，排名变化，新进与退出的项目
+
+    参数:
+        base_csv: 基准快照（较早）的 CSV 路径
+        compare_csv: 对比快照（较新）的 CSV 路径
+        columns: 只对比这些数值列（可选，默认两边共有的全部数值列）
+        threshold: 变化阈值，absolute=False 时为相对变化 |新-旧|/|旧|（旧值为 0 时视为无穷大），
+                   absolute=True 时为绝对变化 |新-旧|；只返回达到阈值且确有变化的 (项目, 列)
+        absolute: 阈值是否按绝对变化量
+        rank_by: 排名变化与新进/退出项目排名所依据的列（不在共有列中时不计算排名变化）
+        min_rank_change: 只返回排名变化（名次数）不小于该值的项目
+        limit: changes / rank_movements / entered / exited 各自返回的条数上限
+
+    返回:
+        {
+            "metadata": {...},
+            "summary": {"by_column": {...}},        # 全量计数（不受 limit 影响）
+            "changes": [...],                       # 按变化幅度降序
+            "rank_movements": [...],                # 按名次变化绝对值降序，rank_change > 0 为上升
+            "entered": [...],                       # 按对比快照中 rank_by 排名升序
+            "exited": [...]                         # 按基准快照中 rank_by 排名升序
+        }
+    """
+    if threshold < 0:
+        raise ValueError("threshold 不能为负数")
+
+    diff = build_snapshot_diff(base_csv, compare_csv)
+    all_columns = diff["columns"]
+    if columns:
+        unknown = [c for c in columns if c not in all_columns]
+        if unknown:
+            raise ValueError(f"未知或非两个快照共有的数值列: {', '.join(unknown)}")
+        col_idx = np.array([all_columns.index(c) for c in columns], dtype=np.int64)
+    else:
+        columns = all_columns
+        col_idx = np.arange(len(all_columns))
+
+    # 1. 逐 (项目, 列) 变化量：整张矩阵一次计算，再按阈值取出满足条件的位置
+    old, new = diff["old"][:, col_idx], diff["new"][:, col_idx]
+    delta = new - old
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct = np.where(old != 0, delta / np.abs(old), np.where(delta != 0, np.inf, 0.0))
+    magnitude = np.abs(delta) if absolute else np.abs(pct)
+    changed = ~np.isnan(delta) & (delta != 0) & (magnitude >= threshold)
+
+    rows, cols = np.nonzero(changed)
+    order = np.lexsort((-np.abs(delta[rows, cols]), -magnitude[rows, cols]))[:limit]
+    rows, cols = rows[order], cols[order]
+    labels = diff["labels"]
+
+    changes = [
+        {
+            "project": labels[r],
+            "column": columns[c],
+            "old": _round(old[r, c]),
+            "new": _round(new[r, c]),
+            "delta": _round(delta[r, c]),
+            "pct_change": _round(pct[r, c])
+        }
+        for r, c in zip(rows.tolist(), cols.tolist())
+    ]
+
+    summary = {
+        col: {
+            "changed": int(changed[:, j].sum()),
+            "increased": int((changed[:, j] & (delta[:, j] > 0)).sum()),
+            "decreased": int((changed[:, j] & (delta[:, j] < 0)).sum()),
+            "total_old": _round(np.nansum(old[:, j])),
+            "total_new": _round(np.nansum(new[:, j]))
+        }
+        for j, col in enumerate(columns)
+    }
+
+    # 2. 排名变化（名次为各自快照全体项目中的排名，正值表示上升）
+    rank_movements, total_moved = [], 0
+    if rank_by in all_columns:
+        k = all_columns.index(rank_by)
+        old_rank, new_rank = diff["old_rank"][:, k], diff["new_rank"][:, k]
+        movement = old_rank - new_rank
+        moved = np.nonzero(~np.isnan(movement) & (np.abs(movement) >= max(min_rank_change, 1)))[0]
+        total_moved = int(len(moved))
+        moved = moved[np.lexsort((new_rank[moved], -np.abs(movement[moved])))][:limit]
+        rank_movements = [
+            {
+                "project": labels[r],
+                "old_rank": int(old_rank[r]),
+                "new_rank": int(new_rank[r]),
+                "rank_change": int(movement[r]),
+                "old": _round(diff["old"][r, k]),
+                "new": _round(diff["new"][r, k])
+            }
+            for r in moved.tolist()
+        ]
+
+    return {
+        "metadata": {
+            "base": _snapshot_meta(base_csv),
+            "compare": _snapshot_meta(compare_csv),
+            "common_projects": len(labels),
+            "entered_projects": int(len(diff["entered"])),
+            "exited_projects": int(len(diff["exited"])),
+            "columns": columns,
+            "threshold": threshold,
+            "absolute": absolute,
+            "rank_by": rank_by if rank_by in all_columns else None,
+            "total_changes": int(changed.sum()),
+            "total_rank_movements": total_moved
+        },
+        "summary": {"by_column": summary},
+        "changes": changes,
+        "rank_movements": rank_movements,
+        "entered": _membership(diff["entered"], rank_by, all_columns, limit),
+        "exited": _membership(diff["exited"], rank_by, all_columns, limit)
+    }
+
+
+def _membership(frame: pd.DataFrame, rank_by: str, all_columns: list, limit: int) -> list:
+    """新进/退出项目列表：按 rank_by 在所属快照中的排名排序（无排名列时保持原顺序）"""
+    if rank_by in all_columns:
+        frame = frame.sort_values(f"{rank_by}__rank", na_position='last', kind='stable')
+    frame = frame.head(limit)
+    if rank_by not in all_columns:
+        return [{"project": label} for label in frame['label']]
+    return [
+        {
+            "project": label,
+            "rank": None if np.isnan(rank) else int(rank),
+            rank_by: _round(value)
+        }
+        for label, rank, value in zip(frame['label'], frame[f"{rank_by}__rank"], frame[rank_by])
+    ]
+
+
+def _snapshot_meta(csv_path: str) -> dict:
+    return {
+        "file": os.path.basename(csv_path),
+        "dataset_version": get_dataset_version(csv_path),
+        "projects": int(len(load_dataset(csv_path)))
+    }
+
+
+def _round(value) -> float:
+    value = float(value)
+    return None if np.isnan(value) or np.isinf(value) else round(value, 6)